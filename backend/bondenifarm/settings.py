@@ -196,10 +196,17 @@ CACHES = {
         'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Cached analytics are an optimisation; a Redis outage must not
+            # fail the writes that invalidate them.
+            'IGNORE_EXCEPTIONS': True,
         }
     }
 }
 
+# Inventory: reject sales, stock movements and crop inputs that would take a
+# consumable's quantity on hand below zero (see inventory.stock).
+INVENTORY_PREVENT_NEGATIVE_STOCK = os.environ.get('INVENTORY_PREVENT_NEGATIVE_STOCK', 'False').lower() in ('true', '1', 'yes')
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
 
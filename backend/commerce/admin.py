@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Sale, Purchase, Expenditure
+from .models import Sale, SaleProductConsumable, Purchase, Expenditure
 
 @admin.register(Sale)
 class SaleAdmin(admin.ModelAdmin):
@@ -7,10 +7,16 @@ class SaleAdmin(admin.ModelAdmin):
     list_filter = ('product', 'payment_status', 'date')
     search_fields = ('customer_name',)
 
+@admin.register(SaleProductConsumable)
+class SaleProductConsumableAdmin(admin.ModelAdmin):
+    list_display = ('product', 'consumable', 'farm')
+    list_filter = ('product', 'farm')
+    autocomplete_fields = ('consumable',)
+
 @admin.register(Purchase)
 class PurchaseAdmin(admin.ModelAdmin):
-    list_display = ('date', 'supplier', 'total_amount')
-    list_filter = ('date',)
+    list_display = ('date', 'supplier', 'total_amount', 'status')
+    list_filter = ('status', 'date')
 
 @admin.register(Expenditure)
 class ExpenditureAdmin(admin.ModelAdmin):
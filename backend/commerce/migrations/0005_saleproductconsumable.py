@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:14
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commerce', '0004_sale_consumable'),
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0004_consumable_name_ci'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleProductConsumable',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('product', models.CharField(choices=[('EGGS', 'Eggs'), ('MILK', 'Milk'), ('TOMATOES', 'Tomatoes'), ('MANURE', 'Manure'), ('OTHER', 'Other')], max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('consumable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_products', to='inventory.consumable')),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_product_consumables', to='core.farm')),
+            ],
+            options={
+                'unique_together': {('farm', 'product')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commerce', '0005_saleproductconsumable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'Draft'), ('CONFIRMED', 'Confirmed')], default='CONFIRMED', max_length=20),
+        ),
+    ]
@@ -42,13 +42,32 @@ class Sale(models.Model):
     def __str__(self):
         return f"{self.product} - {self.date}"
 
+class SaleProductConsumable(models.Model):
+    """Admin override: which consumable a sale of this product draws from."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='sale_product_consumables')
+    product = models.CharField(max_length=50, choices=Sale.Product.choices)
+    consumable = models.ForeignKey('inventory.Consumable', on_delete=models.CASCADE, related_name='sale_products')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['farm', 'product']
+
+    def __str__(self):
+        return f"{self.get_product_display()} -> {self.consumable}"
+
 class Purchase(models.Model):
+    class Status(models.TextChoices):
+        DRAFT = 'DRAFT', 'Draft'
+        CONFIRMED = 'CONFIRMED', 'Confirmed'
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='purchases')
     date = models.DateField()
     supplier = models.CharField(max_length=255)
     items = models.JSONField(help_text="Line items of purchase", default=dict)
     total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.CONFIRMED)
     custom_data = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
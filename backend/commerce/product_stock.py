@@ -0,0 +1,57 @@
+"""
+Which consumable a sale draws from when it has no explicit link.
+
+Each farm's Sale.Product -> Consumable mapping is built in one query
+(admin overrides first, then consumables named like the product, matched
+through the lower(item_name) index) and cached until a consumable or an
+override of that farm changes.
+"""
+from django.core.cache import cache
+from django.db.models.functions import Lower
+
+from inventory.models import Consumable
+
+from .models import Sale, SaleProductConsumable
+
+CACHE_KEY = 'commerce:product-consumables:{farm_id}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def build_product_mapping(farm_id):
+    """{product: (consumable_id, warehouse_id)} for the farm."""
+    labels = {label.lower(): value for value, label in Sale.Product.choices}
+    mapping = {}
+    matches = (
+        Consumable.objects.filter(farm_id=farm_id)
+        .annotate(name_key=Lower('item_name'))
+        .filter(name_key__in=list(labels))
+        .order_by('created_at')
+        .values_list('name_key', 'id', 'warehouse_id')
+    )
+    for name_key, consumable_id, warehouse_id in matches:
+        mapping.setdefault(labels[name_key], (consumable_id, warehouse_id))
+    overrides = SaleProductConsumable.objects.filter(farm_id=farm_id).values_list('product', 'consumable_id', 'consumable__warehouse_id')
+    for product, consumable_id, warehouse_id in overrides:
+        mapping[product] = (consumable_id, warehouse_id)
+    return mapping
+
+
+def product_mapping(farm_id):
+    key = CACHE_KEY.format(farm_id=farm_id)
+    mapping = cache.get(key)
+    if mapping is None:
+        mapping = build_product_mapping(farm_id)
+        cache.set(key, mapping, timeout=CACHE_TIMEOUT)
+    return mapping
+
+
+def invalidate_product_mapping(farm_id):
+    cache.delete(CACHE_KEY.format(farm_id=farm_id))
+
+
+def resolve_consumable(sale):
+    """(consumable_id, warehouse_id) the sale draws from, or None."""
+    if sale.consumable_id:
+        warehouse_id = Consumable.objects.filter(pk=sale.consumable_id).values_list('warehouse_id', flat=True).first()
+        return sale.consumable_id, warehouse_id
+    return product_mapping(sale.farm_id).get(sale.product)
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.apps import apps
-from .models import Sale
+from inventory.models import Consumable
+from inventory.stock import record_sale
+from .models import Sale, SaleProductConsumable
+from .product_stock import invalidate_product_mapping, resolve_consumable
 
 @receiver(post_save, sender=Sale)
 def reduce_stock_on_sale(sender, instance, created, **kwargs):
@@ -10,30 +13,27 @@ def reduce_stock_on_sale(sender, instance, created, **kwargs):
     or Livestock quantity if applicable.
     """
     if created:
-        # 1. Try to sync with Inventory (Consumables)
-        try:
-            # If explicit link exists
-            if instance.consumable:
-                instance.consumable.quantity_on_hand -= instance.quantity
-                instance.consumable.save()
-            else:
-                # Fallback to name matching
-                Consumable = apps.get_model('inventory', 'Consumable')
-                product_name = instance.get_product_display()
-                consumable = Consumable.objects.filter(
-                    farm=instance.farm, 
-                    item_name__iexact=product_name
-                ).first()
-                
-                if consumable:
-                    consumable.quantity_on_hand -= instance.quantity
-                    consumable.save()
-                
-        except (LookupError, AttributeError):
-            pass
+        # 1. Sync with Inventory (Consumables) through the stock ledger: the
+        # explicit link if set, else the farm's cached product mapping
+        target = resolve_consumable(instance)
+        if target:
+            consumable_id, warehouse_id = target
+            record_sale(instance, consumable_id, warehouse_id)
+
         
         # 2. Try to sync with Livestock (if linked) for direct animal sales
         if instance.livestock:
             # For now we don't automatically reduce livestock quantity as 
             # sales are often products (Milk, Eggs) rather than the animal itself.
             pass
+
+
+@receiver(post_save, sender=Consumable)
+@receiver(post_delete, sender=Consumable)
+@receiver(post_save, sender=SaleProductConsumable)
+@receiver(post_delete, sender=SaleProductConsumable)
+def invalidate_sale_product_mapping(sender, instance, **kwargs):
+    # After commit, so a concurrent sale cannot re-cache the old mapping
+    # from rows this transaction has not committed yet.
+    farm_id = instance.farm_id
+    transaction.on_commit(lambda: invalidate_product_mapping(farm_id))
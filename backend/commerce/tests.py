@@ -1,3 +1,131 @@
-from django.test import TestCase
+import threading
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import Farm
+from inventory.models import Consumable, StockMovement
+from inventory.stock import InsufficientStock
+
+from .models import Sale, SaleProductConsumable
+from .product_stock import product_mapping
+
+
+def make_sale(farm, consumable, quantity):
+    return Sale.objects.create(
+        farm=farm,
+        date=date(2026, 1, 15),
+        product=Sale.Product.MANURE,
+        quantity=quantity,
+        unit='bags',
+        unit_price=Decimal('100'),
+        total_amount=Decimal('0'),
+        consumable=consumable,
+    )
+
+
+class SaleStockTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.consumable = Consumable.objects.create(farm=self.farm, item_name='Manure', unit='bags', quantity_on_hand=5)
+
+    def test_sale_posts_movement_and_decrements_stock(self):
+        make_sale(self.farm, self.consumable, Decimal('2'))
+
+        self.consumable.refresh_from_db()
+        self.assertEqual(self.consumable.quantity_on_hand, Decimal('3'))
+        movement = StockMovement.objects.get(consumable=self.consumable)
+        self.assertEqual((movement.movement_type, movement.reason, movement.quantity), ('OUT', 'SALE', Decimal('2')))
+
+    def test_oversell_allowed_without_guard(self):
+        make_sale(self.farm, self.consumable, Decimal('7'))
+
+        self.consumable.refresh_from_db()
+        self.assertEqual(self.consumable.quantity_on_hand, Decimal('-2'))
+
+    @override_settings(INVENTORY_PREVENT_NEGATIVE_STOCK=True)
+    def test_guard_rejects_oversell_and_keeps_nothing(self):
+        with self.assertRaises(InsufficientStock):
+            with transaction.atomic():
+                make_sale(self.farm, self.consumable, Decimal('7'))
+
+        self.consumable.refresh_from_db()
+        self.assertEqual(self.consumable.quantity_on_hand, Decimal('5'))
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ProductMappingCacheTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.manure = Consumable.objects.create(farm=self.farm, item_name='Manure', unit='bags')
+        self.compost = Consumable.objects.create(farm=self.farm, item_name='Compost', unit='bags')
+
+    def test_mapping_is_invalidated_on_commit(self):
+        self.assertEqual(product_mapping(self.farm.id)[Sale.Product.MANURE][0], self.manure.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            SaleProductConsumable.objects.create(farm=self.farm, product=Sale.Product.MANURE, consumable=self.compost)
+            self.assertEqual(product_mapping(self.farm.id)[Sale.Product.MANURE][0], self.manure.id)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(product_mapping(self.farm.id)[Sale.Product.MANURE][0], self.compost.id)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Concurrent writers need a database with row-level locking.')
+class ConcurrentSaleTests(TransactionTestCase):
+    THREADS = 20
+
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+
+    def sell_in_parallel(self, consumable):
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+
+        def sell():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    make_sale(self.farm, consumable, Decimal('1'))
+                outcomes.append('sold')
+            except InsufficientStock:
+                outcomes.append('rejected')
+            except Exception as exc:
+                outcomes.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=sell) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_parallel_sales_do_not_lose_updates(self):
+        consumable = Consumable.objects.create(farm=self.farm, item_name='Manure', unit='bags', quantity_on_hand=100)
+
+        outcomes = self.sell_in_parallel(consumable)
+
+        self.assertEqual(outcomes, ['sold'] * self.THREADS)
+        consumable.refresh_from_db()
+        self.assertEqual(consumable.quantity_on_hand, Decimal(100 - self.THREADS))
+        self.assertEqual(StockMovement.objects.filter(consumable=consumable).count(), self.THREADS)
+
+    @override_settings(INVENTORY_PREVENT_NEGATIVE_STOCK=True)
+    def test_parallel_sales_never_oversell(self):
+        consumable = Consumable.objects.create(farm=self.farm, item_name='Manure', unit='bags', quantity_on_hand=5)
+
+        outcomes = self.sell_in_parallel(consumable)
+
+        self.assertEqual(outcomes.count('sold'), 5)
+        self.assertEqual(outcomes.count('rejected'), self.THREADS - 5)
+        consumable.refresh_from_db()
+        self.assertEqual(consumable.quantity_on_hand, Decimal('0'))
+        self.assertEqual(Sale.objects.count(), 5)
@@ -1,4 +1,7 @@
+from django.db import transaction
 from rest_framework import viewsets, permissions
+from rest_framework.exceptions import ValidationError
+from core.custom_data import CustomDataFilterBackend
 from .models import Sale, Purchase, Expenditure
 from .serializers import SaleSerializer, PurchaseSerializer, ExpenditureSerializer
 
@@ -6,8 +9,11 @@ class SaleViewSet(viewsets.ModelViewSet):
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
+    @transaction.atomic
     def perform_create(self, serializer):
+        # Atomic so a sale rejected by the stock guard is not kept.
         from core.models import Farm
         farm = Farm.objects.first() or Farm.objects.create(name="Default Farm")
         user = self.request.user
@@ -17,6 +23,21 @@ class PurchaseViewSet(viewsets.ModelViewSet):
     queryset = Purchase.objects.all()
     serializer_class = PurchaseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
+
+    def get_queryset(self):
+        # Draft purchases raised by the reorder suggestions stay out of the
+        # list until confirmed; ?status=DRAFT lists them for review. Detail
+        # routes see every purchase so a draft can be confirmed or deleted.
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        status = self.request.query_params.get('status')
+        if status is None:
+            return queryset.exclude(status=Purchase.Status.DRAFT)
+        if status not in Purchase.Status.values:
+            raise ValidationError({'status': f'Use one of: {", ".join(Purchase.Status.values)}.'})
+        return queryset.filter(status=status)
 
     def perform_create(self, serializer):
         from core.models import Farm
@@ -27,6 +48,7 @@ class ExpenditureViewSet(viewsets.ModelViewSet):
     queryset = Expenditure.objects.all()
     serializer_class = ExpenditureSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
     def perform_create(self, serializer):
         from core.models import Farm
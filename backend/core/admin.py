@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Farm, FarmPlot, LandingContent
+from .models import CustomAttribute, Farm, FarmPlot, LandingContent, WeatherObservation
 
 
 @admin.register(Farm)
@@ -17,6 +17,20 @@ class FarmPlotAdmin(admin.ModelAdmin):
     autocomplete_fields = ('farm',)
 
 
+@admin.register(CustomAttribute)
+class CustomAttributeAdmin(admin.ModelAdmin):
+    list_display = ('target', 'key', 'data_type', 'indexed', 'farm')
+    list_filter = ('target', 'data_type', 'indexed')
+    search_fields = ('key', 'label')
+
+
+@admin.register(WeatherObservation)
+class WeatherObservationAdmin(admin.ModelAdmin):
+    list_display = ('date', 'min_temp_c', 'max_temp_c', 'rainfall_mm', 'source', 'farm')
+    list_filter = ('farm', 'source')
+    date_hierarchy = 'date'
+
+
 @admin.register(LandingContent)
 class LandingContentAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'updated_at')
@@ -0,0 +1,185 @@
+"""
+Queryable custom_data attributes.
+
+Farms declare keys in CustomAttribute; each indexed key gets an expression
+index on ``custom_data -> key`` for its table, and viewsets using
+CustomDataFilterBackend accept ``?custom.<key>=value`` (plus ``__gt``,
+``__gte``, ``__lt``, ``__lte`` and comma-separated ``__in``) which compile to
+the same key transform, so the filter runs in SQL against the index.
+
+On PostgreSQL the index DDL runs with CONCURRENTLY whenever it is outside a
+transaction (the on_commit hooks in core.signals and sync_custom_indexes),
+so declaring a key does not lock writes to a large table while it builds.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.apps import apps
+from django.db import connection, models
+from django.db.models import CharField, Func
+from django.db.models.fields.json import KeyTransform
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import CustomAttribute
+from .params import parse_date_param
+
+PARAM_PREFIX = 'custom.'
+LOOKUPS = ('gt', 'gte', 'lt', 'lte', 'in')
+TRUE_VALUES = ('true', '1', 'yes')
+FALSE_VALUES = ('false', '0', 'no')
+
+
+def index_name(target, key):
+    digest = hashlib.sha1(f'{target}:{key}'.encode()).hexdigest()[:12]
+    return f'custom_data_{digest}'
+
+
+def custom_data_index(target, key):
+    return models.Index(KeyTransform(key, 'custom_data'), name=index_name(target, key))
+
+
+def _existing_indexes(model):
+    with connection.cursor() as cursor:
+        return set(connection.introspection.get_constraints(cursor, model._meta.db_table))
+
+
+def _concurrently():
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    return connection.vendor == 'postgresql' and not connection.in_atomic_block
+
+
+def _invalid_indexes(model):
+    """Indexes left INVALID by an interrupted concurrent build (PostgreSQL only)."""
+    if connection.vendor != 'postgresql':
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE i.indrelid = %s::regclass AND NOT i.indisvalid',
+            [model._meta.db_table],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _execute_ddl(sql):
+    # Run without schema_editor()'s context manager so this also works inside
+    # an open transaction on SQLite (admin saves are atomic).
+    with connection.cursor() as cursor:
+        cursor.execute(str(sql))
+
+
+def ensure_index(target, key):
+    """Create the expression index for ``target``/``key`` if it is missing."""
+    model = apps.get_model(target)
+    index = custom_data_index(target, key)
+    if index.name in _existing_indexes(model):
+        if index.name not in _invalid_indexes(model):
+            return False
+        _drop_index_by_name(index.name)
+    kwargs = {'concurrently': True} if _concurrently() else {}
+    _execute_ddl(index.create_sql(model, connection.schema_editor(), **kwargs))
+    return True
+
+
+def _drop_index_by_name(name):
+    concurrently = ' CONCURRENTLY' if _concurrently() else ''
+    _execute_ddl(f'DROP INDEX{concurrently} IF EXISTS {connection.ops.quote_name(name)}')
+
+
+def drop_index(target, key):
+    """Drop the index unless another farm still declares the same key."""
+    if CustomAttribute.objects.filter(target=target, key=key, indexed=True).exists():
+        return False
+    name = index_name(target, key)
+    if name not in _existing_indexes(apps.get_model(target)):
+        return False
+    _drop_index_by_name(name)
+    return True
+
+
+def sync_indexes():
+    """Create every declared index and drop orphaned ones. Returns (created, dropped)."""
+    created = dropped = 0
+    declared = set(CustomAttribute.objects.filter(indexed=True).values_list('target', 'key'))
+    for target, key in declared:
+        created += ensure_index(target, key)
+    for target, _label in CustomAttribute.TARGET_CHOICES:
+        live = {index_name(target, key) for declared_target, key in declared if declared_target == target}
+        for name in _existing_indexes(apps.get_model(target)):
+            if name.startswith('custom_data_') and name not in live:
+                _drop_index_by_name(name)
+                dropped += 1
+    return created, dropped
+
+
+class JSONType(Func):
+    """JSON type name of a key transform: 'number', 'string', 'boolean', ..."""
+
+    function = 'jsonb_typeof'
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # JSON_EXTRACT hands back SQL values, whose typeof() splits numbers in two.
+        sql, params = self.as_sql(compiler, connection, function='typeof', **extra_context)
+        return f"CASE WHEN {sql} IN ('integer', 'real') THEN 'number' ELSE {sql} END", (*params, *params)
+
+
+def coerce_value(attribute, raw, param):
+    """Convert a query-string value to the JSON type declared for the key."""
+    if attribute.data_type == 'NUMBER':
+        try:
+            number = Decimal(raw)
+        except InvalidOperation:
+            raise ValidationError({param: 'Expected a number.'})
+        return int(number) if number == number.to_integral_value() else float(number)
+    if attribute.data_type == 'BOOLEAN':
+        lowered = raw.lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValidationError({param: 'Expected true or false.'})
+    if attribute.data_type == 'DATE':
+        parse_date_param(raw, param)
+    return raw
+
+
+class CustomDataFilterBackend(BaseFilterBackend):
+    """Applies ``?custom.<key>[__lookup]=value`` filters for declared keys."""
+
+    def filter_queryset(self, request, queryset, view):
+        params = [(name, value) for name, value in request.query_params.items() if name.startswith(PARAM_PREFIX)]
+        if not params:
+            return queryset
+
+        from core.views import get_current_farm
+
+        attributes = {
+            attribute.key: attribute
+            for attribute in CustomAttribute.objects.filter(
+                farm=get_current_farm(), target=queryset.model._meta.label,
+            )
+        }
+        for name, raw in params:
+            key, lookup = name[len(PARAM_PREFIX):], 'exact'
+            head, _, tail = key.rpartition('__')
+            if head and tail in LOOKUPS:
+                key, lookup = head, tail
+            attribute = attributes.get(key)
+            if attribute is None:
+                raise ValidationError({name: f'"{key}" is not a declared custom attribute.'})
+
+            if lookup == 'in':
+                value = [coerce_value(attribute, part, name) for part in raw.split(',') if part]
+            else:
+                value = coerce_value(attribute, raw, name)
+            # Alias the transform rather than spelling custom_data__<key> so
+            # keys that collide with lookup names (e.g. "contains") still work.
+            alias = f'custom_{len(queryset.query.annotations)}'
+            queryset = queryset.alias(**{alias: KeyTransform(key, 'custom_data')}).filter(**{f'{alias}__{lookup}': value})
+            if attribute.data_type == 'NUMBER' and lookup in ('gt', 'gte', 'lt', 'lte'):
+                # JSON orders strings and booleans after numbers, so "n/a" > 5
+                # would match without pinning the stored type.
+                queryset = queryset.alias(**{f'{alias}_type': JSONType(alias)}).filter(**{f'{alias}_type': 'number'})
+        return queryset
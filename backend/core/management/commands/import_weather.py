@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Farm
+from core.weather import WeatherImportError, import_weather_csv
+
+
+class Command(BaseCommand):
+    help = 'Import daily weather observations (date, min_temp_c, max_temp_c, rainfall_mm) from a CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--farm', help='Farm id (defaults to the first farm)')
+
+    def handle(self, *args, **options):
+        farm = Farm.objects.filter(pk=options['farm']).first() if options['farm'] else Farm.objects.first()
+        if farm is None:
+            raise CommandError('Farm not found.')
+        try:
+            with open(options['path'], encoding='utf-8-sig') as handle:
+                imported = import_weather_csv(farm, handle.read(), source=options['path'].rsplit('/', 1)[-1])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except WeatherImportError as exc:
+            raise CommandError('\n'.join(exc.errors))
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} day(s) of weather for {farm}.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.custom_data import sync_indexes
+
+
+class Command(BaseCommand):
+    help = 'Create indexes for declared custom_data attributes and drop indexes no longer declared.'
+
+    def handle(self, *args, **options):
+        created, dropped = sync_indexes()
+        self.stdout.write(self.style.SUCCESS(f'Created {created} index(es), dropped {dropped}.'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:59
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_landingcontent_color_accent_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomAttribute',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('livestock.Livestock', 'Livestock'), ('workforce.Worker', 'Worker'), ('workforce.Kibarua', 'Kibarua'), ('commerce.Sale', 'Sale'), ('commerce.Purchase', 'Purchase'), ('commerce.Expenditure', 'Expenditure'), ('produce.ProduceRecord', 'Produce Record'), ('crops.CropSeason', 'Crop Season'), ('crops.CropActivity', 'Crop Activity')], max_length=50)),
+                ('key', models.SlugField(help_text='Key inside custom_data, e.g. ear_notch')),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('data_type', models.CharField(choices=[('TEXT', 'Text'), ('NUMBER', 'Number'), ('BOOLEAN', 'Yes/No'), ('DATE', 'Date')], default='TEXT', max_length=10)),
+                ('indexed', models.BooleanField(default=True, help_text='Maintain a database index for this key')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='custom_attributes', to='core.farm')),
+            ],
+            options={
+                'ordering': ['target', 'key'],
+                'unique_together': {('farm', 'target', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:09
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_customattribute'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherObservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('min_temp_c', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('max_temp_c', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('rainfall_mm', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('source', models.CharField(blank=True, help_text='e.g. the CSV file or station name', max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weather_observations', to='core.farm')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('farm', 'date')},
+            },
+        ),
+    ]
@@ -91,6 +91,65 @@ class FarmPlot(models.Model):
         ordering = ['name']
 
 
+class CustomAttribute(models.Model):
+    """A custom_data key a farm has declared queryable on one of its record types."""
+
+    TARGET_CHOICES = [
+        ('livestock.Livestock', 'Livestock'),
+        ('workforce.Worker', 'Worker'),
+        ('workforce.Kibarua', 'Kibarua'),
+        ('commerce.Sale', 'Sale'),
+        ('commerce.Purchase', 'Purchase'),
+        ('commerce.Expenditure', 'Expenditure'),
+        ('produce.ProduceRecord', 'Produce Record'),
+        ('crops.CropSeason', 'Crop Season'),
+        ('crops.CropActivity', 'Crop Activity'),
+    ]
+
+    DATA_TYPE_CHOICES = [
+        ('TEXT', 'Text'),
+        ('NUMBER', 'Number'),
+        ('BOOLEAN', 'Yes/No'),
+        ('DATE', 'Date'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='custom_attributes')
+    target = models.CharField(max_length=50, choices=TARGET_CHOICES)
+    key = models.SlugField(max_length=50, allow_unicode=False, help_text="Key inside custom_data, e.g. ear_notch")
+    label = models.CharField(max_length=100, blank=True)
+    data_type = models.CharField(max_length=10, choices=DATA_TYPE_CHOICES, default='TEXT')
+    indexed = models.BooleanField(default=True, help_text="Maintain a database index for this key")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_target_display()}: {self.key} ({self.get_data_type_display()})"
+
+    class Meta:
+        ordering = ['target', 'key']
+        unique_together = ['farm', 'target', 'key']
+
+
+class WeatherObservation(models.Model):
+    """Daily weather recorded at the farm, imported from CSV or a local station."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='weather_observations')
+    date = models.DateField()
+    min_temp_c = models.DecimalField(max_digits=5, decimal_places=2)
+    max_temp_c = models.DecimalField(max_digits=5, decimal_places=2)
+    rainfall_mm = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    source = models.CharField(max_length=50, blank=True, help_text="e.g. the CSV file or station name")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.date}: {self.min_temp_c}-{self.max_temp_c}°C, {self.rainfall_mm}mm"
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['farm', 'date']
+
+
 class LandingContent(models.Model):
     """
     Singleton CMS model holding all imagery shown on the public landing page.
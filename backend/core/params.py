@@ -0,0 +1,28 @@
+"""
+Query and body parameter parsing shared by the app views.
+
+Bad input is reported as a 400 keyed by the parameter name, never a 500:
+``parse_date`` returns None for malformed strings but raises ValueError for
+well-formed impossible dates such as 2024-02-30, so both are caught here.
+"""
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+DATE_FORMAT_ERROR = 'Use the YYYY-MM-DD format.'
+
+
+def parse_date_param(value, name):
+    try:
+        parsed = parse_date(str(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: DATE_FORMAT_ERROR})
+    return parsed
+
+
+def get_date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    return parse_date_param(value, name)
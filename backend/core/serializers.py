@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Farm, FarmPlot, LandingContent
+from .models import CustomAttribute, Farm, FarmPlot, LandingContent, WeatherObservation
 
 
 class FarmSerializer(serializers.ModelSerializer):
@@ -16,6 +16,27 @@ class FarmPlotSerializer(serializers.ModelSerializer):
         read_only_fields = ['farm']
 
 
+class CustomAttributeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomAttribute
+        fields = '__all__'
+        read_only_fields = ['farm']
+
+
+class WeatherObservationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WeatherObservation
+        fields = '__all__'
+        read_only_fields = ['farm']
+
+    def validate(self, attrs):
+        low = attrs.get('min_temp_c', getattr(self.instance, 'min_temp_c', None))
+        high = attrs.get('max_temp_c', getattr(self.instance, 'max_temp_c', None))
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError({'min_temp_c': 'Must not be above max_temp_c.'})
+        return attrs
+
+
 class LandingContentSerializer(serializers.ModelSerializer):
     class Meta:
         model = LandingContent
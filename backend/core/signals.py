@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .custom_data import drop_index, ensure_index
+from .models import CustomAttribute
+
+
+@receiver(post_save, sender=CustomAttribute)
+def sync_custom_attribute_index(sender, instance, **kwargs):
+    target, key = instance.target, instance.key
+    if instance.indexed:
+        transaction.on_commit(lambda: ensure_index(target, key))
+    else:
+        transaction.on_commit(lambda: drop_index(target, key))
+
+
+@receiver(post_delete, sender=CustomAttribute)
+def drop_custom_attribute_index(sender, instance, **kwargs):
+    target, key = instance.target, instance.key
+    transaction.on_commit(lambda: drop_index(target, key))
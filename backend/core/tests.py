@@ -1,3 +1,74 @@
+from datetime import date
+
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from livestock.models import Livestock
+
+from .custom_data import CustomDataFilterBackend
+from .models import CustomAttribute, Farm
+from .params import get_date_param, parse_date_param
+from .weather import WeatherImportError, import_weather_csv
+
+
+class DateParamTests(TestCase):
+    def _request(self, query):
+        return Request(APIRequestFactory().get('/', query))
+
+    def test_valid_and_missing_dates(self):
+        self.assertEqual(get_date_param(self._request({'from': '2024-02-29'}), 'from'), date(2024, 2, 29))
+        self.assertIsNone(get_date_param(self._request({}), 'from'))
+
+    def test_malformed_and_impossible_dates_are_validation_errors(self):
+        for value in ('29/02/2024', '2024-02-30', '2024-13-01'):
+            with self.assertRaises(ValidationError) as raised:
+                get_date_param(self._request({'from': value}), 'from')
+            self.assertIn('from', raised.exception.detail)
+        with self.assertRaises(ValidationError):
+            parse_date_param('2023-02-29', 'completed_on')
+
+
+class CustomDataFilterTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        CustomAttribute.objects.create(
+            farm=self.farm, target='livestock.Livestock', key='weight', data_type='NUMBER', indexed=False,
+        )
+        for tag_id, weight in (('A', 10), ('B', 3), ('C', 'n/a'), ('D', True)):
+            Livestock.objects.create(farm=self.farm, tag_id=tag_id, sex='FEMALE', custom_data={'weight': weight})
+
+    def _tags(self, query):
+        request = Request(APIRequestFactory().get('/', query))
+        queryset = CustomDataFilterBackend().filter_queryset(request, Livestock.objects.all(), None)
+        return sorted(queryset.values_list('tag_id', flat=True))
+
+    def test_number_ranges_skip_values_of_other_types(self):
+        self.assertEqual(self._tags({'custom.weight__gt': '5'}), ['A'])
+        self.assertEqual(self._tags({'custom.weight__lte': '10'}), ['A', 'B'])
+        self.assertEqual(self._tags({'custom.weight': '3'}), ['B'])
+
+
+class WeatherImportTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+
+    def test_rows_are_upserted_by_date(self):
+        csv = 'date,tmin,tmax,rain\n2024-02-28,12,25,3\n2024-02-29,13,26,\n'
+        self.assertEqual(import_weather_csv(self.farm, csv), 2)
+        self.assertEqual(import_weather_csv(self.farm, 'date,tmin,tmax\n2024-02-29,14,27\n'), 1)
+
+        self.assertEqual(self.farm.weather_observations.get(date=date(2024, 2, 29)).min_temp_c, 14)
+
+    def test_impossible_dates_are_reported_by_line(self):
+        with self.assertRaises(WeatherImportError) as raised:
+            import_weather_csv(self.farm, 'date,tmin,tmax\n2024-02-28,12,25\n2024-02-30,12,25\n')
+
+        self.assertEqual(raised.exception.errors, ['Line 3: 2024-02-30 is not a valid date.'])
+        self.assertFalse(self.farm.weather_observations.exists())
 
-# Create your tests here.
+    def test_harvest_estimate_command_rejects_impossible_dates(self):
+        with self.assertRaises(CommandError):
+            call_command('estimate_harvest_dates', as_of='2024-02-30')
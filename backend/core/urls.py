@@ -1,10 +1,18 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import FarmPlotViewSet, FarmProfileView, LandingContentView
+from .views import (
+    CustomAttributeViewSet,
+    FarmPlotViewSet,
+    FarmProfileView,
+    LandingContentView,
+    WeatherObservationViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'farm/plots', FarmPlotViewSet, basename='farm-plot')
+router.register(r'farm/custom-attributes', CustomAttributeViewSet, basename='custom-attribute')
+router.register(r'farm/weather', WeatherObservationViewSet, basename='weather-observation')
 
 urlpatterns = [
     # Singleton farm profile — GET / PATCH / PUT
@@ -1,8 +1,18 @@
-from rest_framework import generics, permissions, viewsets
+from rest_framework import generics, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
 
-from .models import Farm, FarmPlot, LandingContent
-from .serializers import FarmPlotSerializer, FarmSerializer, LandingContentSerializer
+from .models import CustomAttribute, Farm, FarmPlot, LandingContent, WeatherObservation
+from .serializers import (
+    CustomAttributeSerializer,
+    FarmPlotSerializer,
+    FarmSerializer,
+    LandingContentSerializer,
+    WeatherObservationSerializer,
+)
+from .weather import WeatherImportError, import_weather_csv
 
 
 def get_current_farm():
@@ -55,6 +65,54 @@ class FarmPlotViewSet(viewsets.ModelViewSet):
         serializer.save(farm=farm)
 
 
+class CustomAttributeViewSet(viewsets.ModelViewSet):
+    """Registry of custom_data keys that can be filtered with ?custom.<key>=."""
+
+    serializer_class = CustomAttributeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        farm = get_current_farm()
+        return CustomAttribute.objects.filter(farm=farm)
+
+    def perform_create(self, serializer):
+        farm = get_current_farm()
+        serializer.save(farm=farm)
+
+
+class WeatherObservationViewSet(viewsets.ModelViewSet):
+    """Daily farm weather used for growing degree days (see crops.gdd)."""
+
+    serializer_class = WeatherObservationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+
+    def get_queryset(self):
+        farm = get_current_farm()
+        return WeatherObservation.objects.filter(farm=farm)
+
+    def perform_create(self, serializer):
+        farm = get_current_farm()
+        serializer.save(farm=farm)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_csv(self, request):
+        """Upsert daily observations from an uploaded CSV ``file``
+        (columns: date, min_temp_c, max_temp_c, rainfall_mm)."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Upload a CSV file.'})
+        try:
+            text = upload.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValidationError({'file': 'The file must be UTF-8 encoded CSV.'})
+        try:
+            imported = import_weather_csv(get_current_farm(), text, source=upload.name)
+        except WeatherImportError as exc:
+            raise ValidationError({'file': exc.errors})
+        return Response({'imported': imported}, status=status.HTTP_201_CREATED)
+
+
 class LandingContentView(generics.RetrieveUpdateAPIView):
     """Singleton endpoint for the public landing page CMS content.
 
@@ -0,0 +1,101 @@
+"""
+Bulk import of daily weather observations from CSV.
+
+Files need a header row with a date column (YYYY-MM-DD) and minimum and
+maximum temperature in °C; rainfall in mm is optional. Common column
+spellings are accepted. Rows are upserted on (farm, date), so re-importing
+an overlapping export only updates the days it contains.
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.utils.dateparse import parse_date
+
+from .models import WeatherObservation
+
+COLUMNS = {
+    'date': ('date', 'day'),
+    'min_temp_c': ('min_temp_c', 'min_temp', 'tmin', 'temp_min', 'min'),
+    'max_temp_c': ('max_temp_c', 'max_temp', 'tmax', 'temp_max', 'max'),
+    'rainfall_mm': ('rainfall_mm', 'rainfall', 'rain', 'precipitation', 'precip'),
+}
+REQUIRED = ('date', 'min_temp_c', 'max_temp_c')
+BATCH_SIZE = 1000
+
+
+class WeatherImportError(ValueError):
+    """The file cannot be imported; ``errors`` lists the problems by line."""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def _header_map(fieldnames):
+    normalized = {(name or '').strip().lower(): name for name in fieldnames or []}
+    mapping = {}
+    for field, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in normalized:
+                mapping[field] = normalized[alias]
+                break
+    missing = [field for field in REQUIRED if field not in mapping]
+    if missing:
+        raise WeatherImportError([f'Missing column(s): {", ".join(missing)}.'])
+    return mapping
+
+
+def _decimal(value):
+    value = (value or '').strip()
+    return Decimal(value) if value else None
+
+
+def parse_weather_csv(text):
+    """Parse CSV text into {date: (min, max, rainfall)}; later rows win on repeated dates."""
+    reader = csv.DictReader(io.StringIO(text))
+    mapping = _header_map(reader.fieldnames)
+    rows, errors = {}, []
+    for line, row in enumerate(reader, start=2):
+        raw_date = (row.get(mapping['date']) or '').strip()
+        try:
+            day = parse_date(raw_date)
+        except ValueError:
+            errors.append(f'Line {line}: {raw_date} is not a valid date.')
+            continue
+        if day is None:
+            errors.append(f'Line {line}: date must use the YYYY-MM-DD format.')
+            continue
+        try:
+            low, high = _decimal(row.get(mapping['min_temp_c'])), _decimal(row.get(mapping['max_temp_c']))
+            rainfall = _decimal(row.get(mapping['rainfall_mm'])) if 'rainfall_mm' in mapping else None
+        except InvalidOperation:
+            errors.append(f'Line {line}: temperatures and rainfall must be numbers.')
+            continue
+        if low is None or high is None:
+            errors.append(f'Line {line}: min and max temperature are required.')
+            continue
+        if low > high:
+            errors.append(f'Line {line}: min temperature is above max temperature.')
+            continue
+        rows[day] = (low, high, rainfall or Decimal('0'))
+    if errors:
+        raise WeatherImportError(errors)
+    return rows
+
+
+def import_weather_csv(farm, text, source=''):
+    """Upsert the observations in ``text`` for ``farm``. Returns the number of days imported."""
+    rows = parse_weather_csv(text)
+    observations = [
+        WeatherObservation(farm=farm, date=day, min_temp_c=low, max_temp_c=high, rainfall_mm=rainfall, source=source[:50])
+        for day, (low, high, rainfall) in sorted(rows.items())
+    ]
+    WeatherObservation.objects.bulk_create(
+        observations,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['farm', 'date'],
+        update_fields=['min_temp_c', 'max_temp_c', 'rainfall_mm', 'source'],
+    )
+    return len(observations)
@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import CropSeason, CropActivity, PestDisease, HarvestRecord
+from .models import CropSeason, CropActivity, CropActivityInput, PestDisease, HarvestRecord
 
 admin.site.register(CropSeason)
 admin.site.register(CropActivity)
+admin.site.register(CropActivityInput)
 admin.site.register(PestDisease)
 admin.site.register(HarvestRecord)
@@ -0,0 +1,196 @@
+"""
+Crop analytics: yield per acre across plots, crops and seasons, and the
+pest and disease incidence heatmap.
+
+Seasons are aggregated in the database from the maintained total_cost and
+actual_yield (see crops.totals) converted to kilograms; the derived ratios,
+year-over-year changes and the plot leaderboard are computed in one pass
+over the grouped rows. Results are cached per farm and invalidated by
+bumping a per-farm version whenever crop data changes.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, DecimalField, DurationField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, ExtractYear, TruncWeek
+
+from .models import CropSeason, PestDisease
+from .totals import kg_factor
+
+CACHE_TIMEOUT = 60 * 60
+VERSION_KEY = 'crops:analytics-version:{farm_id}'
+
+
+def analytics_version(farm_id):
+    return cache.get_or_set(VERSION_KEY.format(farm_id=farm_id), 1, timeout=None) or 1
+
+
+def bump_analytics_version(farm_id):
+    """Invalidate every cached crop analytic of the farm."""
+    key = VERSION_KEY.format(farm_id=farm_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def cached_farm_analytic(farm, name, params, compute):
+    """Return ``compute()`` cached under the farm's current analytics version."""
+    key = f'crops:{name}:{farm.id}:{analytics_version(farm.id)}:{sorted(params.items())}'
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, timeout=CACHE_TIMEOUT)
+    return result
+
+
+def _ratio(numerator, denominator):
+    if numerator is None or not denominator:
+        return None
+    return round(float(numerator) / float(denominator), 4)
+
+
+def yield_report(farm, prices=None, year_from=None, year_to=None):
+    """Yield per acre, cost per kg and margin per plot, crop and year.
+
+    ``prices`` maps crop_type to a price per kg; margins are only reported
+    for crops with a price. Seasons whose yield unit is not a mass unit are
+    left out of the per-kg figures.
+    """
+    prices = prices or {}
+    number = DecimalField(max_digits=16, decimal_places=4)
+    seasons = CropSeason.objects.filter(farm=farm).annotate(
+        year=ExtractYear(Coalesce('actual_harvest_date', 'expected_harvest_date', 'planting_date')),
+        yield_kg=ExpressionWrapper(F('actual_yield') * kg_factor('yield_unit'), output_field=number),
+    )
+    if year_from:
+        seasons = seasons.filter(year__gte=year_from)
+    if year_to:
+        seasons = seasons.filter(year__lte=year_to)
+
+    rows = list(
+        seasons.exclude(year=None).values('plot_id', 'plot__name', 'plot__size_acres', 'crop_type', 'year')
+        .annotate(
+            # Only the seasons that were weighed count against the kilograms.
+            # Listed before total_cost, whose aggregate shadows the column.
+            weighed_cost=Sum('total_cost', filter=Q(yield_kg__isnull=False)),
+            seasons=Count('id'),
+            yield_kg=Sum('yield_kg'),
+            total_cost=Sum('total_cost'),
+        )
+        .order_by('plot__name', 'crop_type', 'year')
+    )
+
+    previous = {}
+    by_crop = defaultdict(lambda: defaultdict(lambda: [Decimal('0'), Decimal('0'), Decimal('0')]))
+    for row in rows:
+        acres = row['plot__size_acres']
+        price = prices.get(row['crop_type'])
+        row['yield_per_acre'] = _ratio(row['yield_kg'], acres)
+        weighed_cost = row.pop('weighed_cost')
+        row['cost_per_kg'] = _ratio(weighed_cost, row['yield_kg'])
+        row['cost_per_acre'] = _ratio(row['total_cost'], acres)
+        if price is not None and row['yield_kg'] is not None:
+            row['revenue'] = round(float(row['yield_kg']) * float(price), 2)
+            row['margin'] = round(row['revenue'] - float(weighed_cost or 0), 2)
+            row['margin_per_acre'] = _ratio(row['margin'], acres)
+        else:
+            row['revenue'] = row['margin'] = row['margin_per_acre'] = None
+
+        key = (row['plot_id'], row['crop_type'])
+        last = previous.get(key)
+        if last and last['year'] == row['year'] - 1 and last['yield_per_acre'] and row['yield_per_acre'] is not None:
+            row['yield_per_acre_yoy'] = round(row['yield_per_acre'] / last['yield_per_acre'] - 1, 4)
+        else:
+            row['yield_per_acre_yoy'] = None
+        previous[key] = row
+
+        totals = by_crop[row['crop_type']][(row['plot_id'], row['plot__name'])]
+        totals[0] += row['yield_kg'] or 0
+        totals[1] += acres or 0
+        totals[2] += Decimal(str(row['margin'] or 0))
+
+    leaderboard = {}
+    for crop_type, plots in by_crop.items():
+        entries = [
+            {
+                'plot_id': plot_id,
+                'plot__name': plot_name,
+                'yield_per_acre': _ratio(yield_kg, acre_seasons),
+                'margin_per_acre': _ratio(margin, acre_seasons) if crop_type in prices else None,
+            }
+            for (plot_id, plot_name), (yield_kg, acre_seasons, margin) in plots.items()
+        ]
+        entries.sort(key=lambda entry: entry['yield_per_acre'] or 0, reverse=True)
+        for rank, entry in enumerate(entries, start=1):
+            entry['rank'] = rank
+        leaderboard[crop_type] = entries
+
+    return {'rows': rows, 'leaderboard': leaderboard}
+
+
+# Severity weights for the incidence score. An incident scores its weight,
+# scaled up to double when it covers the whole plot.
+SEVERITY_WEIGHTS = {
+    'LOW': 1,
+    'MEDIUM': 2,
+    'HIGH': 3,
+    'SEVERE': 4,
+}
+
+
+def pest_heatmap(farm, date_from, date_to, pest_type=None):
+    """Plot x week incidence of pests and diseases detected in the window.
+
+    Each cell has the incident count, how many are still open, the
+    severity-weighted score and the mean days to resolution of the resolved
+    ones. Week totals show how many plots were hit, to spot spreading outbreaks.
+    """
+    number = DecimalField(max_digits=12, decimal_places=4)
+    weight = Case(
+        *(When(severity=severity, then=Value(value)) for severity, value in SEVERITY_WEIGHTS.items()),
+        default=Value(1),
+        output_field=number,
+    )
+    incidents = PestDisease.objects.filter(season__farm=farm, date_detected__range=(date_from, date_to))
+    if pest_type:
+        incidents = incidents.filter(type=pest_type)
+
+    cells = list(
+        incidents.annotate(week=TruncWeek('date_detected'))
+        .values('season__plot_id', 'week')
+        .annotate(
+            incidents=Count('id'),
+            open=Count('id', filter=Q(resolved=False)),
+            # Scaled by 100 and divided below: SQLite divides whole numbers as integers.
+            score=Sum(ExpressionWrapper(weight * (100 + F('affected_area_percent')), output_field=number)),
+            mean_resolution=Avg(
+                ExpressionWrapper(F('resolution_date') - F('date_detected'), output_field=DurationField()),
+                filter=Q(resolved=True, resolution_date__isnull=False),
+            ),
+        )
+        .order_by('week', 'season__plot_id')
+    )
+
+    weeks = defaultdict(lambda: {'plots_affected': 0, 'incidents': 0, 'open': 0, 'score': Decimal('0')})
+    plots = set()
+    for cell in cells:
+        cell['plot_id'] = cell.pop('season__plot_id')
+        cell['score'] = round(float(cell['score'] or 0) / 100, 2)
+        resolution = cell.pop('mean_resolution')
+        cell['mean_days_to_resolution'] = round(resolution.total_seconds() / 86400, 1) if resolution is not None else None
+        plots.add(cell['plot_id'])
+        week = weeks[cell['week']]
+        week['plots_affected'] += 1
+        week['incidents'] += cell['incidents']
+        week['open'] += cell['open']
+        week['score'] += Decimal(str(cell['score']))
+
+    return {
+        'plots': list(
+            CropSeason.objects.filter(plot_id__in=plots).values('plot_id', 'plot__name').distinct().order_by('plot__name')
+        ),
+        'weeks': [{'week': week, **totals, 'score': float(totals['score'])} for week, totals in sorted(weeks.items())],
+        'cells': cells,
+    }
@@ -0,0 +1,83 @@
+"""
+Crop calendar: season bars and activity markers over a date window.
+
+Seasons come from the occupancy range query (see crops.occupancy) and
+activities from one query grouped by season, bucket and activity type, so
+the payload grows with the number of buckets, not with the number of
+activities recorded.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import CropActivity, CropSeason
+from .occupancy import in_window
+
+BUCKETS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def bucket_starts(date_from, date_to, bucket):
+    starts = []
+    current = bucket_start(date_from, bucket)
+    while current <= date_to:
+        starts.append(current)
+        if bucket == 'week':
+            current += timedelta(days=7)
+        else:
+            current = (current + timedelta(days=32)).replace(day=1)
+    return starts
+
+
+def crop_calendar(farm, date_from, date_to, bucket='week'):
+    starts = bucket_starts(date_from, date_to, bucket)
+    index = {start: position for position, start in enumerate(starts)}
+
+    def bucket_of(day):
+        if day is None or day < date_from or day > date_to:
+            return None
+        return index[bucket_start(day, bucket)]
+
+    seasons = in_window(CropSeason.objects.filter(farm=farm), date_from, date_to).order_by('plot__name', 'planting_date')
+    bars = []
+    for season in seasons.values(
+        'id', 'plot_id', 'plot__name', 'crop_type', 'variety', 'status',
+        'planting_date', 'expected_harvest_date', 'actual_harvest_date', 'occupied_until',
+    ):
+        # occupied_until is the first free day; the bar ends the day before.
+        end = season['occupied_until'] - timedelta(days=1) if season['occupied_until'] else None
+        season['bar'] = [
+            bucket_of(max(season['planting_date'], date_from)),
+            bucket_of(min(end, date_to) if end else date_to),
+        ]
+        season['milestones'] = {
+            name: bucket_of(season[name]) for name in ('planting_date', 'expected_harvest_date', 'actual_harvest_date')
+        }
+        bars.append(season)
+
+    markers = [
+        {
+            'season_id': row['season_id'],
+            'bucket': index[row['period']],
+            'activity_type': row['activity_type'],
+            'count': row['count'],
+            'cost': row['cost'],
+        }
+        for row in (
+            CropActivity.objects.filter(season__farm=farm, date__range=(date_from, date_to))
+            .annotate(period=BUCKETS[bucket]('date'))
+            .values('season_id', 'period', 'activity_type')
+            .annotate(count=Count('id'), cost=Sum('cost'))
+            .order_by('season_id', 'period', 'activity_type')
+        )
+    ]
+    return {'from': date_from, 'to': date_to, 'bucket': bucket, 'buckets': starts, 'seasons': bars, 'markers': markers}
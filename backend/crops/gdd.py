@@ -0,0 +1,112 @@
+"""
+Growing degree days (GDD) from the farm's weather observations.
+
+A day's GDD is the mean of the capped maximum and floored minimum
+temperature minus the crop's base temperature. Accumulated GDD for every
+active season of a crop type is summed in the database in one query per
+crop type; the expected harvest date is then projected from the GDD still
+needed and the farm's mean daily GDD over the last two weeks of records.
+"""
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Avg, DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from core.models import WeatherObservation
+
+from .analytics import bump_analytics_version
+from .models import CropSeason
+
+# crop_type -> (base °C, upper cap °C, GDD from planting to harvest). Typical
+# values for East African varieties; perennials are not estimated.
+CROP_GDD = {
+    'MAIZE': (Decimal('10'), Decimal('30'), 1400),
+    'BEANS': (Decimal('10'), Decimal('30'), 1100),
+    'WHEAT': (Decimal('0'), Decimal('30'), 1900),
+    'RICE': (Decimal('10'), Decimal('35'), 1800),
+    'POTATOES': (Decimal('7'), Decimal('30'), 1400),
+    'TOMATOES': (Decimal('10'), Decimal('30'), 1300),
+    'CABBAGE': (Decimal('4'), Decimal('25'), 1300),
+    'KALE': (Decimal('4'), Decimal('25'), 900),
+    'ONIONS': (Decimal('5'), Decimal('30'), 1700),
+    'CARROTS': (Decimal('4'), Decimal('30'), 1200),
+    'SUNFLOWER': (Decimal('7'), Decimal('30'), 1500),
+    'SORGHUM': (Decimal('10'), Decimal('35'), 1500),
+    'MILLET': (Decimal('10'), Decimal('35'), 1300),
+}
+
+ACTIVE_STATUSES = ('PLANTED', 'GROWING', 'FLOWERING')
+RATE_WINDOW_DAYS = 14
+TENTH = Decimal('0.1')
+
+
+def daily_gdd(base, cap):
+    """SQL expression for the GDD of one WeatherObservation row."""
+    high = Greatest(Least(F('max_temp_c'), Value(cap)), Value(base))
+    low = Greatest(Least(F('min_temp_c'), Value(cap)), Value(base))
+    # Multiply rather than divide: SQLite divides whole numbers as integers.
+    return (high + low) * Value(Decimal('0.5')) - Value(base)
+
+
+def _weather_aggregate(aggregate, output_field=None, **filters):
+    rows = WeatherObservation.objects.filter(farm=OuterRef('farm'), **filters).order_by().values('farm')
+    return Subquery(rows.annotate(value=aggregate).values('value'), output_field=output_field)
+
+
+def _decimal(value):
+    return None if value is None else Decimal(str(value)).quantize(TENTH)
+
+
+def refresh_season_gdd(queryset=None, as_of=None, batch_size=500):
+    """Store accumulated GDD on active seasons and re-estimate their harvest dates.
+
+    Returns (seasons updated, harvest dates re-estimated).
+    """
+    as_of = as_of or timezone.localdate()
+    if queryset is None:
+        queryset = CropSeason.objects.all()
+    seasons = queryset.filter(
+        status__in=ACTIVE_STATUSES, planting_date__isnull=False, planting_date__lte=as_of, actual_harvest_date__isnull=True,
+    )
+
+    number = DecimalField(max_digits=12, decimal_places=4)
+    updated = estimated = 0
+    farms = set()
+    fields = ['accumulated_gdd', 'gdd_as_of', 'expected_harvest_date', 'occupied_until']
+    for crop_type, (base, cap, target) in CROP_GDD.items():
+        gdd = daily_gdd(base, cap)
+        rows = seasons.filter(crop_type=crop_type).annotate(
+            gdd=_weather_aggregate(Sum(gdd), number, date__gte=OuterRef('planting_date'), date__lte=as_of),
+            last_observed=_weather_aggregate(Max('date'), date__gte=OuterRef('planting_date'), date__lte=as_of),
+            rate=_weather_aggregate(Avg(gdd), number, date__gt=as_of - timedelta(days=RATE_WINDOW_DAYS), date__lte=as_of),
+        ).only('id', 'farm_id', 'expected_harvest_date', 'actual_harvest_date').order_by('pk')
+
+        batch = []
+        for season in rows.iterator(chunk_size=batch_size):
+            season.accumulated_gdd = _decimal(season.gdd)
+            season.gdd_as_of = season.last_observed
+            if season.gdd is not None and season.last_observed is not None:
+                remaining = target - float(season.gdd)
+                if remaining <= 0:
+                    season.expected_harvest_date = season.last_observed
+                    estimated += 1
+                elif season.rate:
+                    season.expected_harvest_date = season.last_observed + timedelta(days=math.ceil(remaining / float(season.rate)))
+                    estimated += 1
+            season.occupied_until = season.actual_harvest_date or season.expected_harvest_date
+            batch.append(season)
+            farms.add(season.farm_id)
+            if len(batch) >= batch_size:
+                CropSeason.objects.bulk_update(batch, fields)
+                updated += len(batch)
+                batch = []
+        if batch:
+            CropSeason.objects.bulk_update(batch, fields)
+            updated += len(batch)
+
+    for farm_id in farms:
+        bump_analytics_version(farm_id)
+    return updated, estimated
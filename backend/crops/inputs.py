@@ -0,0 +1,171 @@
+"""
+Structured crop inputs and their inventory draw-down.
+
+Recording an activity with input lines creates the CropActivityInput rows
+and posts one StockMovement OUT per line through the stock service (see
+inventory.stock) in a single transaction; deleting the activity posts a
+RETURN per line (per lot it drew from) to put the stock back. Historical free-text ``inputs_used``
+values ("DAP 50kg, CAN 25kg") can be converted into lines in batches; those
+are not drawn from stock again.
+"""
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from inventory.models import BatchAllocation, Consumable, StockMovement
+from inventory.stock import post_movements
+
+from .models import CropActivity, CropActivityInput
+from .totals import CENT, convert_quantity
+
+ENTRY_SEPARATOR = re.compile(r'[,;\n]+')
+ENTRY_PATTERN = re.compile(r'^(?P<name>.*?)\s*(?P<quantity>\d+(?:\.\d+)?)\s*(?P<unit>[A-Za-z]*)$')
+
+
+def parse_inputs_text(text):
+    """Split free text into (name, quantity, unit) entries; unparseable parts are skipped."""
+    entries = []
+    for part in ENTRY_SEPARATOR.split(text or ''):
+        match = ENTRY_PATTERN.match(part.strip())
+        if not match or not match['name']:
+            continue
+        try:
+            quantity = Decimal(match['quantity'])
+        except InvalidOperation:
+            continue
+        entries.append((match['name'].strip(), quantity, match['unit'].lower()))
+    return entries
+
+
+def format_inputs_text(lines):
+    return ', '.join(f'{line.consumable.item_name} {line.quantity.normalize():f}{line.unit}' for line in lines)[:255]
+
+
+def _stock_quantity(line, consumable):
+    """The line quantity expressed in the consumable's stock unit."""
+    quantity = convert_quantity(line.quantity, line.unit, consumable.unit)
+    if quantity is None:
+        raise ValidationError({
+            'input_lines': f'Cannot convert {line.unit} to {consumable.unit} for {consumable.item_name}.',
+        })
+    return quantity.quantize(CENT)
+
+
+@transaction.atomic
+def record_activity_inputs(activity, line_data, recorded_by=''):
+    """Create input lines for ``activity`` and draw them from stock.
+
+    ``line_data`` is a list of dicts with consumable, quantity and optional unit.
+    """
+    farm_id = CropActivity.objects.filter(pk=activity.pk).values_list('season__farm_id', flat=True).get()
+    lines, movements = [], []
+    for data in line_data:
+        consumable = data['consumable']
+        if consumable.farm_id != farm_id:
+            raise ValidationError({'input_lines': f'{consumable.item_name} does not belong to the current farm.'})
+        line = CropActivityInput(activity=activity, consumable=consumable, quantity=data['quantity'], unit=data.get('unit') or consumable.unit)
+        quantity = _stock_quantity(line, consumable)
+        line.stock_movement = StockMovement(
+            farm_id=farm_id,
+            consumable=consumable,
+            movement_type='OUT',
+            reason='USAGE',
+            quantity=quantity,
+            date=activity.date,
+            from_warehouse_id=consumable.warehouse_id,
+            reference=f'Crop activity {activity.pk}',
+            recorded_by=recorded_by,
+        )
+        movements.append(line.stock_movement)
+        lines.append(line)
+
+    post_movements(movements)
+    CropActivityInput.objects.bulk_create(lines)
+
+    if lines and not activity.inputs_used:
+        activity.inputs_used = format_inputs_text(lines)
+        CropActivity.objects.filter(pk=activity.pk).update(inputs_used=activity.inputs_used)
+    return lines
+
+
+@transaction.atomic
+def return_activity_inputs(activity, recorded_by=''):
+    """Post RETURN movements reversing the stock drawn by ``activity``'s input lines.
+
+    Returns the movements posted. Converted historical lines drew nothing
+    and are skipped.
+    """
+    drawn = list(
+        StockMovement.objects.filter(crop_input_line__activity=activity)
+        .only('id', 'farm_id', 'consumable_id', 'quantity', 'from_warehouse_id')
+    )
+    if not drawn:
+        return []
+    lots = defaultdict(list)
+    for allocation in BatchAllocation.objects.filter(movement__in=drawn).order_by('pk'):
+        lots[allocation.movement_id].append((allocation.batch_id, allocation.quantity))
+
+    returns = []
+    for movement in drawn:
+        unbatched = movement.quantity - sum(quantity for _batch, quantity in lots[movement.pk])
+        parts = lots[movement.pk] + ([(None, unbatched)] if unbatched > 0 else [])
+        returns.extend(
+            StockMovement(
+                farm_id=movement.farm_id,
+                consumable_id=movement.consumable_id,
+                movement_type='RETURN',
+                reason='CORRECTION',
+                quantity=quantity,
+                date=timezone.localdate(),
+                to_warehouse_id=movement.from_warehouse_id,
+                batch_id=batch_id,
+                reference=f'Deleted crop activity {activity.pk}',
+                recorded_by=recorded_by,
+            )
+            for batch_id, quantity in parts
+        )
+    return post_movements(returns)
+
+
+def convert_historical_inputs(queryset=None, batch_size=500):
+    """Turn free-text inputs_used into CropActivityInput rows without touching stock.
+
+    Names are matched case-insensitively against the farm's consumables.
+    Returns (activities converted, lines created, unmatched entries).
+    """
+    if queryset is None:
+        queryset = CropActivity.objects.all()
+    queryset = (
+        queryset.exclude(inputs_used='').filter(input_lines__isnull=True)
+        .only('id', 'inputs_used', 'season__farm_id').select_related('season').order_by('pk')
+    )
+
+    consumables = {}
+    for consumable in Consumable.objects.annotate(name_key=Lower('item_name')).only('id', 'farm_id', 'unit', 'item_name'):
+        consumables.setdefault((consumable.farm_id, consumable.name_key.strip()), consumable)
+
+    converted = created = unmatched = 0
+    batch = []
+    for activity in queryset.iterator(chunk_size=batch_size):
+        found = False
+        for name, quantity, unit in parse_inputs_text(activity.inputs_used):
+            consumable = consumables.get((activity.season.farm_id, name.lower()))
+            if consumable is None:
+                unmatched += 1
+                continue
+            batch.append(CropActivityInput(activity=activity, consumable=consumable, quantity=quantity, unit=unit or consumable.unit))
+            found = True
+        converted += found
+        if len(batch) >= batch_size:
+            CropActivityInput.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        CropActivityInput.objects.bulk_create(batch)
+        created += len(batch)
+    return converted, created, unmatched
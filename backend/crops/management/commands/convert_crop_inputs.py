@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from crops.inputs import convert_historical_inputs
+
+
+class Command(BaseCommand):
+    help = 'Convert free-text CropActivity.inputs_used into structured input lines (stock is not drawn down).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        converted, created, unmatched = convert_historical_inputs(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Converted {converted} activit(ies) into {created} input line(s); {unmatched} entr(ies) had no matching consumable.'
+        ))
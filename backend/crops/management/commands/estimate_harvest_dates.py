@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from crops.gdd import refresh_season_gdd
+
+
+class Command(BaseCommand):
+    help = 'Accumulate growing degree days for active seasons and re-estimate their expected harvest dates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='Count weather up to this date (YYYY-MM-DD); defaults to today')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            try:
+                as_of = parse_date(options['as_of'])
+            except ValueError:
+                as_of = None
+            if as_of is None:
+                raise CommandError('--as-of must use the YYYY-MM-DD format.')
+        updated, estimated = refresh_season_gdd(as_of=as_of, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated GDD for {updated} season(s); re-estimated {estimated} harvest date(s).'))
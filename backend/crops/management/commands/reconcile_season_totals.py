@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from crops.totals import reconcile_season_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute CropSeason.total_cost and actual_yield from activities, pests and harvests.'
+
+    def handle(self, *args, **options):
+        count = reconcile_season_totals()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {count} crop season(s).'))
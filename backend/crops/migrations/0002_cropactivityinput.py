@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:04
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0001_initial'),
+        ('inventory', '0002_consumable_photo_supplier_consumable_supplier_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropActivityInput',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('unit', models.CharField(blank=True, help_text="Defaults to the consumable's unit", max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='input_lines', to='crops.cropactivity')),
+                ('consumable', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='crop_input_lines', to='inventory.consumable')),
+                ('stock_movement', models.OneToOneField(blank=True, help_text='The OUT movement that drew this input from stock; empty for converted historical entries', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='crop_input_line', to='inventory.stockmovement')),
+            ],
+        ),
+    ]
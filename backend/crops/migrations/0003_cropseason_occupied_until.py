@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:05
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_occupied_until(apps, schema_editor):
+    CropSeason = apps.get_model('crops', 'CropSeason')
+    CropSeason.objects.update(occupied_until=Coalesce('actual_harvest_date', 'expected_harvest_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_customattribute'),
+        ('crops', '0002_cropactivityinput'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cropseason',
+            name='occupied_until',
+            field=models.DateField(blank=True, editable=False, help_text='Actual or expected harvest date; the plot is occupied from planting_date until this day', null=True),
+        ),
+        migrations.RunPython(fill_occupied_until, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cropseason',
+            index=models.Index(fields=['plot', 'planting_date', 'occupied_until'], name='crops_crops_plot_id_ce436f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropseason',
+            index=models.Index(fields=['farm', 'planting_date', 'occupied_until'], name='crops_crops_farm_id_c59243_idx'),
+        ),
+    ]
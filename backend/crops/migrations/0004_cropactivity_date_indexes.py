@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0003_cropseason_occupied_until'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cropactivity',
+            index=models.Index(fields=['date'], name='crops_cropa_date_37c138_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropactivity',
+            index=models.Index(fields=['season', 'date'], name='crops_cropa_season__ad0cfa_idx'),
+        ),
+    ]
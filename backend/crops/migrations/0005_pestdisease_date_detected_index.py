@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0004_cropactivity_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pestdisease',
+            index=models.Index(fields=['date_detected'], name='crops_pestd_date_de_b5822e_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0005_pestdisease_date_detected_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cropseason',
+            name='accumulated_gdd',
+            field=models.DecimalField(blank=True, decimal_places=1, editable=False, help_text='Growing degree days since planting (see crops.gdd)', max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='cropseason',
+            name='gdd_as_of',
+            field=models.DateField(blank=True, editable=False, help_text='Last weather day counted in accumulated_gdd', null=True),
+        ),
+    ]
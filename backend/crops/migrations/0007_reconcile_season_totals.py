@@ -0,0 +1,71 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Sum
+
+# Mass units as of this migration; see crops.totals.UNIT_TO_KG.
+UNIT_TO_KG = {
+    'g': Decimal('0.001'),
+    'kg': Decimal('1'),
+    'kgs': Decimal('1'),
+    'bag': Decimal('90'),
+    'bags': Decimal('90'),
+    't': Decimal('1000'),
+    'tonne': Decimal('1000'),
+    'tonnes': Decimal('1000'),
+}
+CENT = Decimal('0.01')
+
+
+def _convert(quantity, unit, to_unit):
+    unit, to_unit = (unit or '').strip().lower(), (to_unit or '').strip().lower()
+    if unit == to_unit:
+        return quantity
+    if unit in UNIT_TO_KG and to_unit in UNIT_TO_KG:
+        return quantity * UNIT_TO_KG[unit] / UNIT_TO_KG[to_unit]
+    return None
+
+
+def reconcile_season_totals(apps, schema_editor):
+    """
+    total_cost and actual_yield became read-only and maintained from child
+    rows, so replace hand-entered figures with the sums the signals assume.
+    """
+    CropSeason = apps.get_model('crops', 'CropSeason')
+    CropActivity = apps.get_model('crops', 'CropActivity')
+    PestDisease = apps.get_model('crops', 'PestDisease')
+    HarvestRecord = apps.get_model('crops', 'HarvestRecord')
+
+    costs = defaultdict(Decimal)
+    for model, field in ((CropActivity, 'cost'), (PestDisease, 'treatment_cost')):
+        for season_id, total in model.objects.order_by().values('season').annotate(total=Sum(field)).values_list('season', 'total'):
+            costs[season_id] += total or 0
+    harvests = defaultdict(list)
+    rows = HarvestRecord.objects.order_by().values('season', 'unit').annotate(total=Sum('quantity'))
+    for season_id, unit, total in rows.values_list('season', 'unit', 'total'):
+        harvests[season_id].append((unit, total))
+
+    batch = []
+    for season in CropSeason.objects.only('id', 'yield_unit', 'total_cost', 'actual_yield').iterator(chunk_size=1000):
+        season.total_cost = costs[season.id].quantize(CENT)
+        converted = [_convert(total, unit, season.yield_unit) for unit, total in harvests.get(season.id, ())]
+        converted = [quantity for quantity in converted if quantity is not None]
+        season.actual_yield = sum(converted, Decimal('0')).quantize(CENT) if converted else None
+        batch.append(season)
+        if len(batch) >= 1000:
+            CropSeason.objects.bulk_update(batch, ['total_cost', 'actual_yield'])
+            batch = []
+    if batch:
+        CropSeason.objects.bulk_update(batch, ['total_cost', 'actual_yield'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0006_cropseason_accumulated_gdd'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconcile_season_totals, migrations.RunPython.noop),
+    ]
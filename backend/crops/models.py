@@ -51,6 +51,15 @@ class CropSeason(models.Model):
     planting_date = models.DateField(null=True, blank=True)
     expected_harvest_date = models.DateField(null=True, blank=True)
     actual_harvest_date = models.DateField(null=True, blank=True)
+    occupied_until = models.DateField(
+        null=True, blank=True, editable=False,
+        help_text="Actual or expected harvest date; the plot is occupied from planting_date until this day",
+    )
+    accumulated_gdd = models.DecimalField(
+        max_digits=8, decimal_places=1, null=True, blank=True, editable=False,
+        help_text="Growing degree days since planting (see crops.gdd)",
+    )
+    gdd_as_of = models.DateField(null=True, blank=True, editable=False, help_text="Last weather day counted in accumulated_gdd")
 
     # Quantities
     seed_quantity = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -70,11 +79,19 @@ class CropSeason(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        self.occupied_until = self.actual_harvest_date or self.expected_harvest_date
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.get_crop_type_display()} - {self.plot.name} ({self.status})"
 
     class Meta:
         ordering = ['-planting_date']
+        indexes = [
+            models.Index(fields=['plot', 'planting_date', 'occupied_until']),
+            models.Index(fields=['farm', 'planting_date', 'occupied_until']),
+        ]
 
 
 class CropActivity(models.Model):
@@ -116,6 +133,28 @@ class CropActivity(models.Model):
     class Meta:
         ordering = ['-date']
         verbose_name_plural = 'Crop activities'
+        indexes = [
+            models.Index(fields=['date']),
+            models.Index(fields=['season', 'date']),
+        ]
+
+
+class CropActivityInput(models.Model):
+    """A structured input line (fertilizer, chemical, seed) used in a crop activity."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    activity = models.ForeignKey(CropActivity, on_delete=models.CASCADE, related_name='input_lines')
+    consumable = models.ForeignKey('inventory.Consumable', on_delete=models.PROTECT, related_name='crop_input_lines')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    unit = models.CharField(max_length=20, blank=True, help_text="Defaults to the consumable's unit")
+    stock_movement = models.OneToOneField(
+        'inventory.StockMovement', on_delete=models.SET_NULL, null=True, blank=True, related_name='crop_input_line',
+        help_text="The OUT movement that drew this input from stock; empty for converted historical entries",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.consumable} {self.quantity}{self.unit}"
 
 
 class PestDisease(models.Model):
@@ -154,6 +193,9 @@ class PestDisease(models.Model):
     class Meta:
         ordering = ['-date_detected']
         verbose_name_plural = 'Pests & diseases'
+        indexes = [
+            models.Index(fields=['date_detected']),
+        ]
 
 
 class HarvestRecord(models.Model):
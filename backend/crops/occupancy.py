@@ -0,0 +1,95 @@
+"""
+Plot occupancy derived from CropSeason dates.
+
+A season occupies its plot from planting_date up to, but not including,
+occupied_until (the actual harvest date, else the expected one); without
+either harvest date it is open-ended. Seasons that were never planted do
+not occupy anything. Every query here is a range filter on the
+(plot, planting_date, occupied_until) index.
+"""
+from datetime import timedelta
+
+from django.db.models import Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+
+from core.models import FarmPlot
+
+from .models import CropSeason
+
+SEASON_FIELDS = ('id', 'plot_id', 'crop_type', 'variety', 'status', 'planting_date', 'occupied_until')
+
+
+def overlapping(queryset, start, end=None):
+    """Seasons in ``queryset`` occupying any day in [start, end); ``end=None`` is open-ended."""
+    queryset = queryset.filter(planting_date__isnull=False).filter(
+        Q(occupied_until__gt=start) | Q(occupied_until__isnull=True)
+    )
+    if end is not None:
+        queryset = queryset.filter(planting_date__lt=end)
+    return queryset
+
+
+def in_window(queryset, date_from, date_to):
+    """Seasons occupying any day between date_from and date_to inclusive."""
+    return overlapping(queryset, date_from, date_to + timedelta(days=1))
+
+
+def season_conflicts(plot, planting_date, harvest_date=None, exclude_pk=None):
+    """Other seasons on ``plot`` that would overlap a season with these dates."""
+    queryset = CropSeason.objects.filter(plot=plot)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    if harvest_date is not None and harvest_date <= planting_date:
+        harvest_date = planting_date + timedelta(days=1)
+    return overlapping(queryset, planting_date, harvest_date)
+
+
+def plot_timeline(farm, date_from, date_to, today, plot_id=None):
+    """Occupancy intervals per plot within the window, plus each plot's current season."""
+    plots = FarmPlot.objects.filter(farm=farm).order_by('name')
+    seasons = CropSeason.objects.filter(farm=farm)
+    if plot_id is not None:
+        plots = plots.filter(pk=plot_id)
+        seasons = seasons.filter(plot_id=plot_id)
+
+    timeline = {
+        plot.id: {'plot_id': plot.id, 'plot__name': plot.name, 'size_acres': plot.size_acres, 'current': None, 'seasons': []}
+        for plot in plots.only('id', 'name', 'size_acres')
+    }
+    window = in_window(seasons, date_from, date_to) | in_window(seasons, today, today)
+    for season in window.order_by('plot_id', 'planting_date').values(*SEASON_FIELDS):
+        entry = timeline.get(season['plot_id'])
+        if entry is None:
+            continue
+        season['ongoing'] = season['occupied_until'] is None or season['occupied_until'] > today
+        if season['planting_date'] <= today and season['ongoing']:
+            entry['current'] = season
+        if season['planting_date'] <= date_to and (season['occupied_until'] is None or season['occupied_until'] > date_from):
+            entry['seasons'].append(season)
+    return list(timeline.values())
+
+
+def rotation_history(farm, limit, plot_id=None):
+    """The last ``limit`` planted crops of every plot, newest first."""
+    seasons = CropSeason.objects.filter(farm=farm, planting_date__isnull=False)
+    if plot_id is not None:
+        seasons = seasons.filter(plot_id=plot_id)
+    rows = (
+        seasons.annotate(position=Window(RowNumber(), partition_by=F('plot_id'), order_by=F('planting_date').desc()))
+        .filter(position__lte=limit)
+        .order_by('plot__name', 'position')
+        .values('plot__name', 'position', *SEASON_FIELDS)
+    )
+
+    history = {}
+    for row in rows:
+        plot = history.setdefault(row['plot_id'], {'plot_id': row['plot_id'], 'plot__name': row.pop('plot__name'), 'crops': []})
+        row.pop('plot__name', None)
+        plot['crops'].append(row)
+    return list(history.values())
+
+
+def available_plots(farm, date_from, date_to):
+    """Plots of the farm with no season occupying any day of the window."""
+    busy = in_window(CropSeason.objects.filter(plot=OuterRef('pk')), date_from, date_to)
+    return FarmPlot.objects.filter(farm=farm).exclude(Exists(busy)).order_by('name')
@@ -1,13 +1,41 @@
+from django.db import transaction
 from rest_framework import serializers
 
-from .models import CropActivity, CropSeason, HarvestRecord, PestDisease
+from .inputs import record_activity_inputs
+from .models import CropActivity, CropActivityInput, CropSeason, HarvestRecord, PestDisease
+from .occupancy import season_conflicts
+
+
+class CropActivityInputSerializer(serializers.ModelSerializer):
+    consumable_name = serializers.CharField(source='consumable.item_name', read_only=True)
+
+    class Meta:
+        model = CropActivityInput
+        fields = ['id', 'consumable', 'consumable_name', 'quantity', 'unit', 'stock_movement']
+        read_only_fields = ['stock_movement']
 
 
 class CropActivitySerializer(serializers.ModelSerializer):
+    input_lines = CropActivityInputSerializer(many=True, required=False)
+
     class Meta:
         model = CropActivity
         fields = '__all__'
 
+    def validate_input_lines(self, value):
+        if self.instance is not None:
+            raise serializers.ValidationError('Input lines can only be set when the activity is recorded.')
+        return value
+
+    @transaction.atomic
+    def create(self, validated_data):
+        line_data = validated_data.pop('input_lines', [])
+        activity = super().create(validated_data)
+        request = self.context.get('request')
+        recorded_by = str(request.user)[:100] if request else ''
+        record_activity_inputs(activity, line_data, recorded_by=recorded_by)
+        return activity
+
 
 class CropSeasonSerializer(serializers.ModelSerializer):
     activities = CropActivitySerializer(many=True, read_only=True)
@@ -15,7 +43,44 @@ class CropSeasonSerializer(serializers.ModelSerializer):
     class Meta:
         model = CropSeason
         fields = '__all__'
-        read_only_fields = ['farm']
+        # Maintained from activities, pests and harvests (see crops.totals).
+        read_only_fields = ['farm', 'total_cost', 'actual_yield']
+
+    def validate(self, attrs):
+        def current(name):
+            return attrs[name] if name in attrs else getattr(self.instance, name, None)
+
+        planting_date = current('planting_date')
+        if planting_date is not None:
+            harvest_date = current('actual_harvest_date') or current('expected_harvest_date')
+            conflict = season_conflicts(
+                current('plot'), planting_date, harvest_date, exclude_pk=getattr(self.instance, 'pk', None),
+            ).order_by('planting_date').first()
+            if conflict is not None:
+                until = conflict.occupied_until or 'harvest'
+                raise serializers.ValidationError({
+                    'planting_date': f'{conflict.plot.name} is occupied by {conflict.get_crop_type_display()} '
+                                     f'from {conflict.planting_date} until {until}.',
+                })
+        return attrs
+
+
+class CropSeasonListSerializer(serializers.ModelSerializer):
+    """List representation: per-season totals instead of the nested activities."""
+
+    activity_count = serializers.IntegerField(read_only=True)
+    activity_cost = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    labor_hours = serializers.DecimalField(max_digits=12, decimal_places=1, read_only=True)
+    pest_treatment_cost = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    # In yield_unit, like actual_yield.
+    harvest_quantity = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    last_activity_date = serializers.DateField(read_only=True)
+
+    class Meta:
+        model = CropSeason
+        fields = '__all__'
+        # Maintained from activities, pests and harvests (see crops.totals).
+        read_only_fields = ['farm', 'total_cost', 'actual_yield']
 
 
 class PestDiseaseSerializer(serializers.ModelSerializer):
@@ -0,0 +1,96 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.models import FarmPlot
+
+from .analytics import bump_analytics_version
+from .inputs import return_activity_inputs
+from .models import CropActivity, CropSeason, HarvestRecord, PestDisease
+from .totals import (
+    apply_cost_delta,
+    apply_yield_delta,
+    cost_contribution,
+    reconcile_season_totals,
+    season_yield_unit,
+    yield_contribution,
+)
+
+
+def _previous(sender, instance):
+    if instance._state.adding:
+        return None
+    return sender.objects.filter(pk=instance.pk).first()
+
+
+@receiver(pre_save, sender=CropActivity)
+@receiver(pre_save, sender=PestDisease)
+@receiver(pre_save, sender=HarvestRecord)
+def remember_previous_totals(sender, instance, **kwargs):
+    """Keep the stored row so post_save can apply only the difference."""
+    instance._previous = _previous(sender, instance)
+
+
+@receiver(post_save, sender=CropActivity)
+@receiver(post_save, sender=PestDisease)
+def update_season_cost(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        apply_cost_delta(previous.season_id, -cost_contribution(previous))
+    apply_cost_delta(instance.season_id, cost_contribution(instance))
+
+
+@receiver(post_delete, sender=CropActivity)
+@receiver(post_delete, sender=PestDisease)
+def remove_season_cost(sender, instance, **kwargs):
+    apply_cost_delta(instance.season_id, -cost_contribution(instance))
+
+
+@receiver(pre_delete, sender=CropActivity)
+def return_deleted_activity_inputs(sender, instance, **kwargs):
+    """Put back the stock drawn by the activity's input lines, also when its season is deleted."""
+    return_activity_inputs(instance, recorded_by=getattr(instance, '_deleted_by', ''))
+
+
+@receiver(post_save, sender=HarvestRecord)
+def update_season_yield(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        apply_yield_delta(previous.season_id, -yield_contribution(previous, season_yield_unit(previous.season_id)))
+    apply_yield_delta(instance.season_id, yield_contribution(instance, season_yield_unit(instance.season_id)))
+
+
+@receiver(post_delete, sender=HarvestRecord)
+def remove_season_yield(sender, instance, **kwargs):
+    apply_yield_delta(instance.season_id, -yield_contribution(instance, season_yield_unit(instance.season_id)))
+
+
+@receiver(pre_save, sender=CropSeason)
+def remember_previous_yield_unit(sender, instance, **kwargs):
+    previous = _previous(sender, instance)
+    instance._yield_unit_changed = previous is not None and previous.yield_unit != instance.yield_unit
+
+
+@receiver(post_save, sender=CropSeason)
+def convert_yield_to_new_unit(sender, instance, **kwargs):
+    if getattr(instance, '_yield_unit_changed', False):
+        reconcile_season_totals(CropSeason.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=CropSeason)
+@receiver(post_delete, sender=CropSeason)
+@receiver(post_save, sender=FarmPlot)
+@receiver(post_delete, sender=FarmPlot)
+def invalidate_season_analytics(sender, instance, **kwargs):
+    bump_analytics_version(instance.farm_id)
+
+
+@receiver(post_save, sender=CropActivity)
+@receiver(post_delete, sender=CropActivity)
+@receiver(post_save, sender=PestDisease)
+@receiver(post_delete, sender=PestDisease)
+@receiver(post_save, sender=HarvestRecord)
+@receiver(post_delete, sender=HarvestRecord)
+def invalidate_child_analytics(sender, instance, **kwargs):
+    farm_id = CropSeason.objects.filter(pk=instance.season_id).values_list('farm_id', flat=True).first()
+    if farm_id:
+        bump_analytics_version(farm_id)
@@ -0,0 +1,165 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Farm, FarmPlot
+from inventory.batches import batch_for
+from inventory.models import Consumable, StockBatch, StockMovement
+from inventory.stock import post_movements
+
+from .analytics import yield_report
+from .inputs import record_activity_inputs
+from .models import CropActivity, CropSeason, HarvestRecord, PestDisease
+from .totals import reconcile_season_totals
+from .views import with_season_totals
+
+
+class SeasonTotalsTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        plot = FarmPlot.objects.create(farm=self.farm, name='Plot A', size_acres=Decimal('2'))
+        self.season = CropSeason.objects.create(farm=self.farm, plot=plot, crop_type='MAIZE', yield_unit='kg')
+        self.other = CropSeason.objects.create(farm=self.farm, plot=plot, crop_type='BEANS', yield_unit='bags')
+
+    def _totals(self, season=None):
+        season = season or self.season
+        season.refresh_from_db()
+        return season.total_cost, season.actual_yield
+
+    def _activity(self, cost, season=None):
+        return CropActivity.objects.create(
+            season=season or self.season, activity_type='WEEDING', date=date(2024, 3, 1), cost=Decimal(cost),
+        )
+
+    def test_cost_deltas_on_create_edit_and_delete(self):
+        weeding = self._activity('1500')
+        PestDisease.objects.create(
+            season=self.season, type='PEST', name='Fall armyworm', date_detected=date(2024, 3, 5),
+            treatment_cost=Decimal('800'),
+        )
+        self.assertEqual(self._totals()[0], Decimal('2300.00'))
+
+        weeding.cost = Decimal('1000')
+        weeding.save()
+        self.assertEqual(self._totals()[0], Decimal('1800.00'))
+
+        weeding.delete()
+        self.assertEqual(self._totals()[0], Decimal('800.00'))
+
+    def test_moving_an_activity_moves_its_cost(self):
+        weeding = self._activity('1500')
+        weeding.season = self.other
+        weeding.save()
+
+        self.assertEqual(self._totals()[0], Decimal('0.00'))
+        self.assertEqual(self._totals(self.other)[0], Decimal('1500.00'))
+
+    def test_yield_deltas_convert_units(self):
+        bags = HarvestRecord.objects.create(season=self.season, date=date(2024, 7, 1), quantity=Decimal('2'), unit='Bags ')
+        HarvestRecord.objects.create(season=self.season, date=date(2024, 7, 2), quantity=Decimal('500'), unit='g')
+        self.assertEqual(self._totals()[1], Decimal('180.50'))
+
+        bags.quantity = Decimal('3')
+        bags.save()
+        self.assertEqual(self._totals()[1], Decimal('270.50'))
+
+        bags.delete()
+        self.assertEqual(self._totals()[1], Decimal('0.50'))
+
+    def test_reconcile_matches_the_running_totals(self):
+        self._activity('1500')
+        HarvestRecord.objects.create(season=self.season, date=date(2024, 7, 1), quantity=Decimal('2'), unit='bag ')
+        HarvestRecord.objects.create(season=self.season, date=date(2024, 7, 2), quantity=Decimal('10'), unit='KG')
+        running = self._totals()
+        CropSeason.objects.filter(pk=self.season.pk).update(total_cost=Decimal('99'), actual_yield=Decimal('99'))
+
+        reconcile_season_totals(CropSeason.objects.filter(pk=self.season.pk))
+
+        self.assertEqual(self._totals(), running)
+        self.assertEqual(running, (Decimal('1500.00'), Decimal('190.00')))
+
+    def test_list_totals_use_the_season_unit(self):
+        HarvestRecord.objects.create(season=self.season, date=date(2024, 7, 1), quantity=Decimal('2'), unit='bags')
+        HarvestRecord.objects.create(season=self.season, date=date(2024, 7, 2), quantity=Decimal('10'), unit='kg')
+        for hours in ('2.5', '1.5'):
+            CropActivity.objects.create(season=self.season, activity_type='WEEDING', date=date(2024, 3, 1), labor_hours=Decimal(hours))
+
+        season = with_season_totals(CropSeason.objects.filter(pk=self.season.pk)).get()
+
+        self.assertEqual(season.harvest_quantity, Decimal('190.00'))
+        self.assertEqual(season.labor_hours, Decimal('4.0'))
+
+
+class YieldReportTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.plot = FarmPlot.objects.create(farm=self.farm, name='Plot A', size_acres=Decimal('2'))
+
+    def _season(self, yield_unit, quantity, cost):
+        season = CropSeason.objects.create(
+            farm=self.farm, plot=self.plot, crop_type='MAIZE', yield_unit=yield_unit,
+            actual_harvest_date=date(2024, 7, 1),
+        )
+        HarvestRecord.objects.create(season=season, date=date(2024, 7, 1), quantity=Decimal(quantity), unit=yield_unit)
+        CropActivity.objects.create(season=season, activity_type='WEEDING', date=date(2024, 3, 1), cost=Decimal(cost))
+
+    def test_cost_per_kg_only_counts_weighed_seasons(self):
+        self._season('bags', '10', '9000')
+        self._season('crates', '40', '5000')
+
+        row, = yield_report(self.farm, prices={'MAIZE': 50})['rows']
+
+        self.assertEqual(row['cost_per_kg'], 10.0)
+        self.assertEqual(row['cost_per_acre'], 7000.0)
+        self.assertEqual(row['margin'], 36000.0)
+
+
+class ActivityInputTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        plot = FarmPlot.objects.create(farm=self.farm, name='Plot A', size_acres=Decimal('2'))
+        self.season = CropSeason.objects.create(farm=self.farm, plot=plot, crop_type='MAIZE')
+        self.dap = Consumable.objects.create(farm=self.farm, item_name='DAP', unit='kg')
+        self.lot = batch_for(self.dap, 'L1', date(2027, 1, 1), date(2024, 1, 1))
+        post_movements([
+            StockMovement(farm=self.farm, consumable=self.dap, movement_type='IN', quantity=Decimal('30'),
+                          date=date(2024, 1, 1), batch=self.lot),
+            StockMovement(farm=self.farm, consumable=self.dap, movement_type='IN', quantity=Decimal('70'),
+                          date=date(2024, 1, 1)),
+        ])
+        self.activity = CropActivity.objects.create(season=self.season, activity_type='FERTILIZING', date=date(2024, 3, 1))
+        record_activity_inputs(self.activity, [{'consumable': self.dap, 'quantity': Decimal('1'), 'unit': 'bag'}])
+
+    def _on_hand(self):
+        self.dap.refresh_from_db()
+        return self.dap.quantity_on_hand
+
+    def test_deleting_an_activity_returns_its_inputs(self):
+        self.assertEqual(self._on_hand(), Decimal('10'))
+
+        self.activity.delete()
+
+        self.assertEqual(self._on_hand(), Decimal('100'))
+        self.assertEqual(StockBatch.objects.get(pk=self.lot.pk).quantity_remaining, Decimal('30'))
+        returns = StockMovement.objects.filter(movement_type='RETURN').order_by('quantity')
+        self.assertEqual([(movement.batch_id, movement.quantity) for movement in returns], [
+            (self.lot.pk, Decimal('30')), (None, Decimal('60')),
+        ])
+
+    def test_used_consumable_cannot_be_deleted(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(email='staff@example.com', password='x'))
+
+        response = client.delete(f'/api/consumables/{self.dap.pk}/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('crop activity input', str(response.data['detail']))
+        self.assertTrue(Consumable.objects.filter(pk=self.dap.pk).exists())
+
+    def test_deleting_the_season_returns_its_inputs(self):
+        self.season.delete()
+
+        self.assertEqual(self._on_hand(), Decimal('100'))
@@ -0,0 +1,115 @@
+"""
+CropSeason.total_cost and actual_yield kept in step with their child rows.
+
+total_cost is the sum of CropActivity.cost and PestDisease.treatment_cost;
+actual_yield is the sum of HarvestRecord.quantity converted to the season's
+yield_unit. Child saves and deletes apply the difference with F()
+expressions, so no season is ever re-summed on the write path.
+reconcile_season_totals() recomputes everything set-wise.
+"""
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Lower, Trim
+from django.db.models.lookups import Exact
+
+from .models import CropActivity, CropSeason, HarvestRecord, PestDisease
+
+# Mass units in kilograms. A bag is the standard 90 kg produce bag.
+UNIT_TO_KG = {
+    'g': Decimal('0.001'),
+    'kg': Decimal('1'),
+    'kgs': Decimal('1'),
+    'bag': Decimal('90'),
+    'bags': Decimal('90'),
+    't': Decimal('1000'),
+    'tonne': Decimal('1000'),
+    'tonnes': Decimal('1000'),
+}
+
+CENT = Decimal('0.01')
+
+
+def convert_quantity(quantity, unit, to_unit):
+    """Express ``quantity`` in ``to_unit``, or None when the units don't convert."""
+    unit, to_unit = (unit or '').strip().lower(), (to_unit or '').strip().lower()
+    if unit == to_unit:
+        return quantity
+    if unit in UNIT_TO_KG and to_unit in UNIT_TO_KG:
+        return quantity * UNIT_TO_KG[unit] / UNIT_TO_KG[to_unit]
+    return None
+
+
+def cost_contribution(instance):
+    if isinstance(instance, PestDisease):
+        return instance.treatment_cost or Decimal('0')
+    return instance.cost or Decimal('0')
+
+
+def yield_contribution(harvest, season_unit):
+    converted = convert_quantity(harvest.quantity or Decimal('0'), harvest.unit, season_unit)
+    return Decimal('0') if converted is None else converted
+
+
+def apply_cost_delta(season_id, delta):
+    delta = Decimal(delta).quantize(CENT)
+    if season_id and delta:
+        CropSeason.objects.filter(pk=season_id).update(total_cost=F('total_cost') + delta)
+
+
+def apply_yield_delta(season_id, delta):
+    delta = Decimal(delta).quantize(CENT)
+    if season_id and delta:
+        CropSeason.objects.filter(pk=season_id).update(actual_yield=Coalesce(F('actual_yield'), Decimal('0')) + delta)
+
+
+def season_yield_unit(season_id):
+    return CropSeason.objects.filter(pk=season_id).values_list('yield_unit', flat=True).first()
+
+
+def _per_season(model, expression):
+    rows = model.objects.filter(season=OuterRef('pk')).order_by().values('season')
+    return Subquery(
+        rows.annotate(total=Sum(expression)).values('total'),
+        output_field=DecimalField(max_digits=14, decimal_places=4),
+    )
+
+
+def kg_factor(field):
+    """SQL expression for the kilograms in one ``field`` unit (NULL if not a mass unit).
+
+    Units are trimmed and lowercased first, matching convert_quantity().
+    """
+    unit_expr = Lower(Trim(field))
+    return Case(
+        *(When(Exact(unit_expr, Value(unit)), then=Value(factor)) for unit, factor in UNIT_TO_KG.items()),
+        output_field=DecimalField(max_digits=14, decimal_places=4),
+    )
+
+
+def _harvest_in_season_unit():
+    """SQL twin of convert_quantity() for HarvestRecord rows."""
+    number = DecimalField(max_digits=14, decimal_places=4)
+    converted = ExpressionWrapper(F('quantity') * kg_factor('unit') / kg_factor('season__yield_unit'), output_field=number)
+    return Case(
+        When(Exact(Lower(Trim('unit')), Lower(Trim('season__yield_unit'))), then=F('quantity')),
+        default=converted,
+        output_field=number,
+    )
+
+
+def reconcile_season_totals(queryset=None):
+    """Recompute total_cost and actual_yield for ``queryset`` in one UPDATE.
+
+    Returns the number of seasons updated.
+    """
+    if queryset is None:
+        queryset = CropSeason.objects.all()
+    zero = Value(Decimal('0'))
+    return queryset.update(
+        total_cost=(
+            Coalesce(_per_season(CropActivity, F('cost')), zero)
+            + Coalesce(_per_season(PestDisease, F('treatment_cost')), zero)
+        ),
+        actual_yield=_per_season(HarvestRecord, _harvest_in_season_unit()),
+    )
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     CropActivityViewSet,
+    CropCalendarView,
     CropSeasonViewSet,
     HarvestRecordViewSet,
     PestDiseaseViewSet,
@@ -15,5 +16,6 @@ router.register(r'crops/pest-diseases', PestDiseaseViewSet, basename='pest-disea
 router.register(r'crops/harvest-records', HarvestRecordViewSet, basename='harvest-record')
 
 urlpatterns = [
+    path('crops/calendar/', CropCalendarView.as_view(), name='crop-calendar'),
     path('', include(router.urls)),
 ]
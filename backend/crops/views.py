@@ -1,11 +1,26 @@
+from datetime import date, timedelta
+
+from django.db.models import Count, DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from core.custom_data import CustomDataFilterBackend
 from core.models import Farm
+from core.params import get_date_param
+from core.serializers import FarmPlotSerializer
 
+from .analytics import cached_farm_analytic, pest_heatmap, yield_report
+from .calendar import BUCKETS, crop_calendar
 from .models import CropActivity, CropSeason, HarvestRecord, PestDisease
+from .occupancy import available_plots, plot_timeline, rotation_history
 from .serializers import (
     CropActivitySerializer,
+    CropSeasonListSerializer,
     CropSeasonSerializer,
     HarvestRecordSerializer,
     PestDiseaseSerializer,
@@ -19,13 +34,143 @@ def get_current_farm():
     return farm
 
 
+def get_date_range(request, default_from=None, default_to=None):
+    date_from = get_date_param(request, 'from') or default_from
+    date_to = get_date_param(request, 'to') or default_to
+    if date_from is None or date_to is None:
+        raise ValidationError({'from' if date_from is None else 'to': 'This parameter is required.'})
+    if date_from > date_to:
+        raise ValidationError({'to': 'Must be on or after from.'})
+    return date_from, date_to
+
+
+def season_aggregate(model, aggregate, output_field=None):
+    """Correlated subquery aggregating ``model`` rows of the outer season.
+
+    One subquery per relation avoids the row multiplication a JOIN across
+    activities, pests and harvests would cause.
+    """
+    rows = model.objects.filter(season=OuterRef('pk')).order_by().values('season')
+    return Subquery(rows.annotate(value=aggregate).values('value'), output_field=output_field)
+
+
+def with_season_totals(queryset):
+    money = DecimalField(max_digits=14, decimal_places=2)
+    hours = DecimalField(max_digits=12, decimal_places=1)
+    zero = Value(0, output_field=money)
+    return queryset.annotate(
+        activity_count=Coalesce(season_aggregate(CropActivity, Count('id')), 0),
+        activity_cost=Coalesce(season_aggregate(CropActivity, Sum('cost'), money), zero),
+        labor_hours=Coalesce(season_aggregate(CropActivity, Sum('labor_hours'), hours), Value(0, output_field=hours)),
+        pest_treatment_cost=Coalesce(season_aggregate(PestDisease, Sum('treatment_cost'), money), zero),
+        # Harvests already converted to the season's yield_unit (see crops.totals);
+        # summing the raw quantities would add kg to bags.
+        harvest_quantity=Coalesce(F('actual_yield'), zero),
+        last_activity_date=season_aggregate(CropActivity, Max('date')),
+    )
+
+
+# Keeps a weekly calendar to roughly 160 columns.
+MAX_CALENDAR_DAYS = 3 * 366
+
+
+class CropCalendarView(APIView):
+    """Season bars and activity markers for planning views.
+
+    Query params: from, to (required, at most three years apart), bucket=week|month.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        date_from, date_to = get_date_range(request)
+        if (date_to - date_from).days > MAX_CALENDAR_DAYS:
+            raise ValidationError({'to': 'The window can span at most three years.'})
+        bucket = request.query_params.get('bucket', 'week')
+        if bucket not in BUCKETS:
+            raise ValidationError({'bucket': f'Use one of: {", ".join(BUCKETS)}.'})
+        return Response(crop_calendar(get_current_farm(), date_from, date_to, bucket))
+
+
 class CropSeasonViewSet(viewsets.ModelViewSet):
     serializer_class = CropSeasonSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
     def get_queryset(self):
         farm = get_current_farm()
-        return CropSeason.objects.filter(farm=farm)
+        queryset = CropSeason.objects.filter(farm=farm)
+        if self.action == 'list':
+            return with_season_totals(queryset)
+        return queryset.prefetch_related('activities__input_lines__consumable')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CropSeasonListSerializer
+        return CropSeasonSerializer
+
+    @action(detail=False, methods=['get'], url_path='yield-analytics')
+    def yield_analytics(self, request):
+        """Yield per acre, cost per kg and margin per plot, crop and year,
+        with year-over-year change and a per-crop plot leaderboard.
+
+        Query params: from_year, to_year, price.<CROP_TYPE>=<price per kg>.
+        """
+        params = {}
+        for name in ('from_year', 'to_year'):
+            if request.query_params.get(name):
+                try:
+                    params[name] = int(request.query_params[name])
+                except ValueError:
+                    raise ValidationError({name: 'Must be a year, e.g. 2024.'})
+        prices = {}
+        for name, value in request.query_params.items():
+            if name.startswith('price.'):
+                try:
+                    prices[name[len('price.'):]] = float(value)
+                except ValueError:
+                    raise ValidationError({name: 'Must be a number.'})
+        params['prices'] = tuple(sorted(prices.items()))
+
+        farm = get_current_farm()
+        report = cached_farm_analytic(farm, 'yield', params, lambda: yield_report(
+            farm, prices=prices, year_from=params.get('from_year'), year_to=params.get('to_year'),
+        ))
+        return Response(report)
+
+    @action(detail=False, methods=['get'], url_path='occupancy')
+    def occupancy_timeline(self, request):
+        """Occupancy timeline per plot derived from season dates.
+
+        Query params: from, to (default: the current year), plot.
+        """
+        today = timezone.localdate()
+        date_from, date_to = get_date_range(request, date(today.year, 1, 1), date(today.year, 12, 31))
+        farm = get_current_farm()
+        return Response({
+            'from': date_from,
+            'to': date_to,
+            'plots': plot_timeline(farm, date_from, date_to, today, plot_id=request.query_params.get('plot') or None),
+        })
+
+    @action(detail=False, methods=['get'], url_path='rotation-history')
+    def plot_rotation_history(self, request):
+        """The last N crops planted on each plot. Query params: limit (default 5, max 20), plot."""
+        try:
+            limit = int(request.query_params.get('limit', 5))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be a whole number.'})
+        if not 1 <= limit <= 20:
+            raise ValidationError({'limit': 'Must be between 1 and 20.'})
+        farm = get_current_farm()
+        return Response(rotation_history(farm, limit, plot_id=request.query_params.get('plot') or None))
+
+    @action(detail=False, methods=['get'], url_path='available-plots')
+    def free_plots(self, request):
+        """Plots with no season occupying any day between from and to (both required)."""
+        date_from, date_to = get_date_range(request)
+        plots = available_plots(get_current_farm(), date_from, date_to)
+        return Response(FarmPlotSerializer(plots, many=True, context={'request': request}).data)
 
     def perform_create(self, serializer):
         farm = get_current_farm()
@@ -35,10 +180,11 @@ class CropSeasonViewSet(viewsets.ModelViewSet):
 class CropActivityViewSet(viewsets.ModelViewSet):
     serializer_class = CropActivitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
     def get_queryset(self):
         farm = get_current_farm()
-        return CropActivity.objects.filter(season__farm=farm)
+        return CropActivity.objects.filter(season__farm=farm).prefetch_related('input_lines__consumable')
 
     def perform_create(self, serializer):
         farm = get_current_farm()
@@ -47,6 +193,11 @@ class CropActivityViewSet(viewsets.ModelViewSet):
             raise ValidationError({'season': 'Selected season does not belong to the current farm.'})
         serializer.save()
 
+    def perform_destroy(self, instance):
+        # Read by the pre_delete receiver that returns the inputs to stock.
+        instance._deleted_by = str(self.request.user)[:100]
+        instance.delete()
+
 
 class PestDiseaseViewSet(viewsets.ModelViewSet):
     serializer_class = PestDiseaseSerializer
@@ -56,6 +207,25 @@ class PestDiseaseViewSet(viewsets.ModelViewSet):
         farm = get_current_farm()
         return PestDisease.objects.filter(season__farm=farm)
 
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """Plot x week incidence matrix with severity-weighted scores, open
+        counts and mean days to resolution.
+
+        Query params: from, to (default: the last 26 weeks), type.
+        """
+        today = timezone.localdate()
+        date_from, date_to = get_date_range(request, today - timedelta(weeks=26), today)
+        pest_type = request.query_params.get('type') or None
+        if pest_type and pest_type not in dict(PestDisease.TYPE_CHOICES):
+            raise ValidationError({'type': f'Use one of: {", ".join(dict(PestDisease.TYPE_CHOICES))}.'})
+
+        farm = get_current_farm()
+        params = {'from': date_from, 'to': date_to, 'type': pest_type}
+        return Response(cached_farm_analytic(farm, 'pest-heatmap', params, lambda: pest_heatmap(
+            farm, date_from, date_to, pest_type=pest_type,
+        )))
+
     def perform_create(self, serializer):
         farm = get_current_farm()
         season = serializer.validated_data['season']
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Tool, Consumable
+from .models import Tool, Consumable, CostLayer, StockBatch, StockPosition, StockSnapshot, StockTake, StockTakeLine, ToolCheckout, ToolMaintenance, ValuationState
 
 @admin.register(Tool)
 class ToolAdmin(admin.ModelAdmin):
@@ -9,5 +9,58 @@ class ToolAdmin(admin.ModelAdmin):
 
 @admin.register(Consumable)
 class ConsumableAdmin(admin.ModelAdmin):
-    list_display = ('item_name', 'quantity_on_hand', 'unit', 'reorder_threshold')
-    search_fields = ('item_name',)
\ No newline at end of file
+    list_display = ('item_name', 'quantity_on_hand', 'unit', 'reorder_threshold', 'costing_method')
+    search_fields = ('item_name',)
+    # Changed only by posting stock movements (see inventory.stock).
+    readonly_fields = ('quantity_on_hand',)
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('consumable', 'date', 'quantity')
+    list_filter = ('date',)
+
+@admin.register(StockPosition)
+class StockPositionAdmin(admin.ModelAdmin):
+    list_display = ('consumable', 'tool', 'warehouse', 'quantity', 'updated_at')
+    list_filter = ('warehouse',)
+
+
+class StockTakeLineInline(admin.TabularInline):
+    model = StockTakeLine
+    extra = 0
+    raw_id_fields = ('consumable', 'tool', 'movement')
+
+@admin.register(StockTake)
+class StockTakeAdmin(admin.ModelAdmin):
+    list_display = ('date', 'status', 'counted_by', 'committed_at')
+    list_filter = ('status',)
+    inlines = [StockTakeLineInline]
+
+
+@admin.register(ValuationState)
+class ValuationStateAdmin(admin.ModelAdmin):
+    list_display = ('consumable', 'quantity', 'value', 'last_date')
+
+@admin.register(CostLayer)
+class CostLayerAdmin(admin.ModelAdmin):
+    list_display = ('consumable', 'date', 'unit_cost', 'remaining')
+    raw_id_fields = ('movement',)
+
+
+@admin.register(StockBatch)
+class StockBatchAdmin(admin.ModelAdmin):
+    list_display = ('consumable', 'lot_number', 'expiry_date', 'quantity_remaining')
+    search_fields = ('lot_number', 'consumable__item_name')
+    list_filter = ('expiry_date',)
+
+
+@admin.register(ToolCheckout)
+class ToolCheckoutAdmin(admin.ModelAdmin):
+    list_display = ('tool', 'worker', 'quantity', 'checked_out_at', 'checked_in_at')
+    list_filter = ('checked_in_at',)
+
+@admin.register(ToolMaintenance)
+class ToolMaintenanceAdmin(admin.ModelAdmin):
+    list_display = ('tool', 'task', 'due_date', 'started_on', 'completed_on')
+    list_filter = ('completed_on',)
@@ -0,0 +1,133 @@
+"""
+Lot tracking with expiry dates and first-expiry-first-out picking.
+
+Incoming movements that name a batch add to its remaining quantity.
+Outgoing ones (OUT and negative adjustments) draw from the batch they name
+or, when they name none, from the consumable's open batches soonest expiry
+first, skipping lots that expired before the movement date (those leave
+through write_off_expired); every draw is stored as a BatchAllocation. Stock received without a
+lot is untracked, so a draw larger than the open batches leaves the rest
+unallocated. Open batches carry partial indexes on expiry_date, which serve
+the expiring-soon list and the EXPIRED write-off.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .ledger import movement_delta
+from .models import BatchAllocation, StockBatch, StockMovement
+
+
+def batch_for(consumable, lot_number, expiry_date=None, received_date=None):
+    """The consumable's batch ``lot_number``, created on first receipt."""
+    batch, created = StockBatch.objects.get_or_create(
+        consumable=consumable,
+        lot_number=lot_number,
+        defaults={
+            'farm_id': consumable.farm_id,
+            'expiry_date': expiry_date,
+            'received_date': received_date or timezone.localdate(),
+        },
+    )
+    if not created and expiry_date and batch.expiry_date != expiry_date:
+        raise ValidationError({'expiry_date': f'Lot {lot_number} is recorded as expiring on {batch.expiry_date}.'})
+    return batch
+
+
+def _fefo_key(batch):
+    return (batch.expiry_date is None, batch.expiry_date or date.max, batch.received_date, str(batch.pk))
+
+
+def allocate_batches(movements):
+    """Apply posted movements to their batches, picking FEFO for unnamed draws."""
+    from .stock import InsufficientStock, bulk_increment
+
+    increments = defaultdict(Decimal)
+    draws = []
+    for movement in movements:
+        if movement.consumable_id is None or movement.movement_type == 'TRANSFER':
+            continue
+        delta = movement_delta(movement)
+        if delta > 0 and movement.batch_id:
+            increments[movement.batch_id] += delta
+        elif delta < 0:
+            draws.append((movement, -delta))
+
+    allocations = []
+    if draws:
+        batches = StockBatch.objects.filter(
+            Q(consumable_id__in={movement.consumable_id for movement, _quantity in draws}, quantity_remaining__gt=0)
+            | Q(pk__in={movement.batch_id for movement, _quantity in draws if movement.batch_id})
+        ).order_by('pk').select_for_update()
+        batches = {batch.pk: batch for batch in batches}
+        available = {pk: batch.quantity_remaining for pk, batch in batches.items()}
+        fefo = defaultdict(list)
+        for batch in sorted(batches.values(), key=_fefo_key):
+            fefo[batch.consumable_id].append(batch)
+
+        for movement, quantity in draws:
+            if movement.batch_id:
+                candidates = [batches[movement.batch_id]]
+            else:
+                candidates = [
+                    batch for batch in fefo[movement.consumable_id]
+                    if batch.expiry_date is None or batch.expiry_date >= movement.date
+                ]
+            for batch in candidates:
+                taken = min(quantity, available[batch.pk])
+                if taken <= 0:
+                    continue
+                available[batch.pk] -= taken
+                increments[batch.pk] -= taken
+                allocations.append(BatchAllocation(movement=movement, batch=batch, quantity=taken))
+                quantity -= taken
+                if not quantity:
+                    break
+            if quantity and movement.batch_id:
+                batch = batches[movement.batch_id]
+                raise InsufficientStock({'batch': f'Only {batch.quantity_remaining} left in lot {batch.lot_number}.'})
+
+    bulk_increment(StockBatch.objects.all(), 'quantity_remaining', increments)
+    BatchAllocation.objects.bulk_create(allocations, batch_size=1000)
+
+
+def expiring(farm, within, today=None):
+    """Lots with stock left that expire within ``within`` days (already expired included), soonest first."""
+    today = today or timezone.localdate()
+    rows = list(
+        StockBatch.objects.filter(farm=farm, quantity_remaining__gt=0, expiry_date__lte=today + timedelta(days=within))
+        .order_by('expiry_date', 'consumable__item_name')
+        .values('id', 'consumable_id', 'consumable__item_name', 'consumable__unit', 'lot_number', 'expiry_date', 'quantity_remaining')
+    )
+    for row in rows:
+        row['days_left'] = (row['expiry_date'] - today).days
+    return rows
+
+
+def write_off_expired(today=None, farm=None):
+    """Post an OUT/EXPIRED movement emptying every lot that expired before ``today``. Returns the movements."""
+    from .stock import post_movements
+
+    today = today or timezone.localdate()
+    expired = StockBatch.objects.filter(quantity_remaining__gt=0, expiry_date__lt=today)
+    if farm is not None:
+        expired = expired.filter(farm=farm)
+    movements = [
+        StockMovement(
+            farm_id=batch['farm_id'],
+            consumable_id=batch['consumable_id'],
+            batch_id=batch['id'],
+            movement_type='OUT',
+            reason='EXPIRED',
+            quantity=batch['quantity_remaining'],
+            date=today,
+            reference=f"Expired lot {batch['lot_number']}",
+        )
+        for batch in expired.values('id', 'farm_id', 'consumable_id', 'lot_number', 'quantity_remaining')
+    ]
+    # Expired stock leaves whatever the balance, so the non-negative guard is off.
+    return post_movements(movements, prevent_negative=False)
@@ -0,0 +1,130 @@
+"""
+Consumption forecasts: smoothed daily usage, days of cover and stock-out dates.
+
+Daily usage is the sum of OUT movements for usage and sales. Each
+consumable's rate is an exponential moving average of it, seeded with the
+mean over the last HISTORY_DAYS. A refresh only folds in the days since the
+last one, reading them for every consumable from one query grouped by
+consumable and day. A consumable gets a full rebuild from history when a
+movement dated inside its folded period was recorded after the last refresh.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Exists, OuterRef, Sum
+from django.utils import timezone
+
+from .models import Consumable, ConsumptionForecast, StockMovement
+
+CONSUMPTION_REASONS = ('USAGE', 'SALE')
+HISTORY_DAYS = 90
+SPAN_DAYS = 14
+ALPHA = Decimal(2) / Decimal(SPAN_DAYS + 1)
+RATE_PLACES = Decimal('0.0001')
+
+
+def consumption_movements():
+    return StockMovement.objects.filter(movement_type='OUT', reason__in=CONSUMPTION_REASONS)
+
+
+def refresh_forecasts(queryset=None, today=None):
+    """Bring the forecasts of ``queryset`` consumables up to yesterday.
+
+    Returns (created, folded, rebuilt).
+    """
+    today = today or timezone.localdate()
+    through = today - timedelta(days=1)
+    history_start = through - timedelta(days=HISTORY_DAYS - 1)
+    if queryset is None:
+        queryset = Consumable.objects.all()
+
+    consumables = dict(queryset.values_list('id', 'farm_id'))
+    forecasts = {forecast.consumable_id: forecast for forecast in ConsumptionForecast.objects.filter(consumable_id__in=consumables)}
+    backdated = set(
+        ConsumptionForecast.objects.filter(consumable_id__in=forecasts).filter(Exists(
+            consumption_movements().filter(
+                consumable=OuterRef('consumable'),
+                created_at__gt=OuterRef('refreshed_at'),
+                date__lte=OuterRef('folded_through'),
+            )
+        )).values_list('consumable_id', flat=True)
+    )
+
+    def needs_history(consumable_id):
+        return consumable_id not in forecasts or consumable_id in backdated
+
+    starts = [
+        history_start if needs_history(consumable_id) else forecasts[consumable_id].folded_through + timedelta(days=1)
+        for consumable_id in consumables
+    ]
+    if not starts:
+        return 0, 0, 0
+
+    usage = defaultdict(dict)
+    rows = (
+        consumption_movements().filter(consumable_id__in=consumables, date__gte=min(starts), date__lte=through)
+        .values('consumable_id', 'date').annotate(total=Sum('quantity')).order_by()
+    )
+    for row in rows:
+        usage[row['consumable_id']][row['date']] = Decimal(str(row['total']))
+
+    now = timezone.now()
+    created, updated = [], []
+    folded = rebuilt = 0
+    for consumable_id, farm_id in consumables.items():
+        daily = usage.get(consumable_id, {})
+        forecast = forecasts.get(consumable_id)
+        if needs_history(consumable_id):
+            rate = sum((total for day, total in daily.items() if day >= history_start), Decimal('0')) / HISTORY_DAYS
+            if forecast is None:
+                forecast = ConsumptionForecast(consumable_id=consumable_id, farm_id=farm_id)
+                created.append(forecast)
+            else:
+                rebuilt += 1
+                updated.append(forecast)
+        else:
+            if forecast.folded_through >= through:
+                continue
+            rate = forecast.daily_rate
+            day = forecast.folded_through + timedelta(days=1)
+            while day <= through:
+                rate = ALPHA * daily.get(day, Decimal('0')) + (1 - ALPHA) * rate
+                day += timedelta(days=1)
+            folded += 1
+            updated.append(forecast)
+        forecast.daily_rate = rate.quantize(RATE_PLACES)
+        forecast.folded_through = through
+        forecast.refreshed_at = now
+
+    ConsumptionForecast.objects.bulk_create(created, batch_size=1000)
+    ConsumptionForecast.objects.bulk_update(updated, ['daily_rate', 'folded_through', 'refreshed_at'], batch_size=1000)
+    return len(created), folded, rebuilt
+
+
+def cover(queryset, today=None, within=None):
+    """Days of cover and projected stock-out date per consumable, soonest first.
+
+    ``within`` keeps only items projected to run out within that many days.
+    """
+    today = today or timezone.localdate()
+    items = []
+    rows = queryset.filter(forecast__isnull=False).values(
+        'id', 'item_name', 'unit', 'quantity_on_hand', 'reorder_threshold', 'forecast__daily_rate', 'forecast__folded_through',
+    )
+    for row in rows:
+        rate = Decimal(str(row.pop('forecast__daily_rate')))
+        quantity = Decimal(str(row['quantity_on_hand']))
+        row['daily_rate'] = rate
+        row['as_of'] = row.pop('forecast__folded_through')
+        if rate > 0:
+            days = max(quantity, Decimal('0')) / rate
+            row['days_of_cover'] = days.quantize(Decimal('0.1'))
+            row['stockout_date'] = today + timedelta(days=int(days))
+        else:
+            row['days_of_cover'] = row['stockout_date'] = None
+        if within is not None and (row['days_of_cover'] is None or row['days_of_cover'] > within):
+            continue
+        items.append(row)
+    items.sort(key=lambda row: (row['days_of_cover'] is None, row['days_of_cover'] or 0, row['item_name']))
+    return items
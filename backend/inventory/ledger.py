@@ -0,0 +1,101 @@
+"""
+Consumable stock as an append-only ledger of StockMovement rows.
+
+quantity_on_hand is only ever changed by posting movements through
+inventory.stock, which applies their signed deltas. StockSnapshot stores end-of-day
+balances, so the balance at any date is the latest snapshot on or before it
+plus the movements after the snapshot, never a scan of the whole history.
+A movement dated on or before an existing snapshot drops the snapshots it
+invalidates; the next snapshot run recreates them.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Coalesce
+
+from .models import Consumable, StockMovement, StockSnapshot
+
+QUANTITY = DecimalField(max_digits=12, decimal_places=2)
+ZERO = Decimal('0')
+# Stands in for "before any snapshot" so date comparisons never meet NULL.
+EPOCH = date(1900, 1, 1)
+
+
+def movement_delta(movement):
+    """Signed change a movement makes to the consumable's quantity on hand."""
+    if movement.movement_type in ('IN', 'RETURN'):
+        return movement.quantity
+    if movement.movement_type == 'OUT':
+        return -movement.quantity
+    if movement.movement_type == 'ADJUSTMENT':
+        return movement.quantity
+    return ZERO
+
+
+def delta_expression():
+    """SQL twin of movement_delta()."""
+    return Case(
+        When(movement_type__in=['IN', 'RETURN', 'ADJUSTMENT'], then=F('quantity')),
+        When(movement_type='OUT', then=-F('quantity')),
+        default=Value(ZERO),
+        output_field=QUANTITY,
+    )
+
+
+def with_balance_as_of(queryset, day):
+    """Annotate consumables with ``balance``: their ledger quantity at the end of ``day``."""
+    snapshot = StockSnapshot.objects.filter(consumable=OuterRef('pk'), date__lte=day).order_by('-date')
+    movements = (
+        StockMovement.objects.filter(consumable=OuterRef('pk'), date__gt=OuterRef('snapshot_date'), date__lte=day)
+        .order_by().values('consumable').annotate(total=Sum(delta_expression())).values('total')
+    )
+    return queryset.annotate(
+        snapshot_date=Coalesce(Subquery(snapshot.values('date')[:1]), Value(EPOCH)),
+        snapshot_quantity=Coalesce(Subquery(snapshot.values('quantity')[:1], output_field=QUANTITY), Value(ZERO), output_field=QUANTITY),
+    ).annotate(
+        balance=F('snapshot_quantity') + Coalesce(Subquery(movements, output_field=QUANTITY), Value(ZERO), output_field=QUANTITY),
+    )
+
+
+def take_snapshots(queryset, day):
+    """Store the end-of-``day`` balance of every consumable in ``queryset``. Returns the count."""
+    rows = with_balance_as_of(queryset, day).values_list('pk', 'farm_id', 'balance')
+    snapshots = [
+        StockSnapshot(consumable_id=pk, farm_id=farm_id, date=day, quantity=balance)
+        for pk, farm_id, balance in rows
+    ]
+    StockSnapshot.objects.bulk_create(
+        snapshots, batch_size=1000, update_conflicts=True, unique_fields=['consumable', 'date'], update_fields=['quantity'],
+    )
+    return len(snapshots)
+
+
+def ledger_drift(queryset):
+    """Consumables whose stored quantity_on_hand disagrees with their ledger."""
+    return (
+        with_balance_as_of(queryset, date.max)
+        .annotate(drift=F('quantity_on_hand') - F('balance'))
+        .exclude(drift=0)
+        .order_by('item_name')
+    )
+
+
+def ledger_entries(consumable, date_from, date_to):
+    """Movements of ``consumable`` in the window with the running balance after each."""
+    day_before = date_from - timedelta(days=1)
+    opening = with_balance_as_of(Consumable.objects.filter(pk=consumable.pk), day_before).values_list('balance', flat=True).get()
+    entries = (
+        StockMovement.objects.filter(consumable=consumable, date__range=(date_from, date_to))
+        .annotate(
+            delta=delta_expression(),
+            running=Window(Sum(delta_expression()), order_by=[F('date').asc(), F('created_at').asc(), F('id').asc()]),
+        )
+        .order_by('date', 'created_at', 'id')
+        .values('id', 'date', 'movement_type', 'reason', 'quantity', 'delta', 'running', 'reference', 'recorded_by')
+    )
+    rows = []
+    for entry in entries:
+        entry['balance'] = opening + Decimal(str(entry.pop('running')))
+        rows.append(entry)
+    return {'opening_balance': opening, 'entries': rows, 'closing_balance': rows[-1]['balance'] if rows else opening}
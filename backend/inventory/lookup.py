@@ -0,0 +1,115 @@
+"""
+SKU and barcode lookup for scanning workflows.
+
+A code resolves to at most one tool or consumable of a farm: both tables
+have partial unique indexes on (farm, sku) and (farm, barcode), and saves
+reject a code already used by the other table. One UNION query resolves any
+number of codes. Answers, including misses, are kept in a small
+in-process LRU cache. Local tool and consumable saves clear it (see
+inventory.signals); other worker processes see a change within
+CACHE_SECONDS.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.db.models import CharField, F, Q, Value
+
+from .models import Consumable, Tool
+
+CODE_FIELDS = ('sku', 'barcode')
+CACHE_SIZE = 4096
+CACHE_SECONDS = 60
+MAX_BATCH = 500
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache whose entries also expire."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = LRUCache(CACHE_SIZE, CACHE_SECONDS)
+
+
+def clear_lookup_cache():
+    _cache.clear()
+
+
+def _matching(model, farm_id, codes):
+    return model.objects.filter(farm_id=farm_id).filter(Q(sku__in=codes) | Q(barcode__in=codes))
+
+
+def _query(farm_id, codes):
+    text = CharField()
+    tools = _matching(Tool, farm_id, codes).annotate(
+        kind=Value('tool', output_field=text), label=F('name'), item_unit=Value('', output_field=text),
+    )
+    consumables = _matching(Consumable, farm_id, codes).annotate(
+        kind=Value('consumable', output_field=text), label=F('item_name'), item_unit=F('unit'),
+    )
+    fields = ('id', 'sku', 'barcode', 'kind', 'label', 'item_unit')
+    return tools.values_list(*fields).union(consumables.values_list(*fields), all=True)
+
+
+def lookup_codes(farm_id, codes):
+    """Map each code to its item ({kind, id, name, unit, sku, barcode}) or None."""
+    results = {}
+    misses = []
+    for code in codes:
+        cached = _cache.get((farm_id, code))
+        if cached is _MISSING:
+            misses.append(code)
+        else:
+            results[code] = cached
+    if misses:
+        found = {}
+        for pk, sku, barcode, kind, name, unit in _query(farm_id, misses):
+            item = {'kind': kind, 'id': str(pk), 'name': name, 'unit': unit, 'sku': sku, 'barcode': barcode}
+            for code in (sku, barcode):
+                if code:
+                    found[code] = item
+        for code in misses:
+            results[code] = found.get(code)
+            _cache.set((farm_id, code), results[code])
+    return results
+
+
+def code_in_use(farm_id, code, exclude=None):
+    """Whether another tool or consumable of the farm has ``code`` as its SKU or barcode."""
+    for model in (Tool, Consumable):
+        matches = _matching(model, farm_id, [code])
+        if isinstance(exclude, model):
+            matches = matches.exclude(pk=exclude.pk)
+        if matches.exists():
+            return True
+    return False
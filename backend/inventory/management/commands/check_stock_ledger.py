@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.ledger import ledger_drift
+from inventory.models import Consumable
+from inventory.stock import post_opening_adjustments
+
+
+class Command(BaseCommand):
+    help = 'Report consumables whose quantity_on_hand disagrees with their stock movements.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post-adjustments', action='store_true',
+            help='Post ADJUSTMENT movements so the ledger matches the stored quantities '
+                 '(use once to open balances for stock recorded before the ledger)',
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(ledger_drift(Consumable.objects.all()))
+        for consumable in drifted:
+            self.stdout.write(
+                f'{consumable.item_name} ({consumable.pk}): stored {consumable.quantity_on_hand}, '
+                f'ledger {consumable.balance}, drift {consumable.drift}'
+            )
+        if drifted and options['post_adjustments']:
+            movements = post_opening_adjustments(drifted, timezone.localdate())
+            self.stdout.write(self.style.SUCCESS(f'Posted {len(movements)} reconciling adjustment(s).'))
+        elif not drifted:
+            self.stdout.write(self.style.SUCCESS('Stored quantities match the ledger.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} consumable(s) drift from the ledger.'))
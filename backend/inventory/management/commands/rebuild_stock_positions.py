@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.positions import rebuild_positions
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-warehouse stock positions from the movement ledger (run once after upgrading).'
+
+    def handle(self, *args, **options):
+        count = rebuild_positions()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} stock position(s).'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.forecast import refresh_forecasts
+
+
+class Command(BaseCommand):
+    help = "Fold the days since the last run into every consumable's consumption forecast (run daily)."
+
+    def handle(self, *args, **options):
+        created, folded, rebuilt = refresh_forecasts()
+        self.stdout.write(self.style.SUCCESS(f'Created {created}, updated {folded} and rebuilt {rebuilt} forecast(s).'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.models import Consumable
+from inventory.valuation import refresh_valuation, reset_valuation
+
+
+class Command(BaseCommand):
+    help = 'Value the stock movements posted since the last run (run daily; --revalue rebuilds from the full ledger).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--revalue', action='store_true', help='Discard the stored valuation and rebuild it')
+
+    def handle(self, *args, **options):
+        if options['revalue']:
+            reset_valuation(Consumable.objects.values_list('pk', flat=True))
+        valued, revalued = refresh_valuation()
+        self.stdout.write(self.style.SUCCESS(f'Valued {valued} movement(s); revalued {revalued} backdated item(s).'))
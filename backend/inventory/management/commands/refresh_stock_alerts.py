@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Farm
+from inventory.reorder import refresh_alerts
+
+
+class Command(BaseCommand):
+    help = 'Recompute and cache the low-stock alert set of every farm (run every 15 minutes).'
+
+    def handle(self, *args, **options):
+        total = 0
+        for farm_id in Farm.objects.values_list('id', flat=True):
+            total += refresh_alerts(farm_id)['count']
+        self.stdout.write(self.style.SUCCESS(f'Cached {total} low-stock alert(s).'))
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.tool_usage import rollup_day
+
+
+class Command(BaseCommand):
+    help = 'Store per-category tool utilisation, downtime and overdue maintenance for a day (run daily).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Last day to roll up (YYYY-MM-DD); defaults to yesterday')
+        parser.add_argument('--days', type=int, default=1, help='Number of days up to --date to (re)compute')
+
+    def handle(self, *args, **options):
+        last = timezone.localdate() - timedelta(days=1)
+        if options['date']:
+            last = parse_date(options['date'])
+            if last is None:
+                raise CommandError('--date must use the YYYY-MM-DD format.')
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1.')
+        rows = 0
+        for offset in range(options['days'] - 1, -1, -1):
+            rows += rollup_day(last - timedelta(days=offset))
+        self.stdout.write(self.style.SUCCESS(f"Stored {rows} tool usage row(s) for {options['days']} day(s) up to {last}."))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.ledger import take_snapshots
+from inventory.models import Consumable
+
+
+class Command(BaseCommand):
+    help = 'Store end-of-day ledger balances for every consumable (run daily or at month end).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to snapshot (YYYY-MM-DD); defaults to yesterday')
+
+    def handle(self, *args, **options):
+        day = timezone.localdate() - timedelta(days=1)
+        if options['date']:
+            day = parse_date(options['date'])
+            if day is None:
+                raise CommandError('--date must use the YYYY-MM-DD format.')
+        count = take_snapshots(Consumable.objects.all(), day)
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} stock snapshot(s) for {day}.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.batches import write_off_expired
+
+
+class Command(BaseCommand):
+    help = 'Write off the remaining stock of every lot past its expiry date as OUT/EXPIRED movements (run daily).'
+
+    def handle(self, *args, **options):
+        movements = write_off_expired()
+        self.stdout.write(self.style.SUCCESS(f'Wrote off {len(movements)} expired lot(s).'))
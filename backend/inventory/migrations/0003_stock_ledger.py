@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:11
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0002_consumable_photo_supplier_consumable_supplier_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='reason',
+            field=models.CharField(choices=[('PURCHASE', 'Purchase'), ('USAGE', 'Usage'), ('DAMAGE', 'Damage/Loss'), ('EXPIRED', 'Expired'), ('DONATION', 'Donation'), ('SALE', 'Sale'), ('TRANSFER', 'Transfer'), ('CORRECTION', 'Correction'), ('OTHER', 'Other')], default='USAGE', max_length=15),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['consumable', 'date'], name='inventory_s_consuma_26ffdb_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='consumable',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.consumable'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='farm',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='core.farm'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stocksnapshot',
+            unique_together={('consumable', 'date')},
+        ),
+    ]
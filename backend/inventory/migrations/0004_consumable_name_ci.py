@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:14
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0003_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consumable',
+            index=models.Index(models.F('farm'), django.db.models.functions.text.Lower('item_name'), name='inventory_consumable_name_ci'),
+        ),
+    ]
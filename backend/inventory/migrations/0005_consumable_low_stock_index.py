@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0004_consumable_name_ci'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consumable',
+            index=models.Index(condition=models.Q(('quantity_on_hand__lte', models.F('reorder_threshold')), ('reorder_threshold__gt', 0)), fields=['farm', 'supplier'], name='inventory_consumable_low'),
+        ),
+    ]
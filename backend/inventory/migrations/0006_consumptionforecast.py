@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:16
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0005_consumable_low_stock_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumptionForecast',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('daily_rate', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('folded_through', models.DateField(help_text='Last day of usage folded into daily_rate')),
+                ('refreshed_at', models.DateTimeField()),
+                ('consumable', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='inventory.consumable')),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumption_forecasts', to='core.farm')),
+            ],
+        ),
+    ]
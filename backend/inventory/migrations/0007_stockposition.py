@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:19
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0006_consumptionforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockPosition',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('consumable', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='inventory.consumable')),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_positions', to='core.farm')),
+                ('tool', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='inventory.tool')),
+                ('warehouse', models.ForeignKey(blank=True, help_text='Empty for stock not assigned to a warehouse', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='inventory.warehouse')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['farm', 'warehouse'], name='inventory_s_farm_id_278a23_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('consumable__isnull', False), ('warehouse__isnull', False)), fields=('consumable', 'warehouse'), name='unique_consumable_position'), models.UniqueConstraint(condition=models.Q(('consumable__isnull', False), ('warehouse__isnull', True)), fields=('consumable',), name='unique_consumable_unassigned_position'), models.UniqueConstraint(condition=models.Q(('tool__isnull', False), ('warehouse__isnull', False)), fields=('tool', 'warehouse'), name='unique_tool_position'), models.UniqueConstraint(condition=models.Q(('tool__isnull', False), ('warehouse__isnull', True)), fields=('tool',), name='unique_tool_unassigned_position')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:21
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0007_stockposition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockTake',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(help_text='Day the stock was counted')),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('COMMITTED', 'Committed'), ('CANCELLED', 'Cancelled')], default='OPEN', max_length=10)),
+                ('counted_by', models.CharField(blank=True, max_length=100)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('committed_at', models.DateTimeField(blank=True, null=True)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_takes', to='core.farm')),
+            ],
+            options={
+                'ordering': ['-date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockTakeLine',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('counted_quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('expected_quantity', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('variance', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('counted_at', models.DateTimeField(auto_now=True)),
+                ('consumable', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_take_lines', to='inventory.consumable')),
+                ('movement', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_take_line', to='inventory.stockmovement')),
+                ('stock_take', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.stocktake')),
+                ('tool', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_take_lines', to='inventory.tool')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('consumable__isnull', False)), fields=('stock_take', 'consumable'), name='unique_stock_take_consumable'), models.UniqueConstraint(condition=models.Q(('tool__isnull', False)), fields=('stock_take', 'tool'), name='unique_stock_take_tool')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:24
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0008_stocktake'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumable',
+            name='costing_method',
+            field=models.CharField(choices=[('FIFO', 'First in, first out'), ('AVERAGE', 'Weighted average')], default='FIFO', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text="Purchase cost per unit of incoming stock; defaults to the consumable's unit price", max_digits=12, null=True),
+        ),
+        migrations.CreateModel(
+            name='ValuationState',
+            fields=[
+                ('consumable', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='valuation', serialize=False, to='inventory.consumable')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('last_date', models.DateField(help_text='Date of the latest movement folded in')),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_states', to='core.farm')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=12)),
+                ('remaining', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('consumable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.consumable')),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='core.farm')),
+                ('movement', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layer', to='inventory.stockmovement')),
+            ],
+            options={
+                'ordering': ['date', 'movement__created_at'],
+                'indexes': [models.Index(fields=['consumable', 'date'], name='inventory_c_consuma_943d46_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ValuationEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('consumable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_entries', to='inventory.consumable')),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_entries', to='core.farm')),
+                ('movement', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_entry', to='inventory.stockmovement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['farm', 'date'], name='inventory_v_farm_id_57819e_idx'), models.Index(fields=['consumable', 'date'], name='inventory_v_consuma_db8bd9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0009_valuation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('lot_number', models.CharField(max_length=50)),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('received_date', models.DateField()),
+                ('quantity_remaining', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('consumable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batches', to='inventory.consumable')),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_batches', to='core.farm')),
+            ],
+            options={
+                'ordering': ['expiry_date', 'received_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BatchAllocation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_allocations', to='inventory.stockmovement')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='inventory.stockbatch')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='batch',
+            field=models.ForeignKey(blank=True, help_text='Lot received, or the lot to draw from instead of first-expiry-first-out', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='inventory.stockbatch'),
+        ),
+        migrations.AddIndex(
+            model_name='stockbatch',
+            index=models.Index(condition=models.Q(('quantity_remaining__gt', 0)), fields=['farm', 'expiry_date'], name='inventory_batch_open_expiry'),
+        ),
+        migrations.AddIndex(
+            model_name='stockbatch',
+            index=models.Index(condition=models.Q(('quantity_remaining__gt', 0)), fields=['consumable', 'expiry_date'], name='inventory_batch_open_fefo'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockbatch',
+            constraint=models.UniqueConstraint(fields=('consumable', 'lot_number'), name='unique_consumable_lot'),
+        ),
+    ]
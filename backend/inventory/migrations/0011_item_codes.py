@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:27
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def suffix_duplicate_skus(apps, schema_editor):
+    # SKUs become unique per farm; keep the oldest item's code and number the rest.
+    for model_name in ('Tool', 'Consumable'):
+        model = apps.get_model('inventory', model_name)
+        duplicated = model.objects.exclude(sku='').values('farm_id', 'sku').annotate(n=Count('id')).filter(n__gt=1)
+        for row in duplicated:
+            items = model.objects.filter(farm_id=row['farm_id'], sku=row['sku']).order_by('created_at')
+            for number, item in enumerate(items[1:], start=2):
+                item.sku = f"{row['sku'][:45]}-{number}"
+                item.save(update_fields=['sku'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0010_stock_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumable',
+            name='barcode',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='barcode',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(suffix_duplicate_skus, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='consumable',
+            constraint=models.UniqueConstraint(condition=models.Q(('sku', ''), _negated=True), fields=('farm', 'sku'), name='unique_consumable_sku_per_farm'),
+        ),
+        migrations.AddConstraint(
+            model_name='consumable',
+            constraint=models.UniqueConstraint(condition=models.Q(('barcode', ''), _negated=True), fields=('farm', 'barcode'), name='unique_consumable_barcode_per_farm'),
+        ),
+        migrations.AddConstraint(
+            model_name='tool',
+            constraint=models.UniqueConstraint(condition=models.Q(('sku', ''), _negated=True), fields=('farm', 'sku'), name='unique_tool_sku_per_farm'),
+        ),
+        migrations.AddConstraint(
+            model_name='tool',
+            constraint=models.UniqueConstraint(condition=models.Q(('barcode', ''), _negated=True), fields=('farm', 'barcode'), name='unique_tool_barcode_per_farm'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:29
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weatherobservation'),
+        ('inventory', '0011_item_codes'),
+        ('workforce', '0003_worker_contract_end_date_worker_email_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ToolCheckout',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('checked_out_at', models.DateTimeField()),
+                ('due_back_at', models.DateTimeField(blank=True, null=True)),
+                ('checked_in_at', models.DateTimeField(blank=True, null=True)),
+                ('condition_on_return', models.CharField(blank=True, choices=[('NEW', 'New'), ('GOOD', 'Good'), ('NEEDS_REPAIR', 'Needs Repair'), ('BROKEN', 'Broken')], max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tool_checkouts', to='core.farm')),
+                ('tool', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkouts', to='inventory.tool')),
+                ('worker', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tool_checkouts', to='workforce.worker')),
+            ],
+            options={
+                'ordering': ['-checked_out_at'],
+                'indexes': [models.Index(fields=['tool', 'checked_out_at'], name='inventory_t_tool_id_f2fa8d_idx'), models.Index(condition=models.Q(('checked_in_at__isnull', True)), fields=['farm', 'tool'], name='inventory_checkout_open')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ToolMaintenance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('task', models.CharField(help_text='e.g. Oil change, Blade sharpening', max_length=255)),
+                ('due_date', models.DateField()),
+                ('interval_days', models.PositiveIntegerField(blank=True, help_text='Repeat this many days after completion', null=True)),
+                ('started_on', models.DateField(blank=True, help_text='Day the tool was taken out of service', null=True)),
+                ('completed_on', models.DateField(blank=True, null=True)),
+                ('cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tool_maintenance', to='core.farm')),
+                ('tool', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='maintenance', to='inventory.tool')),
+            ],
+            options={
+                'ordering': ['due_date'],
+                'indexes': [models.Index(condition=models.Q(('completed_on__isnull', True)), fields=['farm', 'due_date'], name='inventory_maintenance_open'), models.Index(fields=['tool', 'started_on'], name='inventory_t_tool_id_cd1a9f_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ToolUsageDaily',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=100)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('busy_units', models.PositiveIntegerField(default=0, help_text='Units checked out at some point of the day')),
+                ('down_units', models.PositiveIntegerField(default=0, help_text='Units out of service for maintenance')),
+                ('overdue_tasks', models.PositiveIntegerField(default=0)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tool_usage', to='core.farm')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('farm', 'date', 'category'), name='unique_tool_usage_day')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 import uuid
 from core.models import Farm
 
@@ -50,6 +51,7 @@ class Tool(models.Model):
     name = models.CharField(max_length=100)
     category = models.CharField(max_length=100, help_text="e.g. Waterpump, Slasher, Axe")
     sku = models.CharField(max_length=50, blank=True)
+    barcode = models.CharField(max_length=64, blank=True)
     quantity = models.PositiveIntegerField(default=1)
     condition = models.CharField(max_length=20, choices=Condition.choices, default=Condition.GOOD)
     location = models.CharField(max_length=100, blank=True, help_text="e.g. Barn, Field, Store")
@@ -60,31 +62,65 @@ class Tool(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Scanned codes resolve through these (see inventory.lookup).
+        constraints = [
+            models.UniqueConstraint(fields=['farm', 'sku'], condition=~models.Q(sku=''), name='unique_tool_sku_per_farm'),
+            models.UniqueConstraint(fields=['farm', 'barcode'], condition=~models.Q(barcode=''), name='unique_tool_barcode_per_farm'),
+        ]
+
     def __str__(self):
         return self.name
 
 
 class Consumable(models.Model):
+    class CostingMethod(models.TextChoices):
+        FIFO = 'FIFO', 'First in, first out'
+        AVERAGE = 'AVERAGE', 'Weighted average'
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='consumables')
     warehouse = models.ForeignKey(Warehouse, on_delete=models.SET_NULL, null=True, blank=True, related_name='consumables')
     supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='consumables_supplied')
     item_name = models.CharField(max_length=100)
     sku = models.CharField(max_length=50, blank=True)
+    barcode = models.CharField(max_length=64, blank=True)
     unit = models.CharField(max_length=20, help_text="e.g. kg, liter, pack")
     quantity_on_hand = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     reorder_threshold = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    costing_method = models.CharField(max_length=10, choices=CostingMethod.choices, default=CostingMethod.FIFO)
     photo = models.ImageField(upload_to='inventory/consumables/', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farm', 'sku'], condition=~models.Q(sku=''), name='unique_consumable_sku_per_farm'),
+            models.UniqueConstraint(fields=['farm', 'barcode'], condition=~models.Q(barcode=''), name='unique_consumable_barcode_per_farm'),
+        ]
+        indexes = [
+            # Serves case-insensitive name matching (commerce.product_stock).
+            models.Index('farm', Lower('item_name'), name='inventory_consumable_name_ci'),
+            # Partial index holding only the items at or below their reorder threshold.
+            models.Index(
+                fields=['farm', 'supplier'],
+                name='inventory_consumable_low',
+                condition=models.Q(reorder_threshold__gt=0, quantity_on_hand__lte=models.F('reorder_threshold')),
+            ),
+        ]
+
     def __str__(self):
         return self.item_name
 
 
 class StockMovement(models.Model):
-    """Track stock in/out for consumables and tools."""
+    """Track stock in/out for consumables and tools.
+
+    Movements are append-only: Consumable.quantity_on_hand is the sum of its
+    movements (see inventory.ledger). IN and RETURN add stock, OUT removes it,
+    ADJUSTMENT quantities are signed and TRANSFER leaves the total unchanged.
+    """
 
     MOVEMENT_CHOICES = [
         ('IN', 'Stock In'),
@@ -100,6 +136,7 @@ class StockMovement(models.Model):
         ('DAMAGE', 'Damage/Loss'),
         ('EXPIRED', 'Expired'),
         ('DONATION', 'Donation'),
+        ('SALE', 'Sale'),
         ('TRANSFER', 'Transfer'),
         ('CORRECTION', 'Correction'),
         ('OTHER', 'Other'),
@@ -116,13 +153,306 @@ class StockMovement(models.Model):
     from_warehouse = models.ForeignKey(Warehouse, on_delete=models.SET_NULL, null=True, blank=True, related_name='outgoing_movements')
     to_warehouse = models.ForeignKey(Warehouse, on_delete=models.SET_NULL, null=True, blank=True, related_name='incoming_movements')
     reference = models.CharField(max_length=100, blank=True, help_text="Invoice/receipt number")
+    unit_cost = models.DecimalField(
+        max_digits=12, decimal_places=4, null=True, blank=True,
+        help_text="Purchase cost per unit of incoming stock; defaults to the consumable's unit price",
+    )
+    batch = models.ForeignKey(
+        'StockBatch', on_delete=models.PROTECT, null=True, blank=True, related_name='movements',
+        help_text="Lot received, or the lot to draw from instead of first-expiry-first-out",
+    )
     notes = models.TextField(blank=True)
     recorded_by = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['consumable', 'date']),
+        ]
 
     def __str__(self):
         item = self.consumable or self.tool
         return f"{self.get_movement_type_display()}: {item} ({self.quantity})"
+
+
+class StockSnapshot(models.Model):
+    """A consumable's ledger balance at the end of a day."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='stock_snapshots')
+    consumable = models.ForeignKey(Consumable, on_delete=models.CASCADE, related_name='snapshots')
+    date = models.DateField()
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['consumable', 'date']
+
+    def __str__(self):
+        return f"{self.consumable} on {self.date}: {self.quantity}"
+
+
+class ConsumptionForecast(models.Model):
+    """Smoothed daily consumption of a consumable (see inventory.forecast)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='consumption_forecasts')
+    consumable = models.OneToOneField(Consumable, on_delete=models.CASCADE, related_name='forecast')
+    daily_rate = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    folded_through = models.DateField(help_text="Last day of usage folded into daily_rate")
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.consumable}: {self.daily_rate}/day"
+
+
+class StockPosition(models.Model):
+    """Quantity of one consumable or tool held at one warehouse (see inventory.positions)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='stock_positions')
+    consumable = models.ForeignKey(Consumable, on_delete=models.CASCADE, null=True, blank=True, related_name='positions')
+    tool = models.ForeignKey(Tool, on_delete=models.CASCADE, null=True, blank=True, related_name='positions')
+    warehouse = models.ForeignKey(
+        Warehouse, on_delete=models.CASCADE, null=True, blank=True, related_name='positions',
+        help_text="Empty for stock not assigned to a warehouse",
+    )
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['consumable', 'warehouse'], name='unique_consumable_position',
+                                    condition=models.Q(consumable__isnull=False, warehouse__isnull=False)),
+            models.UniqueConstraint(fields=['consumable'], name='unique_consumable_unassigned_position',
+                                    condition=models.Q(consumable__isnull=False, warehouse__isnull=True)),
+            models.UniqueConstraint(fields=['tool', 'warehouse'], name='unique_tool_position',
+                                    condition=models.Q(tool__isnull=False, warehouse__isnull=False)),
+            models.UniqueConstraint(fields=['tool'], name='unique_tool_unassigned_position',
+                                    condition=models.Q(tool__isnull=False, warehouse__isnull=True)),
+        ]
+        indexes = [
+            models.Index(fields=['farm', 'warehouse']),
+        ]
+
+    def __str__(self):
+        return f"{self.consumable or self.tool} @ {self.warehouse or 'unassigned'}: {self.quantity}"
+
+
+class StockTake(models.Model):
+    """A physical count session; committing it posts the variances as adjustments (see inventory.stocktake)."""
+
+    class Status(models.TextChoices):
+        OPEN = 'OPEN', 'Open'
+        COMMITTED = 'COMMITTED', 'Committed'
+        CANCELLED = 'CANCELLED', 'Cancelled'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='stock_takes')
+    date = models.DateField(help_text="Day the stock was counted")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.OPEN)
+    counted_by = models.CharField(max_length=100, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    committed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date', '-created_at']
+
+    def __str__(self):
+        return f"Stock-take {self.date} ({self.get_status_display()})"
+
+
+class StockTakeLine(models.Model):
+    """Counted quantity of one item; expected quantity and variance are filled in on commit."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    stock_take = models.ForeignKey(StockTake, on_delete=models.CASCADE, related_name='lines')
+    consumable = models.ForeignKey(Consumable, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_take_lines')
+    tool = models.ForeignKey(Tool, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_take_lines')
+    counted_quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    expected_quantity = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    variance = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    movement = models.OneToOneField(StockMovement, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_take_line')
+    counted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stock_take', 'consumable'], name='unique_stock_take_consumable',
+                                    condition=models.Q(consumable__isnull=False)),
+            models.UniqueConstraint(fields=['stock_take', 'tool'], name='unique_stock_take_tool',
+                                    condition=models.Q(tool__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.consumable or self.tool}: {self.counted_quantity}"
+
+
+class CostLayer(models.Model):
+    """Unconsumed remainder of one incoming movement at its unit cost (FIFO costing)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='cost_layers')
+    consumable = models.ForeignKey(Consumable, on_delete=models.CASCADE, related_name='cost_layers')
+    movement = models.OneToOneField(StockMovement, on_delete=models.CASCADE, related_name='cost_layer')
+    date = models.DateField()
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4)
+    remaining = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ['date', 'movement__created_at']
+        indexes = [
+            models.Index(fields=['consumable', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.consumable}: {self.remaining} @ {self.unit_cost}"
+
+
+class ValuationEntry(models.Model):
+    """Quantity and value one movement added to (positive) or took from (negative) stock."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='valuation_entries')
+    consumable = models.ForeignKey(Consumable, on_delete=models.CASCADE, related_name='valuation_entries')
+    movement = models.OneToOneField(StockMovement, on_delete=models.CASCADE, related_name='valuation_entry')
+    date = models.DateField()
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    value = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['farm', 'date']),
+            models.Index(fields=['consumable', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.consumable} {self.date}: {self.value}"
+
+
+class ValuationState(models.Model):
+    """Valued stock of a consumable after the last movement folded in by inventory.valuation."""
+
+    consumable = models.OneToOneField(Consumable, on_delete=models.CASCADE, primary_key=True, related_name='valuation')
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='valuation_states')
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_date = models.DateField(help_text="Date of the latest movement folded in")
+
+    def __str__(self):
+        return f"{self.consumable}: {self.quantity} worth {self.value}"
+
+
+class StockBatch(models.Model):
+    """A lot of a consumable received together, with its expiry date (see inventory.batches)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='stock_batches')
+    consumable = models.ForeignKey(Consumable, on_delete=models.CASCADE, related_name='batches')
+    lot_number = models.CharField(max_length=50)
+    expiry_date = models.DateField(null=True, blank=True)
+    received_date = models.DateField()
+    quantity_remaining = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['expiry_date', 'received_date']
+        constraints = [
+            models.UniqueConstraint(fields=['consumable', 'lot_number'], name='unique_consumable_lot'),
+        ]
+        indexes = [
+            # Only lots with stock left: expiring-soon lists and the write-off job.
+            models.Index(fields=['farm', 'expiry_date'], name='inventory_batch_open_expiry',
+                         condition=models.Q(quantity_remaining__gt=0)),
+            models.Index(fields=['consumable', 'expiry_date'], name='inventory_batch_open_fefo',
+                         condition=models.Q(quantity_remaining__gt=0)),
+        ]
+
+    def __str__(self):
+        return f"{self.consumable} lot {self.lot_number}"
+
+
+class BatchAllocation(models.Model):
+    """Quantity an outgoing movement drew from one lot."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    movement = models.ForeignKey(StockMovement, on_delete=models.CASCADE, related_name='batch_allocations')
+    batch = models.ForeignKey(StockBatch, on_delete=models.CASCADE, related_name='allocations')
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.quantity} from {self.batch}"
+
+
+class ToolCheckout(models.Model):
+    """A tool handed out to a worker; open until checked back in."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='tool_checkouts')
+    tool = models.ForeignKey(Tool, on_delete=models.CASCADE, related_name='checkouts')
+    worker = models.ForeignKey('workforce.Worker', on_delete=models.SET_NULL, null=True, blank=True, related_name='tool_checkouts')
+    quantity = models.PositiveIntegerField(default=1)
+    checked_out_at = models.DateTimeField()
+    due_back_at = models.DateTimeField(null=True, blank=True)
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    condition_on_return = models.CharField(max_length=20, choices=Tool.Condition.choices, blank=True)
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-checked_out_at']
+        indexes = [
+            models.Index(fields=['tool', 'checked_out_at']),
+            models.Index(fields=['farm', 'tool'], name='inventory_checkout_open', condition=models.Q(checked_in_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.tool} to {self.worker or 'unassigned'} ({self.checked_out_at:%Y-%m-%d})"
+
+
+class ToolMaintenance(models.Model):
+    """A scheduled maintenance task; recurring tasks schedule their next occurrence when completed."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='tool_maintenance')
+    tool = models.ForeignKey(Tool, on_delete=models.CASCADE, related_name='maintenance')
+    task = models.CharField(max_length=255, help_text="e.g. Oil change, Blade sharpening")
+    due_date = models.DateField()
+    interval_days = models.PositiveIntegerField(null=True, blank=True, help_text="Repeat this many days after completion")
+    started_on = models.DateField(null=True, blank=True, help_text="Day the tool was taken out of service")
+    completed_on = models.DateField(null=True, blank=True)
+    cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['farm', 'due_date'], name='inventory_maintenance_open', condition=models.Q(completed_on__isnull=True)),
+            models.Index(fields=['tool', 'started_on']),
+        ]
+
+    def __str__(self):
+        return f"{self.task} for {self.tool} due {self.due_date}"
+
+
+class ToolUsageDaily(models.Model):
+    """Per-category tool fleet figures for one day (see inventory.tool_usage)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='tool_usage')
+    date = models.DateField()
+    category = models.CharField(max_length=100)
+    units = models.PositiveIntegerField(default=0)
+    busy_units = models.PositiveIntegerField(default=0, help_text="Units checked out at some point of the day")
+    down_units = models.PositiveIntegerField(default=0, help_text="Units out of service for maintenance")
+    overdue_tasks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farm', 'date', 'category'], name='unique_tool_usage_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.category} {self.date}"
@@ -0,0 +1,194 @@
+"""
+Per-warehouse stock positions maintained from movements.
+
+A movement moves stock at one or two locations: IN and RETURN add at the
+destination, OUT removes at the source, TRANSFER does both and ADJUSTMENT
+applies its signed quantity wherever it names. A movement without a
+warehouse falls back to the item's own warehouse. Positions are updated
+with F() expressions as movements are posted (see inventory.stock), so
+reading a location's stock is an indexed lookup, never a replay.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Sum, When
+from django.db.models.functions import Coalesce
+
+from .models import Consumable, StockMovement, StockPosition, Tool, Warehouse
+
+INBOUND = ('IN', 'RETURN', 'TRANSFER', 'ADJUSTMENT')
+OUTBOUND = ('OUT', 'TRANSFER')
+
+
+def _item(movement):
+    if movement.consumable_id:
+        return 'consumable', movement.consumable_id
+    if movement.tool_id:
+        return 'tool', movement.tool_id
+    return None
+
+
+def position_legs(movement, home_warehouse_id):
+    """[(warehouse_id, signed quantity)] the movement applies to positions."""
+    kind = movement.movement_type
+    if kind == 'TRANSFER':
+        return [(movement.from_warehouse_id, -movement.quantity), (movement.to_warehouse_id, movement.quantity)]
+    if kind in ('IN', 'RETURN'):
+        return [(movement.to_warehouse_id or home_warehouse_id, movement.quantity)]
+    if kind == 'OUT':
+        return [(movement.from_warehouse_id or home_warehouse_id, -movement.quantity)]
+    if kind == 'ADJUSTMENT':
+        return [(movement.to_warehouse_id or movement.from_warehouse_id or home_warehouse_id, movement.quantity)]
+    return []
+
+
+def _home_warehouses(movements):
+    consumable_ids = {m.consumable_id for m in movements if m.consumable_id}
+    tool_ids = {m.tool_id for m in movements if m.tool_id and not m.consumable_id}
+    homes = {}
+    for pk, warehouse_id in Consumable.objects.filter(pk__in=consumable_ids).values_list('pk', 'warehouse_id'):
+        homes[('consumable', pk)] = warehouse_id
+    for pk, warehouse_id in Tool.objects.filter(pk__in=tool_ids).values_list('pk', 'warehouse_id'):
+        homes[('tool', pk)] = warehouse_id
+    return homes
+
+
+def _position_rows(kind, item_id, warehouse_id):
+    return StockPosition.objects.filter(**{f'{kind}_id': item_id, 'warehouse_id': warehouse_id})
+
+
+def _insufficient(kind, item_id, warehouse_id, quantity):
+    from .stock import InsufficientStock
+
+    available = _position_rows(kind, item_id, warehouse_id).values_list('quantity', flat=True).first() or Decimal('0')
+    warehouse = Warehouse.objects.filter(pk=warehouse_id).values_list('name', flat=True).first() or 'the source'
+    return InsufficientStock({'quantity': f'Only {available} available at {warehouse}; cannot move {quantity}.'})
+
+
+def apply_position_deltas(movements, farm_id=None):
+    """Apply posted movements to StockPosition rows.
+
+    Transfers are guarded: the source must hold the quantity being moved.
+    """
+    homes = _home_warehouses(movements)
+    deltas = defaultdict(Decimal)
+    guarded = defaultdict(Decimal)
+    farms = {}
+    for movement in movements:
+        item = _item(movement)
+        if item is None:
+            continue
+        for warehouse_id, quantity in position_legs(movement, homes.get(item)):
+            key = (*item, warehouse_id)
+            deltas[key] += quantity
+            farms[key] = movement.farm_id or farm_id
+            if movement.movement_type == 'TRANSFER' and quantity < 0:
+                guarded[key] += -quantity
+
+    if not deltas:
+        return
+    from .stock import bulk_increment
+
+    items = defaultdict(set)
+    for kind, item_id, _warehouse_id in deltas:
+        items[kind].add(item_id)
+    existing = {}
+    locked = (
+        StockPosition.objects.filter(Q(consumable_id__in=items['consumable']) | Q(tool_id__in=items['tool']))
+        .order_by('pk').select_for_update()
+    )
+    for pk, consumable_id, tool_id, warehouse_id in locked.values_list('pk', 'consumable_id', 'tool_id', 'warehouse_id'):
+        key = ('consumable', consumable_id, warehouse_id) if consumable_id else ('tool', tool_id, warehouse_id)
+        existing[key] = pk
+
+    for key in sorted(guarded, key=lambda key: tuple(str(part) for part in key)):
+        kind, item_id, warehouse_id = key
+        if not _position_rows(kind, item_id, warehouse_id).filter(quantity__gte=guarded[key]).update(quantity=F('quantity') + deltas[key]):
+            raise _insufficient(kind, item_id, warehouse_id, guarded[key])
+
+    bulk_increment(StockPosition.objects.all(), 'quantity', {
+        existing[key]: delta for key, delta in deltas.items() if key in existing and key not in guarded
+    })
+    missing = [key for key in deltas if key not in existing and key not in guarded]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            StockPosition.objects.bulk_create([
+                StockPosition(farm_id=farms[key], warehouse_id=key[2], quantity=deltas[key], **{f'{key[0]}_id': key[1]})
+                for key in missing
+            ])
+    except IntegrityError:
+        # Another writer created some of the positions first.
+        for kind, item_id, warehouse_id in missing:
+            key = (kind, item_id, warehouse_id)
+            if not _position_rows(kind, item_id, warehouse_id).update(quantity=F('quantity') + deltas[key]):
+                StockPosition.objects.create(farm_id=farms[key], warehouse_id=warehouse_id, quantity=deltas[key], **{f'{kind}_id': item_id})
+
+
+def _leg_totals(movements, location, sign):
+    item_home = Coalesce('consumable__warehouse', 'tool__warehouse')
+    return (
+        movements.annotate(location=location(item_home))
+        .values('farm_id', 'consumable_id', 'tool_id', 'location')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    ), sign
+
+
+@transaction.atomic
+def rebuild_positions(farm=None):
+    """Recompute positions from the movement ledger. Returns the number of positions."""
+    movements = StockMovement.objects.filter(Q(consumable__isnull=False) | Q(tool__isnull=False))
+    positions = StockPosition.objects.all()
+    if farm is not None:
+        movements, positions = movements.filter(farm=farm), positions.filter(farm=farm)
+
+    inbound = _leg_totals(movements.filter(movement_type__in=INBOUND), lambda home: Case(
+        When(movement_type='TRANSFER', then=F('to_warehouse')),
+        When(movement_type='ADJUSTMENT', then=Coalesce('to_warehouse', 'from_warehouse', home)),
+        default=Coalesce('to_warehouse', home),
+    ), 1)
+    outbound = _leg_totals(movements.filter(movement_type__in=OUTBOUND), lambda home: Coalesce('from_warehouse', home), -1)
+
+    totals = defaultdict(Decimal)
+    farms = {}
+    for rows, sign in (inbound, outbound):
+        for row in rows:
+            kind, item_id = ('consumable', row['consumable_id']) if row['consumable_id'] else ('tool', row['tool_id'])
+            key = (kind, item_id, row['location'])
+            totals[key] += sign * Decimal(str(row['total']))
+            farms[key] = row['farm_id']
+
+    positions.delete()
+    StockPosition.objects.bulk_create([
+        StockPosition(farm_id=farms[key], warehouse_id=key[2], quantity=quantity, **{f'{key[0]}_id': key[1]})
+        for key, quantity in totals.items()
+    ], batch_size=1000)
+    return len(totals)
+
+
+def position_matrix(farm):
+    """Warehouse x item quantities from the position table."""
+    warehouses = list(Warehouse.objects.filter(farm=farm).order_by('name').values('id', 'name'))
+    items = {}
+    positions = (
+        StockPosition.objects.filter(farm=farm)
+        .exclude(quantity=0)
+        .values('consumable_id', 'consumable__item_name', 'consumable__unit', 'tool_id', 'tool__name', 'warehouse_id', 'quantity')
+    )
+    for position in positions:
+        if position['consumable_id']:
+            key = ('consumable', position['consumable_id'])
+            name, unit = position['consumable__item_name'], position['consumable__unit']
+        else:
+            key = ('tool', position['tool_id'])
+            name, unit = position['tool__name'], ''
+        row = items.setdefault(key, {'kind': key[0], 'id': key[1], 'name': name, 'unit': unit, 'quantities': {}, 'total': Decimal('0')})
+        row['quantities'][str(position['warehouse_id'] or 'unassigned')] = position['quantity']
+        row['total'] += position['quantity']
+    return {
+        'warehouses': warehouses + [{'id': 'unassigned', 'name': 'Unassigned'}],
+        'items': sorted(items.values(), key=lambda row: (row['kind'], row['name'])),
+    }
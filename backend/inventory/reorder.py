@@ -0,0 +1,102 @@
+"""
+Low-stock alerts and reorder suggestions.
+
+Items at or below their reorder threshold are read through a partial index
+that only holds such rows. The per-farm alert set is cached and refreshed
+by the refresh_stock_alerts job, so dashboards read it without querying.
+Suggestions top each item up to REORDER_TARGET_FACTOR times its threshold
+and are grouped by supplier into draft purchases.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.utils import timezone
+
+from .models import Consumable
+
+CACHE_KEY = 'inventory:stock-alerts:{farm_id}'
+# A little longer than the job interval, so readers never fall through.
+CACHE_TIMEOUT = 20 * 60
+REORDER_TARGET_FACTOR = Decimal('2')
+GENERATED_BY = 'reorder-suggestions'
+NO_SUPPLIER = 'Unassigned supplier'
+
+
+def low_stock(queryset):
+    """Consumables at or below their reorder threshold; matches the partial index predicate."""
+    return queryset.filter(reorder_threshold__gt=0, quantity_on_hand__lte=F('reorder_threshold')).annotate(
+        shortfall=ExpressionWrapper(F('reorder_threshold') - F('quantity_on_hand'), output_field=DecimalField(max_digits=10, decimal_places=2)),
+    )
+
+
+def compute_alerts(farm_id):
+    items = list(
+        low_stock(Consumable.objects.filter(farm_id=farm_id))
+        .order_by('supplier__name', 'item_name')
+        .values(
+            'id', 'item_name', 'sku', 'unit', 'quantity_on_hand', 'reorder_threshold', 'shortfall',
+            'unit_price', 'supplier_id', 'supplier__name', 'warehouse_id',
+        )
+    )
+    return {'computed_at': timezone.now(), 'count': len(items), 'items': items}
+
+
+def refresh_alerts(farm_id):
+    alerts = compute_alerts(farm_id)
+    cache.set(CACHE_KEY.format(farm_id=farm_id), alerts, timeout=CACHE_TIMEOUT)
+    return alerts
+
+
+def stock_alerts(farm_id, fresh=False):
+    """The farm's cached alert set, computed on a cache miss or when ``fresh``."""
+    alerts = None if fresh else cache.get(CACHE_KEY.format(farm_id=farm_id))
+    return alerts if alerts is not None else refresh_alerts(farm_id)
+
+
+def reorder_suggestions(farm_id):
+    """Low items grouped by supplier, with the quantity to order and its estimated cost."""
+    groups = defaultdict(lambda: {'items': [], 'estimated_total': Decimal('0')})
+    for item in compute_alerts(farm_id)['items']:
+        target = item['reorder_threshold'] * REORDER_TARGET_FACTOR
+        quantity = max(target - item['quantity_on_hand'], Decimal('0'))
+        amount = quantity * item['unit_price'] if item['unit_price'] is not None else None
+        group = groups[(item['supplier_id'], item['supplier__name'] or NO_SUPPLIER)]
+        group['items'].append({
+            'consumable': str(item['id']),
+            'item_name': item['item_name'],
+            'sku': item['sku'],
+            'unit': item['unit'],
+            'quantity': str(quantity),
+            'unit_price': None if item['unit_price'] is None else str(item['unit_price']),
+            'amount': None if amount is None else str(amount.quantize(Decimal('0.01'))),
+        })
+        group['estimated_total'] += amount or 0
+    return [
+        {'supplier_id': supplier_id, 'supplier': name, **group}
+        for (supplier_id, name), group in sorted(groups.items(), key=lambda entry: entry[0][1])
+    ]
+
+
+@transaction.atomic
+def create_draft_purchases(farm):
+    """Replace the farm's generated draft purchases with one per supplier. Returns them."""
+    from commerce.models import Purchase
+
+    Purchase.objects.filter(farm=farm, status=Purchase.Status.DRAFT, custom_data__generated_by=GENERATED_BY).delete()
+    today = timezone.localdate()
+    drafts = [
+        Purchase(
+            farm=farm,
+            date=today,
+            supplier=suggestion['supplier'],
+            items=suggestion['items'],
+            total_amount=suggestion['estimated_total'].quantize(Decimal('0.01')),
+            status=Purchase.Status.DRAFT,
+            custom_data={'generated_by': GENERATED_BY, 'supplier_id': str(suggestion['supplier_id'] or '')},
+        )
+        for suggestion in reorder_suggestions(farm.id)
+    ]
+    return Purchase.objects.bulk_create(drafts)
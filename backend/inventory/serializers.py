@@ -1,6 +1,18 @@
 from rest_framework import serializers
 
-from .models import Consumable, StockMovement, Supplier, Tool, Warehouse
+from .models import (
+    Consumable,
+    StockBatch,
+    StockMovement,
+    StockPosition,
+    StockTake,
+    StockTakeLine,
+    Supplier,
+    Tool,
+    ToolCheckout,
+    ToolMaintenance,
+    Warehouse,
+)
 
 
 class WarehouseSerializer(serializers.ModelSerializer):
@@ -30,9 +42,118 @@ class ConsumableSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['farm']
 
+    def validate_quantity_on_hand(self, value):
+        # The opening quantity is posted as a movement; afterwards only movements change it.
+        if self.instance is not None and value != self.instance.quantity_on_hand:
+            raise serializers.ValidationError('Record a stock movement to change the quantity on hand.')
+        return value
+
 
 class StockMovementSerializer(serializers.ModelSerializer):
+    lot_number = serializers.CharField(max_length=50, write_only=True, required=False, allow_blank=True,
+                                       help_text="Receive into this lot, creating it on first receipt")
+    expiry_date = serializers.DateField(write_only=True, required=False, allow_null=True)
+
     class Meta:
         model = StockMovement
         fields = '__all__'
         read_only_fields = ['farm']
+
+    def validate(self, attrs):
+        quantity = attrs.get('quantity')
+        if attrs.get('movement_type') == 'ADJUSTMENT':
+            if quantity == 0:
+                raise serializers.ValidationError({'quantity': 'An adjustment must change the quantity.'})
+        elif quantity is not None and quantity <= 0:
+            raise serializers.ValidationError({'quantity': 'Must be positive; only adjustments are signed.'})
+        if attrs.get('lot_number'):
+            if attrs.get('batch'):
+                raise serializers.ValidationError({'lot_number': 'Give either a batch or a lot number, not both.'})
+            if not attrs.get('consumable') or attrs.get('movement_type') not in ('IN', 'RETURN', 'ADJUSTMENT'):
+                raise serializers.ValidationError({'lot_number': 'Only stock received into a consumable can start a lot.'})
+        if attrs.get('batch') and attrs['batch'].consumable_id != getattr(attrs.get('consumable'), 'pk', None):
+            raise serializers.ValidationError({'batch': 'Belongs to a different consumable.'})
+        if attrs.get('unit_cost') is not None and attrs['unit_cost'] < 0:
+            raise serializers.ValidationError({'unit_cost': 'Cannot be negative.'})
+        if attrs.get('movement_type') == 'TRANSFER':
+            if not attrs.get('from_warehouse') or not attrs.get('to_warehouse'):
+                raise serializers.ValidationError({'to_warehouse': 'A transfer needs both a source and a destination warehouse.'})
+            if attrs['from_warehouse'] == attrs['to_warehouse']:
+                raise serializers.ValidationError({'to_warehouse': 'Must differ from the source warehouse.'})
+        return attrs
+
+
+class StockPositionSerializer(serializers.ModelSerializer):
+    consumable_name = serializers.CharField(source='consumable.item_name', read_only=True, default=None)
+    tool_name = serializers.CharField(source='tool.name', read_only=True, default=None)
+    warehouse_name = serializers.CharField(source='warehouse.name', read_only=True, default=None)
+
+    class Meta:
+        model = StockPosition
+        fields = '__all__'
+
+
+class StockTakeLineSerializer(serializers.ModelSerializer):
+    consumable_name = serializers.CharField(source='consumable.item_name', read_only=True, default=None)
+    tool_name = serializers.CharField(source='tool.name', read_only=True, default=None)
+
+    class Meta:
+        model = StockTakeLine
+        exclude = ['stock_take']
+
+
+class StockTakeSerializer(serializers.ModelSerializer):
+    lines = StockTakeLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = StockTake
+        fields = '__all__'
+        read_only_fields = ['farm', 'status', 'committed_at']
+
+
+class StockTakeCountSerializer(serializers.Serializer):
+    """One counted item; ids are checked against the farm in bulk by record_counts()."""
+
+    consumable = serializers.UUIDField(required=False, allow_null=True)
+    tool = serializers.UUIDField(required=False, allow_null=True)
+    counted_quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+
+
+class StockBatchSerializer(serializers.ModelSerializer):
+    consumable_name = serializers.CharField(source='consumable.item_name', read_only=True)
+
+    class Meta:
+        model = StockBatch
+        fields = '__all__'
+
+
+class ToolCheckoutSerializer(serializers.ModelSerializer):
+    tool_name = serializers.CharField(source='tool.name', read_only=True)
+    worker_name = serializers.CharField(source='worker.full_name', read_only=True, default=None)
+
+    class Meta:
+        model = ToolCheckout
+        fields = '__all__'
+        read_only_fields = ['farm', 'checked_in_at', 'condition_on_return']
+        extra_kwargs = {'checked_out_at': {'required': False}}
+
+    def validate_quantity(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Check out at least one unit.')
+        return value
+
+
+class ToolMaintenanceSerializer(serializers.ModelSerializer):
+    tool_name = serializers.CharField(source='tool.name', read_only=True)
+
+    class Meta:
+        model = ToolMaintenance
+        fields = '__all__'
+        read_only_fields = ['farm']
+
+    def validate(self, attrs):
+        started_on = attrs.get('started_on', getattr(self.instance, 'started_on', None))
+        completed_on = attrs.get('completed_on', getattr(self.instance, 'completed_on', None))
+        if started_on and completed_on and completed_on < started_on:
+            raise serializers.ValidationError({'completed_on': 'Must be on or after started_on.'})
+        return attrs
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .lookup import clear_lookup_cache
+from .models import Consumable, Tool
+
+
+@receiver(post_save, sender=Tool)
+@receiver(post_delete, sender=Tool)
+@receiver(post_save, sender=Consumable)
+@receiver(post_delete, sender=Consumable)
+def invalidate_code_lookup(sender, instance, **kwargs):
+    clear_lookup_cache()
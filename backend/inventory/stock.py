@@ -0,0 +1,163 @@
+"""
+The single place consumable stock is changed.
+
+Sales, stock movements, crop inputs and stock-takes all post StockMovement
+rows through post_movements(), which applies the net change per consumable
+as ``UPDATE ... SET quantity_on_hand = quantity_on_hand + delta``. The
+database does the arithmetic, so concurrent writers cannot lose each
+other's updates. With the non-negative guard the decrement also carries
+``WHERE quantity_on_hand >= amount``; a row that fails the guard aborts
+the whole transaction with InsufficientStock. The same postings keep the
+per-warehouse StockPosition rows and lot balances current (see
+inventory.positions and inventory.batches).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .batches import allocate_batches
+from .ledger import movement_delta
+from .models import Consumable, StockMovement, StockSnapshot
+from .positions import apply_position_deltas
+
+
+class InsufficientStock(ValidationError):
+    """A movement would take a consumable below zero while the guard is on."""
+
+
+def prevent_negative_default():
+    return getattr(settings, 'INVENTORY_PREVENT_NEGATIVE_STOCK', False)
+
+
+def apply_delta(consumable_id, delta, prevent_negative=None):
+    """Add ``delta`` to the consumable's quantity_on_hand in one UPDATE."""
+    if prevent_negative is None:
+        prevent_negative = prevent_negative_default()
+    if not delta:
+        return
+    rows = Consumable.objects.filter(pk=consumable_id)
+    if prevent_negative and delta < 0:
+        rows = rows.filter(quantity_on_hand__gte=-delta)
+    updated = rows.update(quantity_on_hand=F('quantity_on_hand') + delta, updated_at=timezone.now())
+    if not updated:
+        consumable = Consumable.objects.filter(pk=consumable_id).values('item_name', 'unit', 'quantity_on_hand').first()
+        if consumable is None:
+            raise ValidationError({'consumable': 'Consumable not found.'})
+        raise InsufficientStock({
+            'quantity': f"Only {consumable['quantity_on_hand']} {consumable['unit']} of {consumable['item_name']} in stock.",
+        })
+
+
+def bulk_increment(queryset, field, deltas, **extra):
+    """Add ``deltas`` ({pk: delta}) to ``field`` of the matching rows in one UPDATE."""
+    if not deltas:
+        return 0
+    increment = Case(
+        *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+        default=Value(Decimal('0')),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    return queryset.filter(pk__in=list(deltas)).update(**{field: F(field) + increment}, **extra)
+
+
+def apply_deltas(deltas, prevent_negative=None):
+    """Apply {consumable_id: delta} in a constant number of queries.
+
+    The rows are locked in primary-key order first, so concurrent postings
+    touching several items cannot deadlock. Guarded decrements still run one
+    UPDATE each so the failing consumable can be named.
+    """
+    if prevent_negative is None:
+        prevent_negative = prevent_negative_default()
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if len(deltas) == 1:
+        ((consumable_id, delta),) = deltas.items()
+        return apply_delta(consumable_id, delta, prevent_negative=prevent_negative)
+    if not deltas:
+        return
+    list(Consumable.objects.filter(pk__in=list(deltas)).order_by('pk').select_for_update().values_list('pk'))
+    guarded = {pk for pk, delta in deltas.items() if prevent_negative and delta < 0}
+    for consumable_id in sorted(guarded, key=str):
+        apply_delta(consumable_id, deltas[consumable_id], prevent_negative=True)
+    free = {pk: delta for pk, delta in deltas.items() if pk not in guarded}
+    if bulk_increment(Consumable.objects.all(), 'quantity_on_hand', free, updated_at=timezone.now()) != len(free):
+        raise ValidationError({'consumable': 'Consumable not found.'})
+
+
+@transaction.atomic
+def post_movements(movements, prevent_negative=None):
+    """Append ``movements`` to the ledger and apply them to quantity_on_hand.
+
+    Unsaved instances are bulk-created; saved ones are only applied. The
+    number of queries does not grow with the number of items.
+    """
+    new = [movement for movement in movements if movement._state.adding]
+    if new:
+        StockMovement.objects.bulk_create(new)
+
+    deltas = defaultdict(Decimal)
+    earliest = {}
+    for movement in movements:
+        if movement.consumable_id is None:
+            continue
+        deltas[movement.consumable_id] += movement_delta(movement)
+        earliest[movement.consumable_id] = min(movement.date, earliest.get(movement.consumable_id, movement.date))
+    apply_deltas(deltas, prevent_negative=prevent_negative)
+    apply_position_deltas(movements)
+    allocate_batches(movements)
+
+    stale = Q()
+    for consumable_id, day in earliest.items():
+        stale |= Q(consumable_id=consumable_id, date__gte=day)
+    if stale:
+        StockSnapshot.objects.filter(stale).delete()
+    return movements
+
+
+def record_sale(sale, consumable_id, warehouse_id=None, prevent_negative=None):
+    """Draw a sale's quantity from stock as an OUT/SALE movement."""
+    movement = StockMovement(
+        farm_id=sale.farm_id,
+        consumable_id=consumable_id,
+        movement_type='OUT',
+        reason='SALE',
+        quantity=sale.quantity,
+        date=sale.date,
+        from_warehouse_id=warehouse_id,
+        reference=f'Sale {sale.pk}',
+    )
+    post_movements([movement], prevent_negative=prevent_negative)
+    return movement
+
+
+@transaction.atomic
+def post_opening_adjustments(drifted, day):
+    """Post ADJUSTMENT movements so the ledger catches up with stored quantities.
+
+    ``drifted`` are consumables annotated with ``drift`` (see
+    inventory.ledger.ledger_drift). Each is first wound back to its ledger
+    balance, then the adjustment is posted like any other movement, so
+    quantity_on_hand ends where it was while positions, lots and snapshots
+    follow the new movement.
+    """
+    deltas = {consumable.pk: consumable.drift for consumable in drifted}
+    list(Consumable.objects.filter(pk__in=list(deltas)).order_by('pk').select_for_update().values_list('pk'))
+    bulk_increment(Consumable.objects.all(), 'quantity_on_hand', {pk: -drift for pk, drift in deltas.items()})
+    movements = [
+        StockMovement(
+            farm_id=consumable.farm_id,
+            consumable=consumable,
+            movement_type='ADJUSTMENT',
+            reason='CORRECTION',
+            quantity=consumable.drift,
+            date=day,
+            reference='Ledger reconciliation',
+        )
+        for consumable in drifted
+    ]
+    return post_movements(movements, prevent_negative=False)
@@ -0,0 +1,123 @@
+"""
+Bulk stock-takes.
+
+Counters submit counted quantities to an open StockTake in batches; a later
+count of the same item replaces the earlier one. Committing compares every
+count with the ledger balance on the count date (consumables) or the
+recorded quantity (tools) and posts the differences as ADJUSTMENT/CORRECTION
+movements through post_movements() in one transaction. Both steps run a
+fixed number of queries however many items were counted.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .ledger import with_balance_as_of
+from .models import Consumable, StockMovement, StockTake, StockTakeLine, Tool
+from .stock import post_movements
+
+ITEM_FIELDS = ('consumable', 'tool')
+
+
+def _require_open(stock_take):
+    if stock_take.status != StockTake.Status.OPEN:
+        raise ValidationError({'status': f'This stock-take is {stock_take.get_status_display().lower()}.'})
+
+
+def _item_of(count):
+    items = [(field, count[field]) for field in ITEM_FIELDS if count.get(field)]
+    if len(items) != 1:
+        raise ValidationError({'counts': 'Each count needs exactly one of consumable or tool.'})
+    return items[0]
+
+
+@transaction.atomic
+def record_counts(stock_take, counts):
+    """Upsert ``counts`` ([{consumable|tool, counted_quantity}]) into the session's lines."""
+    stock_take = StockTake.objects.select_for_update().get(pk=stock_take.pk)
+    _require_open(stock_take)
+
+    latest = {}
+    for count in counts:
+        latest[_item_of(count)] = count['counted_quantity']
+
+    requested = {field: {item_id for (kind, item_id) in latest if kind == field} for field in ITEM_FIELDS}
+    known = {
+        'consumable': set(Consumable.objects.filter(farm_id=stock_take.farm_id, pk__in=requested['consumable']).values_list('pk', flat=True)),
+        'tool': set(Tool.objects.filter(farm_id=stock_take.farm_id, pk__in=requested['tool']).values_list('pk', flat=True)),
+    }
+    for field in ITEM_FIELDS:
+        unknown = requested[field] - known[field]
+        if unknown:
+            raise ValidationError({'counts': f'Unknown {field} for the current farm: {", ".join(sorted(map(str, unknown)))}.'})
+    for (kind, item_id), quantity in latest.items():
+        if kind == 'tool' and quantity != quantity.to_integral_value():
+            raise ValidationError({'counts': f'Tool {item_id} must be counted in whole units.'})
+
+    lines = {
+        ('consumable', line.consumable_id) if line.consumable_id else ('tool', line.tool_id): line
+        for line in stock_take.lines.filter(Q(consumable_id__in=requested['consumable']) | Q(tool_id__in=requested['tool']))
+    }
+    now = timezone.now()
+    changed, new = [], []
+    for (kind, item_id), quantity in latest.items():
+        line = lines.get((kind, item_id))
+        if line is None:
+            new.append(StockTakeLine(stock_take=stock_take, counted_quantity=quantity, **{f'{kind}_id': item_id}))
+        else:
+            line.counted_quantity, line.counted_at = quantity, now
+            changed.append(line)
+    StockTakeLine.objects.bulk_update(changed, ['counted_quantity', 'counted_at'], batch_size=500)
+    StockTakeLine.objects.bulk_create(new, batch_size=500)
+    return len(latest)
+
+
+@transaction.atomic
+def commit_stock_take(stock_take, recorded_by=''):
+    """Post the variances of an open stock-take and close it. Returns the movements posted."""
+    stock_take = StockTake.objects.select_for_update().get(pk=stock_take.pk)
+    _require_open(stock_take)
+
+    lines = list(stock_take.lines.all())
+    consumable_ids = [line.consumable_id for line in lines if line.consumable_id]
+    tool_ids = [line.tool_id for line in lines if line.tool_id]
+    balances = dict(
+        with_balance_as_of(Consumable.objects.filter(pk__in=consumable_ids), stock_take.date).values_list('pk', 'balance')
+    )
+    tools = Tool.objects.filter(pk__in=tool_ids).in_bulk()
+
+    movements, counted_tools = [], []
+    for line in lines:
+        if line.consumable_id:
+            line.expected_quantity = Decimal(str(balances.get(line.consumable_id) or 0))
+        else:
+            tool = tools[line.tool_id]
+            line.expected_quantity = Decimal(tool.quantity)
+            tool.quantity = int(line.counted_quantity)
+            counted_tools.append(tool)
+        line.variance = line.counted_quantity - line.expected_quantity
+        if line.variance:
+            line.movement = StockMovement(
+                farm_id=stock_take.farm_id,
+                consumable_id=line.consumable_id,
+                tool_id=line.tool_id,
+                movement_type='ADJUSTMENT',
+                reason='CORRECTION',
+                quantity=line.variance,
+                date=stock_take.date,
+                reference=f'Stock-take {stock_take.pk}',
+                recorded_by=recorded_by or stock_take.counted_by,
+            )
+            movements.append(line.movement)
+
+    # Counted quantities are never negative, so the non-negative guard cannot apply.
+    post_movements(movements, prevent_negative=False)
+    Tool.objects.bulk_update(counted_tools, ['quantity'], batch_size=500)
+    StockTakeLine.objects.bulk_update(lines, ['expected_quantity', 'variance', 'movement'], batch_size=500)
+    stock_take.status = StockTake.Status.COMMITTED
+    stock_take.committed_at = timezone.now()
+    stock_take.save(update_fields=['status', 'committed_at'])
+    return movements
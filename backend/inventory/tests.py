@@ -1,3 +1,343 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from core.models import Farm
+
+from .batches import batch_for, write_off_expired
+from .forecast import cover, refresh_forecasts
+from .ledger import ledger_drift, take_snapshots, with_balance_as_of
+from .lookup import clear_lookup_cache, lookup_codes
+from .models import (
+    Consumable,
+    ConsumptionForecast,
+    StockBatch,
+    StockMovement,
+    StockPosition,
+    StockSnapshot,
+    StockTake,
+    Tool,
+    ToolCheckout,
+    ToolMaintenance,
+    ToolUsageDaily,
+    Warehouse,
+)
+from .stock import InsufficientStock, post_movements, post_opening_adjustments
+from .stocktake import commit_stock_take, record_counts
+from .tool_usage import check_out, rollup_day
+from .valuation import cost_of_goods, refresh_valuation, stock_value
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.store = Warehouse.objects.create(farm=self.farm, name='Store')
+        self.feed = Consumable.objects.create(farm=self.farm, warehouse=self.store, item_name='Feed', unit='kg')
+        post_movements([self.movement('IN', '10', date(2026, 1, 1)), self.movement('OUT', '3', date(2026, 1, 2))])
+
+    def movement(self, movement_type, quantity, day):
+        return StockMovement(farm=self.farm, consumable=self.feed, movement_type=movement_type,
+                             quantity=Decimal(quantity), date=day)
+
+    def balance(self, day):
+        return with_balance_as_of(Consumable.objects.filter(pk=self.feed.pk), day).get().balance
+
+    def test_balance_reads_through_snapshots(self):
+        take_snapshots(Consumable.objects.all(), date(2026, 1, 2))
+        post_movements([self.movement('IN', '5', date(2026, 1, 3))])
+
+        self.assertEqual(self.balance(date(2026, 1, 1)), Decimal('10'))
+        self.assertEqual(self.balance(date(2026, 1, 2)), Decimal('7'))
+        self.assertEqual(self.balance(date(2026, 1, 3)), Decimal('12'))
+
+    def test_backdated_movement_drops_stale_snapshots(self):
+        take_snapshots(Consumable.objects.all(), date(2026, 1, 1))
+        take_snapshots(Consumable.objects.all(), date(2026, 1, 2))
+        post_movements([self.movement('OUT', '2', date(2026, 1, 2))])
+
+        self.assertEqual(list(StockSnapshot.objects.values_list('date', flat=True)), [date(2026, 1, 1)])
+        self.assertEqual(self.balance(date(2026, 1, 2)), Decimal('5'))
+        self.assertFalse(ledger_drift(Consumable.objects.all()).exists())
+
+    def test_opening_adjustments_close_the_drift(self):
+        # Stock recorded before the ledger existed.
+        Consumable.objects.filter(pk=self.feed.pk).update(quantity_on_hand=Decimal('20'))
+        drifted = list(ledger_drift(Consumable.objects.all()))
+        self.assertEqual([consumable.drift for consumable in drifted], [Decimal('13')])
+
+        post_opening_adjustments(drifted, date(2026, 1, 5))
+
+        self.feed.refresh_from_db()
+        self.assertEqual(self.feed.quantity_on_hand, Decimal('20'))
+        self.assertFalse(ledger_drift(Consumable.objects.all()).exists())
+        self.assertEqual(StockPosition.objects.get(consumable=self.feed, warehouse=self.store).quantity, Decimal('20'))
+
+
+class ForecastTests(TestCase):
+    today = date(2026, 3, 1)
+
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.feed = Consumable.objects.create(farm=self.farm, item_name='Feed', unit='kg')
+        post_movements([self.movement('IN', '1000', self.today - timedelta(days=100), reason='PURCHASE')])
+        # 90 kg over the 90-day history: a seed rate of 1 kg/day.
+        post_movements([self.movement('OUT', '9', self.today - timedelta(days=day)) for day in range(1, 11)])
+        self.assertEqual(refresh_forecasts(today=self.today), (1, 0, 0))
+
+    def movement(self, movement_type, quantity, day, reason='USAGE'):
+        return StockMovement(farm=self.farm, consumable=self.feed, movement_type=movement_type, reason=reason,
+                             quantity=Decimal(quantity), date=day)
+
+    def rate(self):
+        return ConsumptionForecast.objects.get(consumable=self.feed).daily_rate
+
+    def test_new_days_are_folded_into_the_average(self):
+        self.assertEqual(self.rate(), Decimal('1.0000'))
+        post_movements([self.movement('OUT', '16', self.today)])
+
+        self.assertEqual(refresh_forecasts(today=self.today + timedelta(days=1)), (0, 1, 0))
+        # 2/15 * 16 + 13/15 * 1
+        self.assertEqual(self.rate(), Decimal('3.0000'))
+
+    def test_backdated_usage_rebuilds_from_history(self):
+        post_movements([self.movement('OUT', '90', self.today - timedelta(days=5))])
+
+        self.assertEqual(refresh_forecasts(today=self.today), (0, 0, 1))
+        self.assertEqual(self.rate(), Decimal('2.0000'))
+
+    def test_up_to_date_forecasts_are_left_alone(self):
+        self.assertEqual(refresh_forecasts(today=self.today), (0, 0, 0))
+
+    def test_cover_projects_the_stockout_date(self):
+        item, = cover(Consumable.objects.all(), today=self.today)
+
+        self.assertEqual(item['days_of_cover'], Decimal('910.0'))
+        self.assertEqual(item['stockout_date'], self.today + timedelta(days=910))
+
+
+class StockPositionTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.store = Warehouse.objects.create(farm=self.farm, name='Store')
+        self.shed = Warehouse.objects.create(farm=self.farm, name='Shed')
+        self.feed = Consumable.objects.create(farm=self.farm, warehouse=self.store, item_name='Feed', unit='kg')
+        post_movements([self.movement('IN', '10')])
+
+    def movement(self, movement_type, quantity, **kwargs):
+        return StockMovement(
+            farm=self.farm, consumable=self.feed, movement_type=movement_type,
+            quantity=Decimal(quantity), date=date(2026, 1, 1), **kwargs,
+        )
+
+    def position(self, warehouse):
+        return StockPosition.objects.get(consumable=self.feed, warehouse=warehouse).quantity
+
+    def test_transfer_moves_stock_between_warehouses(self):
+        post_movements([self.movement('TRANSFER', '4', from_warehouse=self.store, to_warehouse=self.shed)])
+
+        self.assertEqual(self.position(self.store), Decimal('6'))
+        self.assertEqual(self.position(self.shed), Decimal('4'))
+        self.feed.refresh_from_db()
+        self.assertEqual(self.feed.quantity_on_hand, Decimal('10'))
+
+    def test_transfer_cannot_exceed_source_stock(self):
+        with self.assertRaises(InsufficientStock):
+            post_movements([self.movement('TRANSFER', '11', from_warehouse=self.store, to_warehouse=self.shed)])
+
+        self.assertEqual(self.position(self.store), Decimal('10'))
+        self.assertFalse(StockPosition.objects.filter(warehouse=self.shed).exists())
+
+
+class StockTakeTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.feed = Consumable.objects.create(farm=self.farm, item_name='Feed', unit='kg')
+        self.salt = Consumable.objects.create(farm=self.farm, item_name='Salt', unit='kg')
+        self.hoe = Tool.objects.create(farm=self.farm, name='Hoe', category='Hand tools', quantity=3)
+        post_movements([
+            StockMovement(farm=self.farm, consumable=item, movement_type='IN', quantity=Decimal('10'), date=date(2026, 1, 1))
+            for item in (self.feed, self.salt)
+        ])
+        self.stock_take = StockTake.objects.create(farm=self.farm, date=date(2026, 1, 31))
+
+    def test_commit_posts_only_variances(self):
+        record_counts(self.stock_take, [
+            {'consumable': self.feed.pk, 'counted_quantity': Decimal('9')},
+            {'consumable': self.salt.pk, 'counted_quantity': Decimal('10')},
+        ])
+        # A recount replaces the earlier figure.
+        record_counts(self.stock_take, [
+            {'consumable': self.feed.pk, 'counted_quantity': Decimal('8')},
+            {'tool': self.hoe.pk, 'counted_quantity': Decimal('2')},
+        ])
+
+        movements = commit_stock_take(self.stock_take)
+
+        self.assertEqual(sorted(movement.quantity for movement in movements), [Decimal('-2'), Decimal('-1')])
+        self.feed.refresh_from_db()
+        self.hoe.refresh_from_db()
+        self.assertEqual(self.feed.quantity_on_hand, Decimal('8'))
+        self.assertEqual(self.hoe.quantity, 2)
+        self.stock_take.refresh_from_db()
+        self.assertEqual(self.stock_take.status, StockTake.Status.COMMITTED)
+        self.assertEqual(self.stock_take.lines.get(consumable=self.salt).variance, Decimal('0'))
+
+
+class ValuationTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+
+    def value_after_purchases_and_use(self, method):
+        consumable = Consumable.objects.create(farm=self.farm, item_name=method, unit='kg', costing_method=method)
+        post_movements([
+            StockMovement(farm=self.farm, consumable=consumable, movement_type=movement_type, quantity=Decimal(quantity),
+                          unit_cost=unit_cost and Decimal(unit_cost), date=day)
+            for movement_type, quantity, unit_cost, day in (
+                ('IN', '10', '2', date(2026, 1, 1)),
+                ('IN', '10', '4', date(2026, 1, 5)),
+                ('OUT', '15', None, date(2026, 1, 10)),
+            )
+        ])
+        refresh_valuation()
+        queryset = Consumable.objects.filter(pk=consumable.pk)
+        return stock_value(queryset, date(2026, 1, 31))['total_value'], cost_of_goods(queryset, date(2026, 1, 1), date(2026, 1, 31))['total_cost']
+
+    def test_fifo_uses_oldest_cost_first(self):
+        self.assertEqual(self.value_after_purchases_and_use('FIFO'), (Decimal('20'), Decimal('40')))
+
+    def test_weighted_average(self):
+        self.assertEqual(self.value_after_purchases_and_use('AVERAGE'), (Decimal('15'), Decimal('45')))
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.vaccine = Consumable.objects.create(farm=self.farm, item_name='Vaccine', unit='dose')
+        self.late = batch_for(self.vaccine, 'LATE', date(2026, 6, 1), date(2026, 1, 1))
+        self.early = batch_for(self.vaccine, 'EARLY', date(2026, 3, 1), date(2026, 1, 2))
+        post_movements([self.movement('IN', '10', batch=self.late), self.movement('IN', '5', batch=self.early)])
+
+    def movement(self, movement_type, quantity, day=date(2026, 1, 2), **kwargs):
+        return StockMovement(farm=self.farm, consumable=self.vaccine, movement_type=movement_type,
+                             quantity=Decimal(quantity), date=day, **kwargs)
+
+    def remaining(self):
+        return dict(StockBatch.objects.values_list('lot_number', 'quantity_remaining'))
+
+    def test_out_draws_first_expiry_first(self):
+        post_movements([self.movement('OUT', '7')])
+
+        self.assertEqual(self.remaining(), {'EARLY': Decimal('0'), 'LATE': Decimal('8')})
+
+    def test_fefo_skips_lots_expired_by_the_movement_date(self):
+        post_movements([self.movement('OUT', '7', day=date(2026, 3, 2))])
+
+        self.assertEqual(self.remaining(), {'EARLY': Decimal('5'), 'LATE': Decimal('3')})
+
+    def test_named_expired_lot_can_still_be_drawn(self):
+        post_movements([self.movement('OUT', '2', day=date(2026, 3, 2), batch=self.early)])
+
+        self.assertEqual(self.remaining(), {'EARLY': Decimal('3'), 'LATE': Decimal('10')})
+
+    def test_write_off_empties_expired_lots(self):
+        movements = write_off_expired(today=date(2026, 3, 2))
+
+        self.assertEqual([(movement.reason, movement.quantity) for movement in movements], [('EXPIRED', Decimal('5'))])
+        self.assertEqual(self.remaining(), {'EARLY': Decimal('0'), 'LATE': Decimal('10')})
+        self.vaccine.refresh_from_db()
+        self.assertEqual(self.vaccine.quantity_on_hand, Decimal('10'))
+
+
+class LookupTests(TestCase):
+    def setUp(self):
+        clear_lookup_cache()
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.pump = Tool.objects.create(farm=self.farm, name='Pump', category='Water', sku='T-1', barcode='4000001')
+
+    def test_resolves_sku_and_barcode_in_one_query(self):
+        with self.assertNumQueries(1):
+            items = lookup_codes(self.farm.id, ['T-1', '4000001', 'unknown'])
+
+        self.assertEqual(items['T-1']['id'], str(self.pump.pk))
+        self.assertEqual(items['4000001'], items['T-1'])
+        self.assertIsNone(items['unknown'])
+
+    def test_saving_an_item_clears_cached_misses(self):
+        self.assertIsNone(lookup_codes(self.farm.id, ['C-1'])['C-1'])
+
+        Consumable.objects.create(farm=self.farm, item_name='Urea', unit='kg', sku='C-1')
+
+        self.assertEqual(lookup_codes(self.farm.id, ['C-1'])['C-1']['name'], 'Urea')
+
+
+class ToolUsageTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.slasher = Tool.objects.create(farm=self.farm, name='Slasher', category='Hand tools', quantity=4)
+        self.pump = Tool.objects.create(farm=self.farm, name='Pump', category='Water', quantity=1)
+
+    def test_cannot_check_out_more_than_in_store(self):
+        check_out(ToolCheckout(farm=self.farm, tool=self.slasher, quantity=3))
+
+        with self.assertRaises(ValidationError):
+            check_out(ToolCheckout(farm=self.farm, tool=self.slasher, quantity=2))
+
+    def test_daily_rollup(self):
+        day = date(2026, 3, 10)
+        check_out(ToolCheckout(
+            farm=self.farm, tool=self.slasher, quantity=2,
+            checked_out_at=timezone.make_aware(datetime(2026, 3, 9, 8)),
+        ))
+        ToolMaintenance.objects.create(farm=self.farm, tool=self.pump, task='Service', due_date=date(2026, 3, 1), started_on=day)
+
+        rollup_day(day)
+
+        rows = {row.category: row for row in ToolUsageDaily.objects.filter(date=day)}
+        self.assertEqual((rows['Hand tools'].units, rows['Hand tools'].busy_units), (4, 2))
+        self.assertEqual((rows['Water'].down_units, rows['Water'].overdue_tasks), (1, 1))
+
+
+class ToolMaintenanceApiTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        pump = Tool.objects.create(farm=self.farm, name='Pump', category='Water', quantity=1)
+        self.task = ToolMaintenance.objects.create(farm=self.farm, tool=pump, task='Service', due_date=date(2026, 3, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email='staff@example.com', password='x'))
+
+    def complete(self, cost):
+        return self.client.post(f'/api/tool-maintenance/{self.task.pk}/complete/', {'cost': cost}, format='json')
+
+    def test_blank_cost_completes_without_one(self):
+        self.assertEqual(self.complete('').status_code, 200)
+        self.task.refresh_from_db()
+        self.assertIsNone(self.task.cost)
+
+    def test_cost_is_validated_and_saved(self):
+        self.assertEqual(self.complete('abc').status_code, 400)
+        self.assertEqual(self.complete('1500.5').status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.cost, Decimal('1500.50'))
+
+
+class ToolCheckoutApiTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.pump = Tool.objects.create(farm=self.farm, name='Pump', category='Water', quantity=1)
+        self.checkout = check_out(ToolCheckout(farm=self.farm, tool=self.pump, quantity=1))
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email='staff@example.com', password='x'))
+
+    def test_checkouts_cannot_be_edited_or_deleted(self):
+        url = f'/api/tool-checkouts/{self.checkout.pk}/'
+        self.assertEqual(self.client.patch(url, {'quantity': 5}, format='json').status_code, 405)
+        self.assertEqual(self.client.delete(url).status_code, 405)
 
-# Create your tests here.
+        response = self.client.post(f'{url}check-in/', {}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['checked_in_at'])
@@ -0,0 +1,169 @@
+"""
+Tool check-outs, maintenance and fleet utilisation.
+
+A unit is busy on a day when a check-out covering it was open at any point
+of that day, and down while a started maintenance task on its tool is not
+yet completed. rollup_day() stores those per-category totals, plus the
+maintenance tasks overdue that day, in ToolUsageDaily from four grouped
+queries, so analytics over any window read one row per category and day
+instead of the check-out log. The live fleet status runs the same grouped
+queries for the current moment.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Tool, ToolCheckout, ToolMaintenance, ToolUsageDaily
+
+FIGURES = ('units', 'busy_units', 'down_units', 'overdue_tasks')
+
+
+def units_out(tool):
+    return tool.checkouts.filter(checked_in_at__isnull=True).aggregate(total=Sum('quantity'))['total'] or 0
+
+
+@transaction.atomic
+def check_out(checkout):
+    """Save ``checkout`` if the tool has enough units in the store."""
+    tool = Tool.objects.select_for_update().get(pk=checkout.tool_id)
+    available = tool.quantity - units_out(tool)
+    if checkout.quantity > available:
+        raise ValidationError({'quantity': f'Only {available} of {tool.quantity} {tool.name} in the store.'})
+    checkout.checked_out_at = checkout.checked_out_at or timezone.now()
+    checkout.save()
+    return checkout
+
+
+@transaction.atomic
+def check_in(checkout, condition='', notes=''):
+    if checkout.checked_in_at is not None:
+        raise ValidationError({'checked_in_at': 'This tool was already checked in.'})
+    checkout.checked_in_at = timezone.now()
+    checkout.condition_on_return = condition
+    if notes:
+        checkout.notes = f'{checkout.notes}\n{notes}'.strip()
+    checkout.save(update_fields=['checked_in_at', 'condition_on_return', 'notes'])
+    if condition:
+        Tool.objects.filter(pk=checkout.tool_id).update(condition=condition, updated_at=timezone.now())
+    return checkout
+
+
+@transaction.atomic
+def complete_maintenance(task, completed_on, cost=None):
+    """Close ``task``; a recurring one gets its next occurrence, which is returned."""
+    if task.completed_on is not None:
+        raise ValidationError({'completed_on': 'This task is already completed.'})
+    task.completed_on = completed_on
+    if cost is not None:
+        task.cost = cost
+    task.save(update_fields=['completed_on', 'cost'])
+    if not task.interval_days:
+        return None
+    return ToolMaintenance.objects.create(
+        farm_id=task.farm_id,
+        tool_id=task.tool_id,
+        task=task.task,
+        interval_days=task.interval_days,
+        due_date=completed_on + timedelta(days=task.interval_days),
+    )
+
+
+def _open_on(day):
+    return Q(completed_on__isnull=True) | Q(completed_on__gt=day)
+
+
+def _grouped(queryset, category, total):
+    return {
+        (row['farm_id'], row[category]): row['n'] or 0
+        for row in queryset.values('farm_id', category).annotate(n=total).order_by()
+    }
+
+
+def _figures(day, busy, farm=None):
+    """{(farm_id, category): {figure: value}} for ``day``; ``busy`` filters the check-outs that count."""
+    tools = Tool.objects.all()
+    checkouts = ToolCheckout.objects.filter(busy)
+    maintenance = ToolMaintenance.objects.all()
+    if farm is not None:
+        tools, checkouts, maintenance = tools.filter(farm=farm), checkouts.filter(farm=farm), maintenance.filter(farm=farm)
+
+    in_service = ToolMaintenance.objects.filter(_open_on(day), tool=OuterRef('pk'), started_on__lte=day)
+    grouped = {
+        'units': _grouped(tools, 'category', Sum('quantity')),
+        'busy_units': _grouped(checkouts, 'tool__category', Sum('quantity')),
+        'down_units': _grouped(tools.filter(Exists(in_service)), 'category', Sum('quantity')),
+        'overdue_tasks': _grouped(maintenance.filter(_open_on(day), due_date__lt=day), 'tool__category', Count('id')),
+    }
+    keys = set().union(*grouped.values())
+    return {key: {figure: grouped[figure].get(key, 0) for figure in FIGURES} for key in keys}
+
+
+def rollup_day(day, farm=None):
+    """Store the per-category figures of ``day``. Returns the number of rows written."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = start + timedelta(days=1)
+    busy = Q(checked_out_at__lt=end) & (Q(checked_in_at__isnull=True) | Q(checked_in_at__gte=start))
+    rows = [
+        ToolUsageDaily(farm_id=farm_id, date=day, category=category, **figures)
+        for (farm_id, category), figures in _figures(day, busy, farm).items()
+    ]
+    ToolUsageDaily.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['farm', 'date', 'category'],
+        update_fields=list(FIGURES),
+    )
+    return len(rows)
+
+
+def _rate(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def fleet_status(farm, today=None):
+    """Units per category in the store, checked out and in maintenance right now, with overdue tasks."""
+    today = today or timezone.localdate()
+    figures = _figures(today, Q(checked_in_at__isnull=True), farm)
+    return sorted(
+        (
+            {
+                'category': category,
+                'units': row['units'],
+                'checked_out': row['busy_units'],
+                'in_maintenance': row['down_units'],
+                'available': max(row['units'] - row['busy_units'] - row['down_units'], 0),
+                'overdue_tasks': row['overdue_tasks'],
+            }
+            for (_farm_id, category), row in figures.items()
+        ),
+        key=lambda row: row['category'],
+    )
+
+
+def tool_analytics(farm, date_from, date_to):
+    """Utilisation and downtime per category over the window, from the daily rollup."""
+    yesterday = timezone.localdate() - timedelta(days=1)
+    if date_from <= yesterday <= date_to and not ToolUsageDaily.objects.filter(farm=farm, date=yesterday).exists():
+        rollup_day(yesterday, farm)
+
+    rows = (
+        ToolUsageDaily.objects.filter(farm=farm, date__range=(date_from, date_to))
+        .values('category')
+        .annotate(
+            days=Count('date', distinct=True),
+            unit_days=Sum('units'),
+            busy_unit_days=Sum('busy_units'),
+            down_unit_days=Sum('down_units'),
+            overdue_task_days=Sum('overdue_tasks'),
+        )
+        .order_by('category')
+    )
+    categories = []
+    for row in rows:
+        row['utilisation_rate'] = _rate(row['busy_unit_days'], row['unit_days'] - row['down_unit_days'])
+        row['downtime_rate'] = _rate(row['down_unit_days'], row['unit_days'])
+        categories.append(row)
+    return {'from': date_from, 'to': date_to, 'categories': categories, 'status': fleet_status(farm)}
@@ -3,8 +3,15 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     ConsumableViewSet,
+    InventoryBatchLookupView,
+    InventoryLookupView,
+    StockBatchViewSet,
     StockMovementViewSet,
+    StockPositionViewSet,
+    StockTakeViewSet,
     SupplierViewSet,
+    ToolCheckoutViewSet,
+    ToolMaintenanceViewSet,
     ToolViewSet,
     WarehouseViewSet,
 )
@@ -13,9 +20,16 @@ router = DefaultRouter()
 router.register(r'warehouses', WarehouseViewSet)
 router.register(r'suppliers', SupplierViewSet)
 router.register(r'tools', ToolViewSet)
+router.register(r'tool-checkouts', ToolCheckoutViewSet)
+router.register(r'tool-maintenance', ToolMaintenanceViewSet)
 router.register(r'consumables', ConsumableViewSet)
 router.register(r'stock-movements', StockMovementViewSet)
+router.register(r'stock-positions', StockPositionViewSet)
+router.register(r'stock-takes', StockTakeViewSet)
+router.register(r'stock-batches', StockBatchViewSet)
 
 urlpatterns = [
+    path('inventory/lookup/', InventoryLookupView.as_view(), name='inventory-lookup'),
+    path('inventory/lookup/batch/', InventoryBatchLookupView.as_view(), name='inventory-lookup-batch'),
     path('', include(router.urls)),
 ]
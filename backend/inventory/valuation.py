@@ -0,0 +1,190 @@
+"""
+Inventory valuation: stock value as of any date and cost of goods used.
+
+Each consumable movement is folded once into a ValuationEntry holding the
+quantity and value it moved. Incoming stock (IN, RETURN, positive
+ADJUSTMENT) is valued at the movement's unit_cost, falling back to the
+running average cost and then the consumable's unit_price. Outgoing stock
+is costed from the open CostLayers oldest first (FIFO) or at the running
+average cost (AVERAGE). Exhausted layers are deleted and ValuationState
+keeps each consumable's running totals, so a refresh reads only the
+movements posted since the last one. Stock value on a day and the cost of
+goods over a period are then grouped sums over the entries. A movement
+backdated before a consumable's latest folded one revalues that consumable
+from scratch.
+"""
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.db.models.functions import TruncMonth
+
+from .ledger import movement_delta
+from .models import Consumable, CostLayer, StockMovement, ValuationEntry, ValuationState
+
+CENT = Decimal('0.01')
+COST_PLACES = Decimal('0.0001')
+
+
+def pending_movements():
+    """Consumable movements not yet valued. Transfers never change value."""
+    return StockMovement.objects.filter(consumable__isnull=False, valuation_entry__isnull=True).exclude(movement_type='TRANSFER')
+
+
+def reset_valuation(consumable_ids):
+    """Drop the valuation of these consumables; the next refresh revalues them from their first movement."""
+    ValuationEntry.objects.filter(consumable_id__in=consumable_ids).delete()
+    CostLayer.objects.filter(consumable_id__in=consumable_ids).delete()
+    ValuationState.objects.filter(consumable_id__in=consumable_ids).delete()
+
+
+def _average_cost(state):
+    if state.quantity > 0:
+        return state.value / state.quantity
+    return None
+
+
+def _fallback_cost(movement, state):
+    average = _average_cost(state)
+    if average is not None:
+        return average
+    return movement.consumable.unit_price or Decimal('0')
+
+
+def _inflow_cost(movement, state):
+    if movement.movement_type in ('IN', 'ADJUSTMENT') and movement.unit_cost is not None:
+        return movement.unit_cost
+    return _fallback_cost(movement, state)
+
+
+def _consume_layers(queue, quantity, touched):
+    """Take ``quantity`` from the oldest layers. Returns (cost, quantity left uncovered)."""
+    cost = Decimal('0')
+    while quantity > 0 and queue:
+        layer = queue[0]
+        taken = min(quantity, layer.remaining)
+        cost += taken * layer.unit_cost
+        layer.remaining -= taken
+        quantity -= taken
+        touched[layer.pk] = layer
+        if layer.remaining <= 0:
+            queue.popleft()
+    return cost, quantity
+
+
+@transaction.atomic
+def refresh_valuation(queryset=None):
+    """Value every pending movement of ``queryset`` consumables, oldest first.
+
+    Returns (movements valued, consumables revalued).
+    """
+    pending = pending_movements()
+    if queryset is not None:
+        pending = pending.filter(consumable__in=queryset)
+    earliest = dict(pending.values('consumable_id').annotate(first=Min('date')).values_list('consumable_id', 'first').order_by())
+    if not earliest:
+        return 0, 0
+
+    states = ValuationState.objects.select_for_update().in_bulk(list(earliest))
+    revalued = [consumable_id for consumable_id, first in earliest.items() if consumable_id in states and first < states[consumable_id].last_date]
+    if revalued:
+        reset_valuation(revalued)
+        for consumable_id in revalued:
+            del states[consumable_id]
+
+    layers = defaultdict(deque)
+    for layer in CostLayer.objects.filter(consumable_id__in=earliest).order_by('consumable_id', 'date', 'movement__created_at'):
+        layers[layer.consumable_id].append(layer)
+
+    movements = (
+        pending_movements().filter(consumable_id__in=earliest).select_related('consumable')
+        .order_by('consumable_id', 'date', 'created_at', 'id')
+    )
+    entries, new_layers, new_states = [], [], []
+    touched = {}
+    for movement in movements:
+        consumable = movement.consumable
+        state = states.get(consumable.pk)
+        if state is None:
+            state = states[consumable.pk] = ValuationState(
+                consumable=consumable, farm_id=consumable.farm_id, quantity=Decimal('0'), value=Decimal('0'), last_date=movement.date,
+            )
+            new_states.append(state)
+
+        delta = movement_delta(movement)
+        if delta > 0:
+            unit_cost = Decimal(_inflow_cost(movement, state)).quantize(COST_PLACES)
+            value = delta * unit_cost
+            if consumable.costing_method == Consumable.CostingMethod.FIFO:
+                layer = CostLayer(
+                    farm_id=movement.farm_id, consumable=consumable, movement=movement,
+                    date=movement.date, unit_cost=unit_cost, remaining=delta,
+                )
+                layers[consumable.pk].append(layer)
+                new_layers.append(layer)
+        elif consumable.costing_method == Consumable.CostingMethod.FIFO:
+            fallback = _fallback_cost(movement, state)
+            cost, uncovered = _consume_layers(layers[consumable.pk], -delta, touched)
+            value = -(cost + uncovered * fallback)
+        else:
+            value = delta * _fallback_cost(movement, state)
+
+        value = value.quantize(CENT)
+        state.quantity += delta
+        state.value += value
+        state.last_date = movement.date
+        entries.append(ValuationEntry(
+            farm_id=movement.farm_id, consumable=consumable, movement=movement,
+            date=movement.date, quantity=delta, value=value,
+        ))
+
+    ValuationEntry.objects.bulk_create(entries, batch_size=1000)
+    CostLayer.objects.bulk_create([layer for layer in new_layers if layer.remaining > 0], batch_size=1000)
+    stored = [layer for layer in touched.values() if not layer._state.adding]
+    CostLayer.objects.filter(pk__in=[layer.pk for layer in stored if layer.remaining <= 0]).delete()
+    CostLayer.objects.bulk_update([layer for layer in stored if layer.remaining > 0], ['remaining'], batch_size=1000)
+    ValuationState.objects.bulk_create(new_states, batch_size=1000)
+    ValuationState.objects.bulk_update(
+        [state for state in states.values() if not state._state.adding],
+        ['quantity', 'value', 'last_date'], batch_size=1000,
+    )
+    return len(entries), len(revalued)
+
+
+def stock_value(queryset, day):
+    """Quantity and value of every consumable in ``queryset`` at the end of ``day``."""
+    rows = list(
+        ValuationEntry.objects.filter(consumable__in=queryset, date__lte=day)
+        .values('consumable_id', 'consumable__item_name', 'consumable__unit', 'consumable__costing_method')
+        .annotate(quantity=Sum('quantity'), value=Sum('value'))
+        .order_by('consumable__item_name')
+    )
+    for row in rows:
+        row['unit_cost'] = (row['value'] / row['quantity']).quantize(COST_PLACES) if row['quantity'] > 0 else None
+    return {'date': day, 'total_value': sum((row['value'] for row in rows), Decimal('0')), 'items': rows}
+
+
+def cost_of_goods(queryset, date_from, date_to):
+    """Cost of stock taken out between the dates, per month and reason and per consumable."""
+    outflows = ValuationEntry.objects.filter(consumable__in=queryset, date__range=(date_from, date_to), quantity__lt=0)
+    periods = list(
+        outflows.annotate(period=TruncMonth('date'))
+        .values('period', 'movement__reason')
+        .annotate(quantity=-Sum('quantity'), cost=-Sum('value'))
+        .order_by('period', 'movement__reason')
+    )
+    items = list(
+        outflows.values('consumable_id', 'consumable__item_name', 'consumable__unit')
+        .annotate(quantity=-Sum('quantity'), cost=-Sum('value'))
+        .order_by('-cost')
+    )
+    for row in periods:
+        row['reason'] = row.pop('movement__reason')
+    return {
+        'from': date_from,
+        'to': date_to,
+        'total_cost': sum((row['cost'] for row in items), Decimal('0')),
+        'periods': periods,
+        'items': items,
+    }
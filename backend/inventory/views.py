@@ -1,16 +1,52 @@
-from rest_framework import permissions, viewsets
-from rest_framework.exceptions import ValidationError
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from core.models import Farm
+from core.params import get_date_param, parse_date_param
 
-from .models import Consumable, StockMovement, Supplier, Tool, Warehouse
+from .batches import batch_for, expiring
+from .forecast import cover, refresh_forecasts
+from .ledger import ledger_drift, ledger_entries, with_balance_as_of
+from .lookup import CODE_FIELDS, MAX_BATCH, code_in_use, lookup_codes
+from .models import (
+    Consumable,
+    StockBatch,
+    StockMovement,
+    StockPosition,
+    StockTake,
+    Supplier,
+    Tool,
+    ToolCheckout,
+    ToolMaintenance,
+    Warehouse,
+)
+from .positions import position_matrix
+from .reorder import create_draft_purchases, reorder_suggestions, stock_alerts
 from .serializers import (
     ConsumableSerializer,
+    StockBatchSerializer,
     StockMovementSerializer,
+    StockPositionSerializer,
+    StockTakeCountSerializer,
+    StockTakeSerializer,
     SupplierSerializer,
+    ToolCheckoutSerializer,
+    ToolMaintenanceSerializer,
     ToolSerializer,
     WarehouseSerializer,
 )
+from .stock import post_movements
+from .stocktake import commit_stock_take, record_counts
+from .tool_usage import check_in, check_out, complete_maintenance, tool_analytics
+from .valuation import cost_of_goods, refresh_valuation, reset_valuation, stock_value
 
 
 def get_current_farm():
@@ -25,6 +61,14 @@ def validate_farm_relation(instance, farm, field_name):
         raise ValidationError({field_name: f'Selected {field_name} does not belong to the current farm.'})
 
 
+def validate_item_codes(serializer, farm):
+    """Keep SKUs and barcodes unique across the farm's tools and consumables."""
+    for field in CODE_FIELDS:
+        code = serializer.validated_data.get(field)
+        if code and code_in_use(farm.id, code, exclude=serializer.instance):
+            raise ValidationError({field: 'Another tool or consumable on this farm already uses this code.'})
+
+
 class WarehouseViewSet(viewsets.ModelViewSet):
     queryset = Warehouse.objects.all()
     serializer_class = WarehouseSerializer
@@ -66,8 +110,26 @@ class ToolViewSet(viewsets.ModelViewSet):
         farm = get_current_farm()
         validate_farm_relation(serializer.validated_data.get('warehouse'), farm, 'warehouse')
         validate_farm_relation(serializer.validated_data.get('supplier'), farm, 'supplier')
+        validate_item_codes(serializer, farm)
         serializer.save(farm=farm)
 
+    def perform_update(self, serializer):
+        validate_item_codes(serializer, serializer.instance.farm)
+        serializer.save()
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """Utilisation, downtime and overdue maintenance per category, plus the live fleet status.
+
+        Query params: from, to (default: the last 30 days).
+        """
+        today = timezone.localdate()
+        date_from = get_date_param(request, 'from') or today - timedelta(days=30)
+        date_to = get_date_param(request, 'to') or today
+        if date_from > date_to:
+            raise ValidationError({'to': 'Must be on or after from.'})
+        return Response(tool_analytics(get_current_farm(), date_from, date_to))
+
 
 class ConsumableViewSet(viewsets.ModelViewSet):
     queryset = Consumable.objects.all()
@@ -78,17 +140,127 @@ class ConsumableViewSet(viewsets.ModelViewSet):
         farm = get_current_farm()
         return Consumable.objects.filter(farm=farm)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         farm = get_current_farm()
         validate_farm_relation(serializer.validated_data.get('warehouse'), farm, 'warehouse')
         validate_farm_relation(serializer.validated_data.get('supplier'), farm, 'supplier')
-        serializer.save(farm=farm)
+        validate_item_codes(serializer, farm)
+        opening = serializer.validated_data.pop('quantity_on_hand', 0)
+        consumable = serializer.save(farm=farm)
+        if opening:
+            post_movements([StockMovement(
+                farm=farm,
+                consumable=consumable,
+                movement_type='ADJUSTMENT',
+                reason='CORRECTION',
+                quantity=opening,
+                date=timezone.localdate(),
+                to_warehouse=consumable.warehouse,
+                reference='Opening balance',
+            )])
+            consumable.refresh_from_db(fields=['quantity_on_hand'])
+
+    def perform_update(self, serializer):
+        validate_item_codes(serializer, serializer.instance.farm)
+        method = serializer.instance.costing_method
+        consumable = serializer.save()
+        if consumable.costing_method != method:
+            # Revalue the whole history under the new method on the next refresh.
+            reset_valuation([consumable.pk])
+
+    def perform_destroy(self, instance):
+        try:
+            instance.delete()
+        except ProtectedError as exc:
+            kinds = sorted({str(obj._meta.verbose_name_plural) for obj in exc.protected_objects})
+            raise ValidationError({
+                'detail': f'{instance.item_name} is still referenced by {", ".join(kinds)} and cannot be deleted.',
+            })
+
+    @action(detail=True, methods=['get'])
+    def ledger(self, request, pk=None):
+        """Movements with running balances. Query params: from, to (default: the last 90 days)."""
+        today = timezone.localdate()
+        date_from = get_date_param(request, 'from') or today - timedelta(days=90)
+        date_to = get_date_param(request, 'to') or today
+        if date_from > date_to:
+            raise ValidationError({'to': 'Must be on or after from.'})
+        return Response({'from': date_from, 'to': date_to, **ledger_entries(self.get_object(), date_from, date_to)})
+
+    @action(detail=False, methods=['get'], url_path='as-of')
+    def as_of(self, request):
+        """Every consumable's ledger balance at the end of ``date`` (default: today)."""
+        day = get_date_param(request, 'date') or timezone.localdate()
+        rows = with_balance_as_of(self.get_queryset(), day).order_by('item_name').values('id', 'item_name', 'unit', 'balance')
+        return Response({'date': day, 'items': list(rows)})
+
+    @action(detail=False, methods=['get'])
+    def valuation(self, request):
+        """Quantity and value of every item at the end of ``date`` (default: today)."""
+        day = get_date_param(request, 'date') or timezone.localdate()
+        refresh_valuation(self.get_queryset())
+        return Response(stock_value(self.get_queryset(), day))
+
+    @action(detail=False, methods=['get'])
+    def cogs(self, request):
+        """Cost of stock used, sold or written off. Query params: from, to (default: this month)."""
+        today = timezone.localdate()
+        date_from = get_date_param(request, 'from') or today.replace(day=1)
+        date_to = get_date_param(request, 'to') or today
+        if date_from > date_to:
+            raise ValidationError({'to': 'Must be on or after from.'})
+        refresh_valuation(self.get_queryset())
+        return Response(cost_of_goods(self.get_queryset(), date_from, date_to))
+
+    @action(detail=False, methods=['get'], url_path='low-stock')
+    def low_stock(self, request):
+        """Items at or below their reorder threshold, from the cached alert set (?fresh=1 recomputes)."""
+        fresh = request.query_params.get('fresh', '').lower() in ('1', 'true', 'yes')
+        return Response(stock_alerts(get_current_farm().id, fresh=fresh))
+
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        """Smoothed daily consumption, days of cover and projected stock-out date per item.
+
+        Query params: within (only items running out within that many days).
+        """
+        within = request.query_params.get('within')
+        if within is not None:
+            try:
+                within = int(within)
+            except ValueError:
+                raise ValidationError({'within': 'Must be a whole number of days.'})
+        # Folds in any days since the last refresh; a no-op when up to date.
+        refresh_forecasts(self.get_queryset())
+        return Response(cover(self.get_queryset(), within=within))
+
+    @action(detail=False, methods=['get', 'post'], url_path='reorder-suggestions')
+    def reorder(self, request):
+        """GET: low items grouped by supplier with suggested quantities.
+        POST: replace the generated draft purchases with one per supplier."""
+        farm = get_current_farm()
+        if request.method == 'GET':
+            return Response(reorder_suggestions(farm.id))
+        from commerce.serializers import PurchaseSerializer
+
+        drafts = create_draft_purchases(farm)
+        return Response(PurchaseSerializer(drafts, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='ledger-drift')
+    def drift(self, request):
+        """Consumables whose stored quantity_on_hand disagrees with their movements."""
+        rows = ledger_drift(self.get_queryset()).values('id', 'item_name', 'unit', 'quantity_on_hand', 'balance', 'drift')
+        return Response(list(rows))
 
 
 class StockMovementViewSet(viewsets.ModelViewSet):
+    """Append-only stock ledger: corrections are new ADJUSTMENT movements."""
+
     queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'head', 'options']
 
     def get_queryset(self):
         farm = get_current_farm()
@@ -100,4 +272,230 @@ class StockMovementViewSet(viewsets.ModelViewSet):
         validate_farm_relation(serializer.validated_data.get('tool'), farm, 'tool')
         validate_farm_relation(serializer.validated_data.get('from_warehouse'), farm, 'from_warehouse')
         validate_farm_relation(serializer.validated_data.get('to_warehouse'), farm, 'to_warehouse')
+        validate_farm_relation(serializer.validated_data.get('batch'), farm, 'batch')
+        lot_number = serializer.validated_data.pop('lot_number', '')
+        expiry_date = serializer.validated_data.pop('expiry_date', None)
+        with transaction.atomic():
+            if lot_number:
+                data = serializer.validated_data
+                data['batch'] = batch_for(data['consumable'], lot_number, expiry_date, data['date'])
+            post_movements([serializer.save(farm=farm)])
+
+
+class StockPositionViewSet(viewsets.ReadOnlyModelViewSet):
+    """Per-warehouse stock, maintained as movements are posted."""
+
+    queryset = StockPosition.objects.all()
+    serializer_class = StockPositionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        farm = get_current_farm()
+        queryset = StockPosition.objects.filter(farm=farm).select_related('consumable', 'tool', 'warehouse')
+        for param in ('warehouse', 'consumable', 'tool'):
+            value = self.request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{f'{param}_id': value})
+        return queryset.order_by('warehouse__name', 'consumable__item_name', 'tool__name')
+
+    @action(detail=False, methods=['get'])
+    def matrix(self, request):
+        """Warehouse x item quantities for the current farm."""
+        return Response(position_matrix(get_current_farm()))
+
+
+class StockTakeViewSet(viewsets.ModelViewSet):
+    """Physical count sessions: submit counts in batches, then commit once."""
+
+    queryset = StockTake.objects.all()
+    serializer_class = StockTakeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def get_queryset(self):
+        farm = get_current_farm()
+        queryset = StockTake.objects.filter(farm=farm)
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('lines__consumable', 'lines__tool')
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.action == 'list':
+            serializer.child.fields.pop('lines')
+        return serializer
+
+    def perform_create(self, serializer):
+        serializer.save(farm=get_current_farm())
+
+    @action(detail=True, methods=['post'])
+    def counts(self, request, pk=None):
+        """Add or replace counts: {"counts": [{"consumable" or "tool": id, "counted_quantity": n}, ...]}."""
+        counts = request.data.get('counts')
+        if not isinstance(counts, list) or not counts:
+            raise ValidationError({'counts': 'Expected a non-empty list of counts.'})
+        serializer = StockTakeCountSerializer(data=counts, many=True)
+        serializer.is_valid(raise_exception=True)
+        recorded = record_counts(self.get_object(), serializer.validated_data)
+        return Response({'recorded': recorded})
+
+    @action(detail=True, methods=['post'])
+    def commit(self, request, pk=None):
+        """Post every variance as an ADJUSTMENT/CORRECTION movement and close the session."""
+        stock_take = self.get_object()
+        movements = commit_stock_take(stock_take, recorded_by=request.data.get('recorded_by', ''))
+        stock_take = StockTake.objects.prefetch_related('lines__consumable', 'lines__tool').get(pk=stock_take.pk)
+        return Response({**StockTakeSerializer(stock_take).data, 'adjustments': len(movements)})
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        stock_take = self.get_object()
+        if stock_take.status != StockTake.Status.OPEN:
+            raise ValidationError({'status': 'Only open stock-takes can be cancelled.'})
+        stock_take.status = StockTake.Status.CANCELLED
+        stock_take.save(update_fields=['status'])
+        return Response(StockTakeSerializer(stock_take).data)
+
+
+class StockBatchViewSet(viewsets.ReadOnlyModelViewSet):
+    """Lots with expiry dates; stock enters and leaves them through movements."""
+
+    queryset = StockBatch.objects.all()
+    serializer_class = StockBatchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        farm = get_current_farm()
+        queryset = StockBatch.objects.filter(farm=farm).select_related('consumable')
+        consumable = self.request.query_params.get('consumable')
+        if consumable:
+            queryset = queryset.filter(consumable_id=consumable)
+        if self.request.query_params.get('open') in ('1', 'true'):
+            queryset = queryset.filter(quantity_remaining__gt=0)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def expiring(self, request):
+        """Lots with stock left expiring within ``within`` days (default 30), expired ones included."""
+        try:
+            within = int(request.query_params.get('within', 30))
+        except ValueError:
+            raise ValidationError({'within': 'Must be a whole number of days.'})
+        return Response(expiring(get_current_farm(), within))
+
+
+class InventoryLookupView(APIView):
+    """Resolve a scanned SKU or barcode to its tool or consumable. Query params: code."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        code = request.query_params.get('code', '').strip()
+        if not code:
+            raise ValidationError({'code': 'This query parameter is required.'})
+        item = lookup_codes(get_current_farm().id, [code])[code]
+        if item is None:
+            raise NotFound('No tool or consumable has this code.')
+        return Response(item)
+
+
+class InventoryBatchLookupView(APIView):
+    """Resolve every code of a scanned delivery at once: {"codes": [...]}."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        codes = request.data.get('codes')
+        if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+            raise ValidationError({'codes': 'Expected a list of codes.'})
+        codes = list(dict.fromkeys(code.strip() for code in codes if code.strip()))
+        if len(codes) > MAX_BATCH:
+            raise ValidationError({'codes': f'At most {MAX_BATCH} codes per request.'})
+        items = lookup_codes(get_current_farm().id, codes)
+        return Response({
+            'found': {code: item for code, item in items.items() if item is not None},
+            'missing': [code for code, item in items.items() if item is None],
+        })
+
+
+class ToolCheckoutViewSet(viewsets.ModelViewSet):
+    """Tools handed out to workers; close them with check-in. Query params: tool, worker, open=1."""
+
+    queryset = ToolCheckout.objects.all()
+    serializer_class = ToolCheckoutSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def get_queryset(self):
+        farm = get_current_farm()
+        queryset = ToolCheckout.objects.filter(farm=farm).select_related('tool', 'worker')
+        for param in ('tool', 'worker'):
+            value = self.request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{f'{param}_id': value})
+        if self.request.query_params.get('open') in ('1', 'true'):
+            queryset = queryset.filter(checked_in_at__isnull=True)
+        return queryset
+
+    def perform_create(self, serializer):
+        farm = get_current_farm()
+        validate_farm_relation(serializer.validated_data.get('tool'), farm, 'tool')
+        validate_farm_relation(serializer.validated_data.get('worker'), farm, 'worker')
+        serializer.instance = check_out(ToolCheckout(farm=farm, **serializer.validated_data))
+
+    @action(detail=True, methods=['post'], url_path='check-in')
+    def check_in(self, request, pk=None):
+        """Return the tool; an optional condition (e.g. NEEDS_REPAIR) updates the tool's condition."""
+        condition = request.data.get('condition', '')
+        if condition and condition not in Tool.Condition.values:
+            raise ValidationError({'condition': f'Use one of: {", ".join(Tool.Condition.values)}.'})
+        checkout = check_in(self.get_object(), condition, request.data.get('notes', ''))
+        return Response(self.get_serializer(checkout).data)
+
+
+class ToolMaintenanceViewSet(viewsets.ModelViewSet):
+    """Maintenance schedule. Query params: tool, open=1, overdue=1."""
+
+    queryset = ToolMaintenance.objects.all()
+    serializer_class = ToolMaintenanceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        farm = get_current_farm()
+        queryset = ToolMaintenance.objects.filter(farm=farm).select_related('tool')
+        tool = self.request.query_params.get('tool')
+        if tool:
+            queryset = queryset.filter(tool_id=tool)
+        if self.request.query_params.get('open') in ('1', 'true'):
+            queryset = queryset.filter(completed_on__isnull=True)
+        if self.request.query_params.get('overdue') in ('1', 'true'):
+            queryset = queryset.filter(completed_on__isnull=True, due_date__lt=timezone.localdate())
+        return queryset
+
+    def perform_create(self, serializer):
+        farm = get_current_farm()
+        validate_farm_relation(serializer.validated_data.get('tool'), farm, 'tool')
         serializer.save(farm=farm)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Close the task (completed_on defaults to today) and schedule the next one if it recurs."""
+        task = self.get_object()
+        completed_on = request.data.get('completed_on')
+        completed_on = parse_date_param(completed_on, 'completed_on') if completed_on else timezone.localdate()
+        if task.started_on and completed_on < task.started_on:
+            raise ValidationError({'completed_on': 'Must be on or after started_on.'})
+        cost = request.data.get('cost')
+        if cost is None or (isinstance(cost, str) and not cost.strip()):
+            cost = None
+        else:
+            # The serializer field carries the model's digits and places.
+            try:
+                cost = self.get_serializer().fields['cost'].to_internal_value(cost)
+            except ValidationError as exc:
+                raise ValidationError({'cost': exc.detail})
+        following = complete_maintenance(task, completed_on, cost)
+        return Response({
+            'completed': self.get_serializer(task).data,
+            'next': self.get_serializer(following).data if following else None,
+        })
@@ -0,0 +1,192 @@
+"""
+Spreads FeedingProgram rows onto individual animals.
+
+A feeding either targets one Livestock row or a whole AnimalGroup. Group
+feedings are shared across the animals that were in the group on the
+feeding date (GroupMembership), weighted by the heads still alive that day:
+``Livestock.quantity`` minus the MortalityRecord losses before it, so a
+poultry flock row carries its remaining head count. Animals are only fed
+between their entry and exit dates. Results land in FeedAllocation, one row
+per animal, day and unit, and only days touched by unallocated feedings are
+rebuilt; regroups, deaths and exits requeue the days they affect.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import FeedAllocation, FeedingProgram, GroupMembership, Livestock, MortalityRecord
+
+BATCH_SIZE = 1000
+DAYS_PER_CHUNK = 31
+
+
+def _entered_on(animal):
+    """Best guess at the day an animal joined the herd."""
+    return animal['purchase_date'] or animal['dob'] or animal['created_at'].date()
+
+
+def _heads_on(animal, losses, day):
+    """Heads of ``animal`` alive and on the farm on ``day`` (0 when absent)."""
+    if _entered_on(animal) > day:
+        return 0
+    if animal['exit_date'] is not None and animal['exit_date'] < day:
+        return 0
+    lost = sum(quantity for lost_on, quantity in losses.get(animal['id'], ()) if lost_on < day)
+    return max(animal['quantity'] - lost, 0)
+
+
+def _in_group_on(membership, day):
+    return (membership['start_date'] is None or membership['start_date'] <= day) and (
+        membership['end_date'] is None or membership['end_date'] > day
+    )
+
+
+def _rebuild_days(farm_id, days):
+    feedings = list(
+        FeedingProgram.objects.filter(farm_id=farm_id, date__in=days)
+        .values('id', 'date', 'livestock_id', 'group_id', 'quantity', 'unit', 'cost')
+    )
+
+    first, last = min(days), max(days)
+    direct_ids = {f['livestock_id'] for f in feedings if f['livestock_id']}
+    group_ids = {f['group_id'] for f in feedings if not f['livestock_id'] and f['group_id']}
+    memberships = list(
+        GroupMembership.objects.filter(group_id__in=group_ids)
+        .filter(Q(start_date__isnull=True) | Q(start_date__lte=last), Q(end_date__isnull=True) | Q(end_date__gt=first))
+        .values('group_id', 'livestock_id', 'start_date', 'end_date')
+    )
+    animal_ids = direct_ids | {m['livestock_id'] for m in memberships}
+    by_id = {
+        animal['id']: animal
+        for animal in Livestock.objects.filter(id__in=animal_ids).values(
+            'id', 'species', 'quantity', 'dob', 'purchase_date', 'created_at', 'exit_date',
+        )
+    }
+    losses = defaultdict(list)
+    for livestock_id, lost_on, quantity in (
+        MortalityRecord.objects.filter(livestock_id__in=animal_ids, date__lt=last).values_list('livestock_id', 'date', 'quantity')
+    ):
+        losses[livestock_id].append((lost_on, quantity))
+    by_group = defaultdict(list)
+    for membership in memberships:
+        by_group[membership['group_id']].append(membership)
+
+    totals = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+    heads = {}
+    for feeding in feedings:
+        day = feeding['date']
+        if feeding['livestock_id']:
+            animal = by_id.get(feeding['livestock_id'])
+            shares = [(animal, max(_heads_on(animal, losses, day), 1), Decimal('1'))] if animal else []
+        else:
+            members = []
+            for membership in by_group.get(feeding['group_id'], []):
+                animal = by_id[membership['livestock_id']]
+                if _in_group_on(membership, day):
+                    head_count = _heads_on(animal, losses, day)
+                    if head_count:
+                        members.append((animal, head_count))
+            herd = sum(head_count for _animal, head_count in members)
+            shares = [(animal, head_count, Decimal(head_count) / herd) for animal, head_count in members]
+
+        for animal, head_count, share in shares:
+            key = (animal['id'], day, feeding['unit'])
+            totals[key][0] += feeding['quantity'] * share
+            totals[key][1] += feeding['cost'] * share
+            heads[key] = (animal['species'], head_count)
+
+    rows = []
+    for (livestock_id, day, unit), (quantity, cost) in totals.items():
+        species, head_count = heads[(livestock_id, day, unit)]
+        rows.append(FeedAllocation(
+            farm_id=farm_id,
+            livestock_id=livestock_id,
+            species=species,
+            date=day,
+            unit=unit,
+            head_count=head_count,
+            quantity=quantity.quantize(Decimal('0.0001')),
+            cost=cost.quantize(Decimal('0.0001')),
+        ))
+
+    FeedAllocation.objects.filter(farm_id=farm_id, date__in=days).delete()
+    FeedAllocation.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    FeedingProgram.objects.filter(id__in=[f['id'] for f in feedings]).update(allocated_at=timezone.now())
+    return len(feedings)
+
+
+def allocate_pending_feedings(farm=None):
+    """Rebuild the allocation rollup for every day that has unallocated feedings.
+
+    Returns the number of FeedingProgram rows (re)allocated.
+    """
+    pending = FeedingProgram.objects.filter(allocated_at__isnull=True)
+    if farm is not None:
+        pending = pending.filter(farm=farm)
+
+    days_by_farm = defaultdict(set)
+    for farm_id, day in pending.values_list('farm_id', 'date').distinct():
+        days_by_farm[farm_id].add(day)
+
+    allocated = 0
+    for farm_id, days in days_by_farm.items():
+        days = sorted(days)
+        for start in range(0, len(days), DAYS_PER_CHUNK):
+            with transaction.atomic():
+                allocated += _rebuild_days(farm_id, days[start:start + DAYS_PER_CHUNK])
+    return allocated
+
+
+def invalidate_day(farm_id, day):
+    """Drop a day's rollup and queue its feedings for reallocation."""
+    FeedAllocation.objects.filter(farm_id=farm_id, date=day).delete()
+    FeedingProgram.objects.filter(farm_id=farm_id, date=day).update(allocated_at=None)
+
+
+def requeue_animal(livestock_id, since=None):
+    """Queue the feedings of an animal and of every group it was in, from ``since`` on."""
+    feedings = FeedingProgram.objects.filter(
+        Q(livestock_id=livestock_id)
+        | Q(group_id__in=GroupMembership.objects.filter(livestock_id=livestock_id).values('group_id'))
+    )
+    if since is not None:
+        feedings = feedings.filter(date__gte=since)
+    feedings.update(allocated_at=None)
+
+
+def move_to_group(livestock_id, group_id, day):
+    """Close the animal's current membership on ``day`` and open one in ``group_id``."""
+    GroupMembership.objects.filter(livestock_id=livestock_id, end_date__isnull=True).update(end_date=day)
+    if group_id:
+        GroupMembership.objects.create(livestock_id=livestock_id, group_id=group_id, start_date=day)
+    requeue_animal(livestock_id, since=day)
+
+
+def feed_cost_summary(queryset, period='day', group_by='livestock'):
+    """Aggregate FeedAllocation rows per day or month, per animal or per species.
+
+    ``head_days`` is the number of animal-days fed; per-animal rows also carry
+    ``cost_per_head`` so a flock row reports the cost of a single bird.
+    """
+    period_expr = TruncMonth('date') if period == 'month' else F('date')
+    aggregates = {
+        'total_quantity': Sum('quantity'),
+        'total_cost': Sum('cost'),
+        'head_days': Sum('head_count'),
+    }
+    if group_by == 'livestock':
+        keys = ['livestock_id', 'livestock__tag_id', 'species']
+        per_head = ExpressionWrapper(F('cost') / F('head_count'), output_field=DecimalField(max_digits=14, decimal_places=4))
+        aggregates['cost_per_head'] = Sum(per_head)
+    else:
+        keys = ['species']
+    return (
+        queryset.annotate(period=period_expr)
+        .values('period', 'unit', *keys)
+        .annotate(**aggregates)
+        .order_by('period', *keys)
+    )
@@ -0,0 +1,180 @@
+"""
+Herd health rollups built from MortalityRecord and AnimalHealthRecord.
+
+Records are counted into HerdHealthDaily, one row per farm, day, species,
+category and cause. Deaths are counted in heads (MortalityRecord.quantity),
+like the herd they are compared against. Only days holding records that
+have not been rolled up yet are rebuilt, so the analytics endpoint reads a
+small pre-aggregated table instead of the raw history.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import AnimalHealthRecord, HerdHealthDaily, Livestock, MortalityRecord
+
+DAYS_PER_CHUNK = 31
+TREND_WINDOWS = (30, 90)
+TOP_CAUSES = 5
+
+
+def _rebuild_days(farm_id, days):
+    rows = {}
+
+    def row(day, species, category, cause=''):
+        key = (day, species, category, cause)
+        if key not in rows:
+            rows[key] = HerdHealthDaily(farm_id=farm_id, date=day, species=species, category=category, cause=cause)
+        return rows[key]
+
+    mortality = MortalityRecord.objects.filter(livestock__farm_id=farm_id, date__in=days)
+    for item in (
+        mortality.values('date', 'livestock__species', 'livestock__category', 'cause')
+        .annotate(deaths=Sum('quantity'), loss=Sum('financial_loss'))
+    ):
+        entry = row(item['date'], item['livestock__species'], item['livestock__category'], item['cause'])
+        entry.deaths = item['deaths']
+        entry.financial_loss = item['loss'] or 0
+
+    health = AnimalHealthRecord.objects.filter(livestock__farm_id=farm_id, date__in=days)
+    for item in (
+        health.values('date', 'livestock__species', 'livestock__category')
+        .annotate(treatments=Count('id'), cost=Sum('cost'))
+    ):
+        entry = row(item['date'], item['livestock__species'], item['livestock__category'])
+        entry.treatments = item['treatments']
+        entry.treatment_cost = item['cost'] or 0
+
+    HerdHealthDaily.objects.filter(farm_id=farm_id, date__in=days).delete()
+    HerdHealthDaily.objects.bulk_create(rows.values())
+    now = timezone.now()
+    mortality.update(rolled_up_at=now)
+    health.update(rolled_up_at=now)
+
+
+def refresh_health_rollup(farm=None):
+    """Rebuild HerdHealthDaily for every day holding records not yet rolled up.
+
+    Returns the number of days rebuilt.
+    """
+    pending = [
+        MortalityRecord.objects.filter(rolled_up_at__isnull=True),
+        AnimalHealthRecord.objects.filter(rolled_up_at__isnull=True),
+    ]
+    days_by_farm = defaultdict(set)
+    for queryset in pending:
+        if farm is not None:
+            queryset = queryset.filter(livestock__farm=farm)
+        for farm_id, day in queryset.values_list('livestock__farm_id', 'date').distinct():
+            days_by_farm[farm_id].add(day)
+
+    rebuilt = 0
+    for farm_id, days in days_by_farm.items():
+        days = sorted(days)
+        for start in range(0, len(days), DAYS_PER_CHUNK):
+            with transaction.atomic():
+                _rebuild_days(farm_id, days[start:start + DAYS_PER_CHUNK])
+        rebuilt += len(days)
+    return rebuilt
+
+
+def invalidate_day(farm_id, day):
+    """Drop a day's rollup and queue its records to be counted again.
+
+    ``farm_id=None`` invalidates the day on every farm.
+    """
+    scope = {} if farm_id is None else {'livestock__farm_id': farm_id}
+    rollup = HerdHealthDaily.objects.filter(date=day)
+    if farm_id is not None:
+        rollup = rollup.filter(farm_id=farm_id)
+    rollup.delete()
+    MortalityRecord.objects.filter(date=day, **scope).update(rolled_up_at=None)
+    AnimalHealthRecord.objects.filter(date=day, **scope).update(rolled_up_at=None)
+
+
+def _rate(numerator, denominator):
+    if not denominator:
+        return None
+    return round(float(numerator) / float(denominator), 4)
+
+
+def _window_totals(queryset, start, end):
+    return queryset.aggregate(
+        deaths=Sum('deaths', filter=Q(date__gte=start, date__lte=end), default=0),
+        financial_loss=Sum('financial_loss', filter=Q(date__gte=start, date__lte=end), default=Decimal('0')),
+        treatments=Sum('treatments', filter=Q(date__gte=start, date__lte=end), default=0),
+        treatment_cost=Sum('treatment_cost', filter=Q(date__gte=start, date__lte=end), default=Decimal('0')),
+    )
+
+
+def herd_health_report(farm, start=None, end=None):
+    """Mortality rates, top causes, treatment cost per head and 30/90-day trends.
+
+    Rates use the live herd plus the deaths in the window as the population
+    at risk, since herd size history is not stored.
+    """
+    end = end or timezone.localdate()
+    rollup = HerdHealthDaily.objects.filter(farm=farm, date__lte=end)
+    if start:
+        rollup = rollup.filter(date__gte=start)
+
+    live = {
+        (item['species'], item['category']): item['heads'] or 0
+        for item in Livestock.objects.filter(farm=farm)
+        .exclude(status__in=[Livestock.Status.SOLD, Livestock.Status.DECEASED])
+        .values('species', 'category')
+        .annotate(heads=Sum('quantity'))
+    }
+    groups = list(
+        rollup.values('species', 'category')
+        .annotate(deaths=Sum('deaths'), treatments=Sum('treatments'), treatment_cost=Sum('treatment_cost'))
+        .order_by('species', 'category')
+    )
+    at_risk = {}
+    for item in groups:
+        key = (item['species'], item['category'])
+        at_risk[key] = live.get(key, 0) + item['deaths']
+        item['population_at_risk'] = at_risk[key]
+        item['mortality_rate'] = _rate(item['deaths'], at_risk[key])
+        item['treatment_cost_per_head'] = _rate(item['treatment_cost'], at_risk[key])
+
+    monthly = list(
+        rollup.filter(deaths__gt=0)
+        .annotate(month=TruncMonth('date'))
+        .values('month', 'species', 'category')
+        .annotate(deaths=Sum('deaths'), financial_loss=Sum('financial_loss'))
+        .order_by('month', 'species', 'category')
+    )
+    for item in monthly:
+        item['mortality_rate'] = _rate(item['deaths'], at_risk.get((item['species'], item['category'])))
+
+    top_causes = list(
+        rollup.exclude(cause='')
+        .values('cause')
+        .annotate(deaths=Sum('deaths'), financial_loss=Sum('financial_loss'))
+        .order_by('-deaths', '-financial_loss')[:TOP_CAUSES]
+    )
+
+    trend_source = HerdHealthDaily.objects.filter(farm=farm)
+    total_live = sum(live.values())
+    trends = {}
+    for days in TREND_WINDOWS:
+        current_start = end - timedelta(days=days - 1)
+        previous_end = current_start - timedelta(days=1)
+        current = _window_totals(trend_source, current_start, end)
+        previous = _window_totals(trend_source, previous_end - timedelta(days=days - 1), previous_end)
+        current['mortality_rate'] = _rate(current['deaths'], total_live + current['deaths'])
+        previous['mortality_rate'] = _rate(previous['deaths'], total_live + previous['deaths'])
+        trends[f'{days}d'] = {'current': current, 'previous': previous}
+
+    return {
+        'by_group': groups,
+        'by_month': monthly,
+        'top_causes': top_causes,
+        'trends': trends,
+    }
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class LivestockConfig(AppConfig):
     name = 'livestock'
+
+    def ready(self):
+        import livestock.signals
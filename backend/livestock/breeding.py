@@ -0,0 +1,122 @@
+"""
+Species reproduction tables and the dates derived from them.
+
+Figures are typical averages for East African smallholder breeds; a vet's
+confirmed due date can still be entered on the record and is kept. Due
+dates filled from the tables are flagged ``due_date_derived`` and follow
+later edits to the mating date.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import BreedingRecord, Livestock
+
+Species = Livestock.Species
+
+# Days from mating to delivery.
+GESTATION_DAYS = {
+    Species.CATTLE: 283,
+    Species.GOAT: 150,
+    Species.SHEEP: 147,
+    Species.PIG: 114,
+    Species.RABBIT: 31,
+}
+
+# Days between heats for a female that did not conceive.
+HEAT_CYCLE_DAYS = {
+    Species.CATTLE: 21,
+    Species.GOAT: 21,
+    Species.SHEEP: 17,
+    Species.PIG: 21,
+    Species.RABBIT: 14,
+}
+
+# Days from delivery to the first heat after it.
+POSTPARTUM_HEAT_DAYS = {
+    Species.CATTLE: 45,
+    Species.GOAT: 35,
+    Species.SHEEP: 35,
+    Species.PIG: 28,
+    Species.RABBIT: 3,
+}
+
+OPEN_STATUSES = ('PLANNED', 'MATED', 'FAILED')
+PREGNANT_STATUSES = ('CONFIRMED_PREGNANT', 'DELIVERED')
+
+
+def expected_due_date(species, mating_date):
+    days = GESTATION_DAYS.get(species)
+    if days is None or mating_date is None:
+        return None
+    return mating_date + timedelta(days=days)
+
+
+def next_heat_date(species, record, today=None):
+    """When the dam is next expected in heat, given the record's status.
+
+    A dam that has not conceived keeps cycling, so past heats roll forward
+    by whole cycles to the first one on or after ``today``.
+    """
+    if record.status in OPEN_STATUSES:
+        days = HEAT_CYCLE_DAYS.get(species)
+        start = record.mating_date
+    else:
+        days = POSTPARTUM_HEAT_DAYS.get(species)
+        start = record.actual_delivery_date or record.expected_due_date
+    if days is None or start is None:
+        return None
+    heat = start + timedelta(days=days)
+    if record.status in OPEN_STATUSES:
+        today = today or timezone.localdate()
+        if heat < today:
+            heat += timedelta(days=-(-(today - heat).days // days) * days)
+    return heat
+
+
+def apply_breeding_dates(record, species, overwrite=False, today=None):
+    """Fill expected_due_date and next_heat_date on ``record`` in place.
+
+    Returns the names of the fields that changed.
+    """
+    changed = []
+    if overwrite or record.expected_due_date is None or record.due_date_derived:
+        due = expected_due_date(species, record.mating_date)
+        if due is not None and due != record.expected_due_date:
+            record.expected_due_date = due
+            changed.append('expected_due_date')
+        if due is not None and not record.due_date_derived:
+            record.due_date_derived = True
+            changed.append('due_date_derived')
+    heat = next_heat_date(species, record, today)
+    if heat != record.next_heat_date:
+        record.next_heat_date = heat
+        changed.append('next_heat_date')
+    return changed
+
+
+def recompute_breeding_dates(queryset=None, overwrite=False, batch_size=500):
+    """Recompute derived dates for existing records in batches.
+
+    Returns the number of records updated.
+    """
+    if queryset is None:
+        queryset = BreedingRecord.objects.all()
+    queryset = queryset.select_related('dam').only(
+        'id', 'status', 'mating_date', 'expected_due_date', 'due_date_derived', 'actual_delivery_date', 'next_heat_date',
+        'dam__species',
+    ).order_by('pk')
+
+    updated = 0
+    batch = []
+    for record in queryset.iterator(chunk_size=batch_size):
+        if apply_breeding_dates(record, record.dam.species, overwrite=overwrite):
+            batch.append(record)
+        if len(batch) >= batch_size:
+            BreedingRecord.objects.bulk_update(batch, ['expected_due_date', 'due_date_derived', 'next_heat_date'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        BreedingRecord.objects.bulk_update(batch, ['expected_due_date', 'due_date_derived', 'next_heat_date'])
+        updated += len(batch)
+    return updated
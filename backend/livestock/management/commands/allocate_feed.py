@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from livestock.allocation import allocate_pending_feedings
+from livestock.models import FeedAllocation, FeedingProgram
+
+
+class Command(BaseCommand):
+    help = 'Spread new or changed feedings onto individual animals (FeedAllocation rollup).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Discard the rollup and reallocate every feeding, e.g. after regrouping animals.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            FeedAllocation.objects.all().delete()
+            FeedingProgram.objects.update(allocated_at=None)
+        count = allocate_pending_feedings()
+        self.stdout.write(self.style.SUCCESS(f'Allocated {count} feeding(s).'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from livestock.breeding import recompute_breeding_dates
+
+
+class Command(BaseCommand):
+    help = 'Fill expected due dates and next heat dates on breeding records from the species tables; run daily to roll past heats forward.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--overwrite', action='store_true',
+            help='Replace expected due dates that were entered by hand.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = recompute_breeding_dates(overwrite=options['overwrite'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated {count} breeding record(s).'))
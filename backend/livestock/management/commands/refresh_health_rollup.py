@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from livestock.analytics import refresh_health_rollup
+from livestock.models import AnimalHealthRecord, HerdHealthDaily, MortalityRecord
+
+
+class Command(BaseCommand):
+    help = 'Count new or changed mortality and health records into the HerdHealthDaily rollup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Discard the rollup and count every record again.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            HerdHealthDaily.objects.all().delete()
+            MortalityRecord.objects.update(rolled_up_at=None)
+            AnimalHealthRecord.objects.update(rolled_up_at=None)
+        days = refresh_health_rollup()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {days} day(s).'))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_landingcontent_color_accent_and_more'),
+        ('livestock', '0003_animalhealthrecord_cost_animalhealthrecord_photo_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('species', models.CharField(choices=[('CATTLE', 'Cattle'), ('POULTRY', 'Poultry'), ('GOAT', 'Goat'), ('SHEEP', 'Sheep'), ('PIG', 'Pig'), ('RABBIT', 'Rabbit'), ('OTHER', 'Other')], max_length=20)),
+                ('date', models.DateField()),
+                ('unit', models.CharField(default='kg', max_length=20)),
+                ('head_count', models.PositiveIntegerField(default=1, help_text='Animals represented by the livestock row on this date')),
+                ('quantity', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='feedingprogram',
+            name='allocated_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When this feeding was last spread into FeedAllocation', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='feedingprogram',
+            index=models.Index(fields=['farm', 'date'], name='livestock_f_farm_id_dee9a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedingprogram',
+            index=models.Index(fields=['farm', 'allocated_at'], name='livestock_f_farm_id_b3aee3_idx'),
+        ),
+        migrations.AddField(
+            model_name='feedallocation',
+            name='farm',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_allocations', to='core.farm'),
+        ),
+        migrations.AddField(
+            model_name='feedallocation',
+            name='livestock',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_allocations', to='livestock.livestock'),
+        ),
+        migrations.AddIndex(
+            model_name='feedallocation',
+            index=models.Index(fields=['farm', 'date'], name='livestock_f_farm_id_ec23ab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedallocation',
+            index=models.Index(fields=['farm', 'species', 'date'], name='livestock_f_farm_id_54469f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='feedallocation',
+            unique_together={('livestock', 'date', 'unit')},
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_landingcontent_color_accent_and_more'),
+        ('livestock', '0004_feedallocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HerdHealthDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('species', models.CharField(choices=[('CATTLE', 'Cattle'), ('POULTRY', 'Poultry'), ('GOAT', 'Goat'), ('SHEEP', 'Sheep'), ('PIG', 'Pig'), ('RABBIT', 'Rabbit'), ('OTHER', 'Other')], max_length=20)),
+                ('category', models.CharField(choices=[('HEIFER', 'Heifer'), ('CALF', 'Calf'), ('BULL', 'Bull'), ('COW', 'Cow'), ('BUCK', 'Buck'), ('DOE', 'Doe'), ('KID', 'Kid'), ('RAM', 'Ram'), ('EWE', 'Ewe'), ('LAMB', 'Lamb'), ('LAYER', 'Layer'), ('BROILER', 'Broiler'), ('KIENYEJI', 'Kienyeji'), ('CHICK', 'Chick'), ('OTHER', 'Other')], max_length=20)),
+                ('cause', models.CharField(blank=True, choices=[('DISEASE', 'Disease'), ('ACCIDENT', 'Accident'), ('OLD_AGE', 'Old Age'), ('PREDATOR', 'Predator Attack'), ('BIRTH_COMPLICATION', 'Birth Complication'), ('POISONING', 'Poisoning'), ('UNKNOWN', 'Unknown'), ('OTHER', 'Other')], help_text='Blank on treatment-only rows', max_length=20)),
+                ('deaths', models.PositiveIntegerField(default=0)),
+                ('financial_loss', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('treatments', models.PositiveIntegerField(default=0)),
+                ('treatment_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='animalhealthrecord',
+            name='rolled_up_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When this record was last counted into HerdHealthDaily', null=True),
+        ),
+        migrations.AddField(
+            model_name='mortalityrecord',
+            name='rolled_up_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When this record was last counted into HerdHealthDaily', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='animalhealthrecord',
+            index=models.Index(fields=['date'], name='livestock_a_date_412d42_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animalhealthrecord',
+            index=models.Index(fields=['rolled_up_at'], name='livestock_a_rolled__5a3c4c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mortalityrecord',
+            index=models.Index(fields=['date'], name='livestock_m_date_625bcd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mortalityrecord',
+            index=models.Index(fields=['rolled_up_at'], name='livestock_m_rolled__87992d_idx'),
+        ),
+        migrations.AddField(
+            model_name='herdhealthdaily',
+            name='farm',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='herd_health_daily', to='core.farm'),
+        ),
+        migrations.AddIndex(
+            model_name='herdhealthdaily',
+            index=models.Index(fields=['farm', 'date'], name='livestock_h_farm_id_55ab43_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='herdhealthdaily',
+            unique_together={('farm', 'date', 'species', 'category', 'cause')},
+        ),
+    ]
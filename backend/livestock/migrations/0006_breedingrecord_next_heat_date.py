@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_landingcontent_color_accent_and_more'),
+        ('livestock', '0005_herdhealthdaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='breedingrecord',
+            name='next_heat_date',
+            field=models.DateField(blank=True, editable=False, help_text='Next expected heat of the dam, from species heat-cycle tables', null=True),
+        ),
+        migrations.AlterField(
+            model_name='breedingrecord',
+            name='expected_due_date',
+            field=models.DateField(blank=True, help_text="Computed from the dam's species gestation when left blank", null=True),
+        ),
+        migrations.AddIndex(
+            model_name='breedingrecord',
+            index=models.Index(fields=['farm', 'expected_due_date'], name='livestock_b_farm_id_63957b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='breedingrecord',
+            index=models.Index(fields=['farm', 'next_heat_date'], name='livestock_b_farm_id_894e63_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+SEARCH_FIELDS = ('tag_id', 'name', 'breed', 'notes')
+
+POSTGRESQL_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    *(
+        f'CREATE INDEX IF NOT EXISTS livestock_{field}_trgm ON livestock_livestock '
+        f'USING gin (UPPER({field}) gin_trgm_ops)'
+        for field in SEARCH_FIELDS
+    ),
+]
+POSTGRESQL_BACKWARD = [f'DROP INDEX IF EXISTS livestock_{field}_trgm' for field in SEARCH_FIELDS]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE livestock_search USING fts5("
+    "livestock_id UNINDEXED, tag_id, name, breed, notes, tokenize='trigram')",
+    "CREATE TRIGGER livestock_search_insert AFTER INSERT ON livestock_livestock BEGIN "
+    "INSERT INTO livestock_search (livestock_id, tag_id, name, breed, notes) "
+    "VALUES (new.id, new.tag_id, new.name, new.breed, new.notes); END",
+    "CREATE TRIGGER livestock_search_update AFTER UPDATE OF id, tag_id, name, breed, notes ON livestock_livestock BEGIN "
+    "UPDATE livestock_search SET livestock_id = new.id, tag_id = new.tag_id, name = new.name, "
+    "breed = new.breed, notes = new.notes WHERE livestock_id = old.id; END",
+    "CREATE TRIGGER livestock_search_delete AFTER DELETE ON livestock_livestock BEGIN "
+    "DELETE FROM livestock_search WHERE livestock_id = old.id; END",
+    "INSERT INTO livestock_search (livestock_id, tag_id, name, breed, notes) "
+    "SELECT id, tag_id, name, breed, notes FROM livestock_livestock",
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS livestock_search_insert',
+    'DROP TRIGGER IF EXISTS livestock_search_update',
+    'DROP TRIGGER IF EXISTS livestock_search_delete',
+    'DROP TABLE IF EXISTS livestock_search',
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0006_breedingrecord_next_heat_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRESQL_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:37
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_memberships(apps, schema_editor):
+    """
+    Existing animals count as members of their current group from the start,
+    sold or dead ones as having left on their last update, and every feeding
+    is reallocated under the new rules.
+    """
+    Livestock = apps.get_model('livestock', 'Livestock')
+    GroupMembership = apps.get_model('livestock', 'GroupMembership')
+    FeedingProgram = apps.get_model('livestock', 'FeedingProgram')
+    GroupMembership.objects.bulk_create(
+        [
+            GroupMembership(livestock_id=livestock_id, group_id=group_id)
+            for livestock_id, group_id in Livestock.objects.filter(group__isnull=False).values_list('id', 'group_id').iterator()
+        ],
+        batch_size=1000,
+    )
+    Livestock.objects.filter(status__in=['SOLD', 'DECEASED'], exit_date__isnull=True).update(exit_date=TruncDate('updated_at'))
+    FeedingProgram.objects.update(allocated_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0007_livestock_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livestock',
+            name='exit_date',
+            field=models.DateField(blank=True, help_text='Day the animal left the farm (sold, slaughtered, given away)', null=True),
+        ),
+        migrations.AddField(
+            model_name='mortalityrecord',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1, help_text='Animals lost, for flock rows'),
+        ),
+        migrations.CreateModel(
+            name='GroupMembership',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('start_date', models.DateField(blank=True, help_text='Empty when the animal was in the group from the start', null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='livestock.animalgroup')),
+                ('livestock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_memberships', to='livestock.livestock')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'start_date'], name='livestock_g_group_i_b21343_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_memberships, migrations.RunPython.noop),
+    ]
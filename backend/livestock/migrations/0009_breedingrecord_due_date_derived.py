@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:39
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# Gestation table as of this migration, so later edits to livestock.breeding
+# do not change what counts as derived here.
+GESTATION_DAYS = {'CATTLE': 283, 'GOAT': 150, 'SHEEP': 147, 'PIG': 114, 'RABBIT': 31}
+
+
+def flag_derived_due_dates(apps, schema_editor):
+    """Due dates that match the species table were filled by the signal, not typed in."""
+    BreedingRecord = apps.get_model('livestock', 'BreedingRecord')
+    records = BreedingRecord.objects.filter(expected_due_date__isnull=False).values_list(
+        'id', 'mating_date', 'expected_due_date', 'dam__species',
+    )
+    derived = [
+        pk for pk, mating_date, due, species in records.iterator()
+        if species in GESTATION_DAYS and mating_date + timedelta(days=GESTATION_DAYS[species]) == due
+    ]
+    for start in range(0, len(derived), 1000):
+        BreedingRecord.objects.filter(id__in=derived[start:start + 1000]).update(due_date_derived=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0008_group_membership_and_exits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='breedingrecord',
+            name='due_date_derived',
+            field=models.BooleanField(default=False, editable=False, help_text='expected_due_date was computed from mating_date and follows it'),
+        ),
+        migrations.RunPython(flag_derived_due_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def requeue_flock_deaths(apps, schema_editor):
+    """Days rolled up while deaths were counted per record are counted again in heads."""
+    MortalityRecord = apps.get_model('livestock', 'MortalityRecord')
+    MortalityRecord.objects.filter(quantity__gt=1).update(rolled_up_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0009_breedingrecord_due_date_derived'),
+    ]
+
+    operations = [
+        migrations.RunPython(requeue_flock_deaths, migrations.RunPython.noop),
+    ]
@@ -53,6 +53,7 @@ class Livestock(models.Model):
     dob = models.DateField(null=True, blank=True)
     purchase_date = models.DateField(null=True, blank=True)
     purchase_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    exit_date = models.DateField(null=True, blank=True, help_text="Day the animal left the farm (sold, slaughtered, given away)")
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
     current_weight = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, help_text="Weight in kg")
     group = models.ForeignKey('AnimalGroup', on_delete=models.SET_NULL, null=True, blank=True, related_name='animals')
@@ -84,6 +85,23 @@ class AnimalGroup(models.Model):
         return self.name
 
 
+class GroupMembership(models.Model):
+    """The group an animal was in over a span of days; end_date is exclusive and empty while current."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    livestock = models.ForeignKey(Livestock, on_delete=models.CASCADE, related_name='group_memberships')
+    group = models.ForeignKey(AnimalGroup, on_delete=models.CASCADE, related_name='memberships')
+    start_date = models.DateField(null=True, blank=True, help_text="Empty when the animal was in the group from the start")
+    end_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'start_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.livestock} in {self.group} from {self.start_date or 'the start'}"
+
+
 class AnimalHealthRecord(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     livestock = models.ForeignKey(Livestock, on_delete=models.CASCADE, related_name='health_records')
@@ -96,11 +114,22 @@ class AnimalHealthRecord(models.Model):
     next_vaccination_date = models.DateField(null=True, blank=True)
     weight = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, help_text="Weight at time of record")
     photo = models.ImageField(upload_to='livestock/health/', null=True, blank=True)
+    rolled_up_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="When this record was last counted into HerdHealthDaily")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.rolled_up_at = None
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Health Record for {self.livestock.tag_id} on {self.date}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date']),
+            models.Index(fields=['rolled_up_at']),
+        ]
+
 
 class BreedingRecord(models.Model):
     """Track breeding/mating events and offspring."""
@@ -119,8 +148,10 @@ class BreedingRecord(models.Model):
     sire = models.ForeignKey(Livestock, on_delete=models.SET_NULL, null=True, blank=True, related_name='breeding_as_sire')
     sire_external = models.CharField(max_length=100, blank=True, help_text="External sire info if not in system")
     mating_date = models.DateField()
-    expected_due_date = models.DateField(null=True, blank=True)
+    expected_due_date = models.DateField(null=True, blank=True, help_text="Computed from the dam's species gestation when left blank")
+    due_date_derived = models.BooleanField(default=False, editable=False, help_text="expected_due_date was computed from mating_date and follows it")
     actual_delivery_date = models.DateField(null=True, blank=True)
+    next_heat_date = models.DateField(null=True, blank=True, editable=False, help_text="Next expected heat of the dam, from species heat-cycle tables")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PLANNED')
     offspring_count = models.PositiveIntegerField(default=0)
     offspring_details = models.TextField(blank=True)
@@ -134,6 +165,10 @@ class BreedingRecord(models.Model):
 
     class Meta:
         ordering = ['-mating_date']
+        indexes = [
+            models.Index(fields=['farm', 'expected_due_date']),
+            models.Index(fields=['farm', 'next_heat_date']),
+        ]
 
 
 class VaccinationSchedule(models.Model):
@@ -186,16 +221,28 @@ class MortalityRecord(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     livestock = models.ForeignKey(Livestock, on_delete=models.CASCADE, related_name='mortality_records')
     date = models.DateField()
+    quantity = models.PositiveIntegerField(default=1, help_text="Animals lost, for flock rows")
     cause = models.CharField(max_length=20, choices=CAUSE_CHOICES, default='UNKNOWN')
     description = models.TextField(blank=True)
     vet_report = models.TextField(blank=True)
     financial_loss = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     photo = models.ImageField(upload_to='livestock/mortality/', null=True, blank=True)
+    rolled_up_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="When this record was last counted into HerdHealthDaily")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.rolled_up_at = None
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Mortality: {self.livestock.tag_id} - {self.get_cause_display()}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date']),
+            models.Index(fields=['rolled_up_at']),
+        ]
+
 
 class FeedingProgram(models.Model):
     """Track feeding schedules and consumption."""
@@ -224,10 +271,66 @@ class FeedingProgram(models.Model):
     unit = models.CharField(max_length=20, default='kg')
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     notes = models.TextField(blank=True)
+    allocated_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="When this feeding was last spread into FeedAllocation")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        # Any change means the per-animal rollup for this day must be rebuilt.
+        self.allocated_at = None
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.get_feed_type_display()} - {self.quantity}{self.unit} on {self.date}"
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['farm', 'date']),
+            models.Index(fields=['farm', 'allocated_at']),
+        ]
+
+
+class FeedAllocation(models.Model):
+    """Daily feed quantity and cost spread onto each animal (rollup of FeedingProgram)."""
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='feed_allocations')
+    livestock = models.ForeignKey(Livestock, on_delete=models.CASCADE, related_name='feed_allocations')
+    species = models.CharField(max_length=20, choices=Livestock.Species.choices)
+    date = models.DateField()
+    unit = models.CharField(max_length=20, default='kg')
+    head_count = models.PositiveIntegerField(default=1, help_text="Animals represented by the livestock row on this date")
+    quantity = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+
+    def __str__(self):
+        return f"Feed for {self.livestock_id} on {self.date}: {self.quantity}{self.unit}"
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['livestock', 'date', 'unit']
+        indexes = [
+            models.Index(fields=['farm', 'date']),
+            models.Index(fields=['farm', 'species', 'date']),
+        ]
+
+
+class HerdHealthDaily(models.Model):
+    """Daily deaths and treatment spend per species/category (rollup of MortalityRecord and AnimalHealthRecord)."""
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='herd_health_daily')
+    date = models.DateField()
+    species = models.CharField(max_length=20, choices=Livestock.Species.choices)
+    category = models.CharField(max_length=20, choices=Livestock.Category.choices)
+    cause = models.CharField(max_length=20, choices=MortalityRecord.CAUSE_CHOICES, blank=True, help_text="Blank on treatment-only rows")
+    deaths = models.PositiveIntegerField(default=0)
+    financial_loss = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    treatments = models.PositiveIntegerField(default=0)
+    treatment_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Herd health {self.species}/{self.category} on {self.date}"
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['farm', 'date', 'species', 'category', 'cause']
+        indexes = [
+            models.Index(fields=['farm', 'date']),
+        ]
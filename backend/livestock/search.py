@@ -0,0 +1,66 @@
+"""
+Ranked livestock search over tag_id, name, breed and notes.
+
+PostgreSQL uses pg_trgm GIN indexes on UPPER(column), which is what Django's
+``icontains`` compiles to, and ranks by trigram word similarity. The local
+SQLite database uses the ``livestock_search`` FTS5 table (trigram tokenizer)
+kept in sync by triggers; both are created in migration 0007.
+"""
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+
+SEARCH_FIELDS = ('tag_id', 'name', 'breed', 'notes')
+
+# Trigram indexes cannot serve terms shorter than three characters.
+MIN_INDEXED_TERM = 3
+
+
+def _contains_any(term):
+    query = Q()
+    for field in SEARCH_FIELDS:
+        query |= Q(**{f'{field}__icontains': term})
+    return query
+
+
+def _exact_tag_first(term):
+    return Case(When(tag_id__iexact=term, then=Value(0)), default=Value(1), output_field=IntegerField())
+
+
+def _postgresql_search(queryset, term):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    rank = Greatest(*(TrigramWordSimilarity(term, field) for field in SEARCH_FIELDS))
+    return (
+        queryset.filter(_contains_any(term))
+        .annotate(search_rank=rank, exact_tag=_exact_tag_first(term))
+        .order_by('exact_tag', '-search_rank', 'tag_id')
+    )
+
+
+def _sqlite_search(queryset, term):
+    phrase = '"{}"'.format(term.replace('"', '""'))
+    # bm25() needs the MATCH on the same FROM clause, which the ORM cannot
+    # express without extra(); lower bm25 scores are better matches.
+    return (
+        queryset.extra(
+            tables=['livestock_search'],
+            where=['livestock_search MATCH %s', 'livestock_search.livestock_id = livestock_livestock.id'],
+            params=[phrase],
+            select={'search_rank': 'bm25(livestock_search)'},
+        )
+        .annotate(exact_tag=_exact_tag_first(term))
+        .order_by('exact_tag', 'search_rank', 'tag_id')
+    )
+
+
+def search_livestock(queryset, term):
+    """Filter ``queryset`` to animals matching ``term``, best matches first."""
+    term = term.strip()
+    if len(term) < MIN_INDEXED_TERM:
+        return queryset.filter(_contains_any(term)).annotate(exact_tag=_exact_tag_first(term)).order_by('exact_tag', 'tag_id')
+    if connection.vendor == 'postgresql':
+        return _postgresql_search(queryset, term)
+    if connection.vendor == 'sqlite':
+        return _sqlite_search(queryset, term)
+    return queryset.filter(_contains_any(term)).annotate(exact_tag=_exact_tag_first(term)).order_by('exact_tag', 'tag_id')
@@ -0,0 +1,129 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import allocation, analytics
+from .breeding import apply_breeding_dates
+from .models import AnimalHealthRecord, BreedingRecord, FeedingProgram, GroupMembership, Livestock, MortalityRecord
+
+
+@receiver(pre_save, sender=FeedingProgram)
+def invalidate_moved_feeding(sender, instance, **kwargs):
+    """
+    A feeding moved to another day or farm leaves a stale rollup behind on
+    the day it came from.
+    """
+    if instance._state.adding:
+        return
+    previous = FeedingProgram.objects.filter(pk=instance.pk).values('farm_id', 'date').first()
+    if previous and (previous['farm_id'], previous['date']) != (instance.farm_id, instance.date):
+        allocation.invalidate_day(previous['farm_id'], previous['date'])
+
+
+@receiver(post_delete, sender=FeedingProgram)
+def invalidate_deleted_feeding(sender, instance, **kwargs):
+    allocation.invalidate_day(instance.farm_id, instance.date)
+
+
+EXITED_STATUSES = (Livestock.Status.SOLD, Livestock.Status.DECEASED)
+
+
+@receiver(pre_save, sender=Livestock)
+def remember_allocation_fields(sender, instance, **kwargs):
+    """
+    Stash what feed allocation depends on so post_save can requeue the days
+    a regroup, exit or head count change affects. Selling or losing an
+    animal without an exit date closes it today.
+    """
+    if instance.status in EXITED_STATUSES and instance.exit_date is None:
+        instance.exit_date = timezone.localdate()
+    instance._allocation_previous = None
+    if not instance._state.adding:
+        instance._allocation_previous = (
+            Livestock.objects.filter(pk=instance.pk).values('group_id', 'exit_date', 'quantity').first()
+        )
+
+
+@receiver(post_save, sender=Livestock)
+def requeue_changed_livestock(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_allocation_previous', None)
+    if created or previous is None:
+        if instance.group_id:
+            GroupMembership.objects.create(livestock=instance, group_id=instance.group_id)
+            # A backdated entry joins group feedings that may already be shared out.
+            entered_on = allocation._entered_on({
+                'purchase_date': instance.purchase_date, 'dob': instance.dob, 'created_at': instance.created_at,
+            })
+            allocation.requeue_animal(instance.pk, since=entered_on)
+        return
+    if previous['group_id'] != instance.group_id:
+        allocation.move_to_group(instance.pk, instance.group_id, timezone.localdate())
+    if previous['quantity'] != instance.quantity:
+        allocation.requeue_animal(instance.pk)
+    elif previous['exit_date'] != instance.exit_date:
+        changed = [d for d in (previous['exit_date'], instance.exit_date) if d is not None]
+        allocation.requeue_animal(instance.pk, since=min(changed))
+
+
+@receiver(pre_delete, sender=Livestock)
+def requeue_deleted_livestock(sender, instance, **kwargs):
+    # Group feedings have to be re-shared among the animals that remain.
+    allocation.requeue_animal(instance.pk)
+
+
+@receiver(pre_save, sender=MortalityRecord)
+def remember_mortality(sender, instance, **kwargs):
+    instance._allocation_previous = None
+    if not instance._state.adding:
+        instance._allocation_previous = (
+            MortalityRecord.objects.filter(pk=instance.pk).values('livestock_id', 'date').first()
+        )
+
+
+@receiver(post_save, sender=MortalityRecord)
+def requeue_mortality(sender, instance, **kwargs):
+    """Deaths lower the head count from the day after, so reshare from there."""
+    previous = getattr(instance, '_allocation_previous', None)
+    if previous and previous['livestock_id'] != instance.livestock_id:
+        allocation.requeue_animal(previous['livestock_id'], since=previous['date'])
+        previous = None
+    since = min(instance.date, previous['date']) if previous else instance.date
+    allocation.requeue_animal(instance.livestock_id, since=since)
+
+
+@receiver(pre_save, sender=MortalityRecord)
+@receiver(pre_save, sender=AnimalHealthRecord)
+def invalidate_moved_health_record(sender, instance, **kwargs):
+    """Same as above for the herd health rollup; the farm comes via livestock."""
+    if instance._state.adding:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values('livestock__farm_id', 'livestock_id', 'date').first()
+    if previous and (previous['livestock_id'], previous['date']) != (instance.livestock_id, instance.date):
+        analytics.invalidate_day(previous['livestock__farm_id'], previous['date'])
+
+
+@receiver(post_delete, sender=MortalityRecord)
+@receiver(post_delete, sender=AnimalHealthRecord)
+def invalidate_deleted_health_record(sender, instance, **kwargs):
+    try:
+        farm_id = instance.livestock.farm_id
+    except Livestock.DoesNotExist:
+        # Cascaded from the animal itself; rebuild the day for every farm.
+        farm_id = None
+    analytics.invalidate_day(farm_id, instance.date)
+    if sender is MortalityRecord and farm_id is not None:
+        allocation.requeue_animal(instance.livestock_id, since=instance.date)
+
+
+@receiver(pre_save, sender=BreedingRecord)
+def fill_breeding_dates(sender, instance, **kwargs):
+    """
+    A derived due date follows the mating date; one typed over it (a vet's
+    scan, say) is kept from then on.
+    """
+    if not instance._state.adding and instance.due_date_derived:
+        previous = BreedingRecord.objects.filter(pk=instance.pk).values_list('expected_due_date', flat=True).first()
+        if instance.expected_due_date != previous:
+            instance.due_date_derived = False
+    if instance.dam_id:
+        apply_breeding_dates(instance, instance.dam.species)
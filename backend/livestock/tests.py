@@ -1,3 +1,177 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Farm
+
+from .allocation import allocate_pending_feedings
+from .analytics import herd_health_report, refresh_health_rollup
+from .models import AnimalGroup, BreedingRecord, FeedAllocation, FeedingProgram, HerdHealthDaily, Livestock, MortalityRecord
+
+
+class FeedAllocationTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.today = timezone.localdate()
+        self.start = self.today - timedelta(days=10)
+        self.house = AnimalGroup.objects.create(farm=self.farm, name='House 1')
+        self.small = self._flock('F-1', 100)
+        self.large = self._flock('F-2', 300)
+
+    def _flock(self, tag_id, quantity, group=None):
+        return Livestock.objects.create(
+            farm=self.farm, tag_id=tag_id, species='POULTRY', sex='FEMALE',
+            quantity=quantity, purchase_date=self.start, group=group or self.house,
+        )
+
+    def _feed(self, day, quantity='40', cost='80'):
+        return FeedingProgram.objects.create(
+            farm=self.farm, group=self.house, date=day, feed_type='LAYERS_MASH',
+            quantity=Decimal(quantity), cost=Decimal(cost),
+        )
+
+    def _allocated(self, day):
+        allocate_pending_feedings(self.farm)
+        return {
+            row.livestock_id: (row.head_count, row.quantity)
+            for row in FeedAllocation.objects.filter(farm=self.farm, date=day)
+        }
+
+    def test_group_feeding_is_split_by_head_count(self):
+        day = self.start + timedelta(days=1)
+        self._feed(day)
+
+        self.assertEqual(self._allocated(day), {
+            self.small.id: (100, Decimal('10.0000')),
+            self.large.id: (300, Decimal('30.0000')),
+        })
+
+    def test_deaths_lower_the_head_count_from_the_next_day(self):
+        death_day = self.start + timedelta(days=1)
+        self._feed(death_day, quantity='40')
+        self._feed(death_day + timedelta(days=1), quantity='30')
+        MortalityRecord.objects.create(livestock=self.large, date=death_day, quantity=100)
+
+        self.assertEqual(self._allocated(death_day)[self.large.id], (300, Decimal('30.0000')))
+        self.assertEqual(self._allocated(death_day + timedelta(days=1)), {
+            self.small.id: (100, Decimal('10.0000')),
+            self.large.id: (200, Decimal('20.0000')),
+        })
+
+    def test_recording_a_death_requeues_allocated_days(self):
+        day = self.start + timedelta(days=2)
+        self._feed(day, quantity='30')
+        self._allocated(day)
+
+        MortalityRecord.objects.create(livestock=self.large, date=day - timedelta(days=1), quantity=100)
+
+        self.assertEqual(self._allocated(day)[self.large.id], (200, Decimal('20.0000')))
+
+    def test_backdated_animal_joins_allocated_feedings(self):
+        day = self.start + timedelta(days=2)
+        self._feed(day)
+        self._allocated(day)
+
+        late = self._flock('F-3', 400)
+
+        self.assertEqual(self._allocated(day), {
+            self.small.id: (100, Decimal('5.0000')),
+            self.large.id: (300, Decimal('15.0000')),
+            late.id: (400, Decimal('20.0000')),
+        })
+
+    def test_exited_animals_are_not_fed(self):
+        sold_on = self.start + timedelta(days=2)
+        self._feed(sold_on)
+        self._feed(sold_on + timedelta(days=1))
+        self._allocated(sold_on)
+
+        self.small.exit_date = sold_on
+        self.small.status = 'SOLD'
+        self.small.save()
+
+        self.assertIn(self.small.id, self._allocated(sold_on))
+        self.assertEqual(self._allocated(sold_on + timedelta(days=1)), {self.large.id: (300, Decimal('40.0000'))})
+
+    def test_selling_without_an_exit_date_closes_today(self):
+        self.small.status = 'SOLD'
+        self.small.save()
+
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.exit_date, self.today)
+
+    def test_regroup_keeps_history_and_requeues(self):
+        yesterday = self.today - timedelta(days=1)
+        self._feed(yesterday)
+        self._feed(self.today)
+        self._allocated(self.today)
+
+        self.large.group = AnimalGroup.objects.create(farm=self.farm, name='House 2')
+        self.large.save()
+
+        self.assertFalse(FeedingProgram.objects.filter(date=self.today, allocated_at__isnull=False).exists())
+        self.assertEqual(self._allocated(yesterday)[self.large.id], (300, Decimal('30.0000')))
+        self.assertEqual(self._allocated(self.today), {self.small.id: (100, Decimal('40.0000'))})
+
+
+class HerdHealthTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.today = timezone.localdate()
+        self.flock = Livestock.objects.create(
+            farm=self.farm, tag_id='F-1', species='POULTRY', category='LAYER', sex='FEMALE', quantity=1000,
+        )
+
+    def test_flock_losses_count_every_head(self):
+        MortalityRecord.objects.create(livestock=self.flock, date=self.today, quantity=100, cause='DISEASE')
+        MortalityRecord.objects.create(livestock=self.flock, date=self.today, cause='PREDATOR')
+
+        refresh_health_rollup(self.farm)
+
+        self.assertEqual(sum(HerdHealthDaily.objects.values_list('deaths', flat=True)), 101)
+        group, = herd_health_report(self.farm)['by_group']
+        self.assertEqual((group['deaths'], group['population_at_risk']), (101, 1101))
+        self.assertEqual(group['mortality_rate'], 0.0917)
+
+
+class BreedingDateTests(TestCase):
+    def setUp(self):
+        self.farm = Farm.objects.create(name='Test Farm')
+        self.today = timezone.localdate()
+        self.cow = Livestock.objects.create(farm=self.farm, tag_id='C-1', species='CATTLE', sex='FEMALE')
+
+    def _record(self, **fields):
+        return BreedingRecord.objects.create(farm=self.farm, dam=self.cow, **fields)
+
+    def test_derived_due_date_follows_the_mating_date(self):
+        record = self._record(mating_date=self.today, status='MATED')
+        self.assertEqual(record.expected_due_date, self.today + timedelta(days=283))
+
+        record.mating_date = self.today - timedelta(days=10)
+        record.save()
+
+        record.refresh_from_db()
+        self.assertEqual(record.expected_due_date, self.today + timedelta(days=273))
+
+    def test_entered_due_date_is_kept(self):
+        record = self._record(mating_date=self.today, status='MATED')
+        confirmed = self.today + timedelta(days=280)
+        record.expected_due_date = confirmed
+        record.save()
+
+        record.mating_date = self.today - timedelta(days=10)
+        record.save()
+
+        record.refresh_from_db()
+        self.assertEqual(record.expected_due_date, confirmed)
+        self.assertFalse(record.due_date_derived)
+
+    def test_open_records_roll_next_heat_forward(self):
+        record = self._record(mating_date=self.today - timedelta(days=50), status='FAILED')
+        # Heats on day 21 and 42 after mating have passed; the next is day 63.
+        self.assertEqual(record.next_heat_date, self.today + timedelta(days=13))
 
-# Create your tests here.
+        on_the_day = self._record(mating_date=self.today - timedelta(days=42), status='FAILED')
+        self.assertEqual(on_the_day.next_heat_date, self.today)
@@ -1,17 +1,34 @@
-from rest_framework import permissions, viewsets
-from rest_framework.exceptions import ValidationError
+from datetime import timedelta
 
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from commerce.models import Sale
+from commerce.serializers import SaleSerializer
+from core.custom_data import CustomDataFilterBackend
 from core.models import Farm
+from core.params import get_date_param
+from produce.models import ProduceRecord
+from produce.serializers import ProduceRecordSerializer
 
+from .allocation import allocate_pending_feedings, feed_cost_summary
+from .analytics import herd_health_report, refresh_health_rollup
 from .models import (
     AnimalGroup,
     AnimalHealthRecord,
     BreedingRecord,
+    FeedAllocation,
     FeedingProgram,
     Livestock,
     MortalityRecord,
     VaccinationSchedule,
 )
+from .search import search_livestock
 from .serializers import (
     AnimalGroupSerializer,
     AnimalHealthRecordSerializer,
@@ -35,10 +52,52 @@ def validate_farm_relation(instance, farm, field_name):
         raise ValidationError({field_name: f'Selected {field_name} does not belong to the current farm.'})
 
 
+# Related collections served by LivestockViewSet.profile:
+# name -> (model, serializer, ordering, foreign key back to the animal)
+PROFILE_RELATIONS = {
+    'health_records': (AnimalHealthRecord, AnimalHealthRecordSerializer, '-date', 'livestock'),
+    'breeding_as_dam': (BreedingRecord, BreedingRecordSerializer, '-mating_date', 'dam'),
+    'breeding_as_sire': (BreedingRecord, BreedingRecordSerializer, '-mating_date', 'sire'),
+    'vaccinations': (VaccinationSchedule, VaccinationScheduleSerializer, '-scheduled_date', 'livestock'),
+    'feedings': (FeedingProgram, FeedingProgramSerializer, '-date', 'livestock'),
+    'mortality_records': (MortalityRecord, MortalityRecordSerializer, '-date', 'livestock'),
+    'produce_records': (ProduceRecord, ProduceRecordSerializer, '-date', 'livestock'),
+    'sales': (Sale, SaleSerializer, '-date', 'livestock'),
+}
+PROFILE_DEFAULT_LIMIT = 50
+PROFILE_MAX_LIMIT = 500
+
+
+def sparse_serializer(serializer_class, fields):
+    """Subclass ``serializer_class`` so it only renders ``fields``."""
+    meta = type('Meta', (serializer_class.Meta,), {'fields': fields})
+    return type(serializer_class.__name__, (serializer_class,), {'Meta': meta})
+
+
+def get_limit_param(request, name, default):
+    value = request.query_params.get(name)
+    if not value:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer.'})
+    if limit < 1:
+        raise ValidationError({name: 'Must be at least 1.'})
+    return min(limit, PROFILE_MAX_LIMIT)
+
+
+class LivestockSearchPagination(PageNumberPagination):
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class LivestockViewSet(viewsets.ModelViewSet):
     queryset = Livestock.objects.all()
     serializer_class = LivestockSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
     def get_queryset(self):
         farm = get_current_farm()
@@ -49,6 +108,72 @@ class LivestockViewSet(viewsets.ModelViewSet):
         validate_farm_relation(serializer.validated_data.get('group'), farm, 'group')
         serializer.save(farm=farm)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked, paginated search by partial tag_id, name, breed or notes.
+
+        Query params: q (required), species, status, page, page_size.
+        """
+        term = request.query_params.get('q', '').strip()
+        if not term:
+            raise ValidationError({'q': 'This query parameter is required.'})
+
+        queryset = self.get_queryset()
+        if request.query_params.get('species'):
+            queryset = queryset.filter(species=request.query_params['species'])
+        if request.query_params.get('status'):
+            queryset = queryset.filter(status=request.query_params['status'])
+
+        paginator = LivestockSearchPagination()
+        page = paginator.paginate_queryset(search_livestock(queryset, term), request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def profile(self, request, pk=None):
+        """The animal plus its related records in one response.
+
+        Each related collection is loaded with a single prefetch query.
+        Query params:
+            include=health_records,sales      relations to return (default: all)
+            limit=20                          rows per relation (default 50)
+            limit[health_records]=5           per-relation override
+            fields[health_records]=date,cost  sparse fields for one relation
+        """
+        include = request.query_params.get('include')
+        names = include.split(',') if include else list(PROFILE_RELATIONS)
+        unknown = [name for name in names if name not in PROFILE_RELATIONS]
+        if unknown:
+            raise ValidationError({'include': f'Unknown relation(s): {", ".join(unknown)}.'})
+        default_limit = get_limit_param(request, 'limit', PROFILE_DEFAULT_LIMIT)
+
+        prefetches = []
+        serializers_by_name = {}
+        for name in names:
+            model, serializer_class, ordering, fk_name = PROFILE_RELATIONS[name]
+            limit = get_limit_param(request, f'limit[{name}]', default_limit)
+            queryset = model.objects.order_by(ordering, 'pk')
+            fields = request.query_params.get(f'fields[{name}]')
+            if fields:
+                fields = fields.split(',')
+                concrete = {field.name for field in model._meta.concrete_fields}
+                invalid = [field for field in fields if field not in concrete]
+                if invalid:
+                    raise ValidationError({f'fields[{name}]': f'Unknown field(s): {", ".join(invalid)}.'})
+                queryset = queryset.only(*{*fields, 'pk', fk_name})
+                serializer_class = sparse_serializer(serializer_class, fields)
+            prefetches.append(Prefetch(name, queryset=queryset[:limit], to_attr=f'profile_{name}'))
+            serializers_by_name[name] = serializer_class
+
+        animal = self.get_queryset().prefetch_related(*prefetches).filter(pk=pk).first()
+        if animal is None:
+            raise NotFound()
+
+        context = self.get_serializer_context()
+        data = self.get_serializer(animal).data
+        for name, serializer_class in serializers_by_name.items():
+            data[name] = serializer_class(getattr(animal, f'profile_{name}'), many=True, context=context).data
+        return Response(data)
+
 
 class AnimalGroupViewSet(viewsets.ModelViewSet):
     queryset = AnimalGroup.objects.all()
@@ -94,6 +219,40 @@ class BreedingRecordViewSet(viewsets.ModelViewSet):
         validate_farm_relation(serializer.validated_data.get('sire'), farm, 'sire')
         serializer.save(farm=farm)
 
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """Upcoming deliveries and heats between ?from= and ?to= (default: next 30 days)."""
+        start = get_date_param(request, 'from') or timezone.localdate()
+        end = get_date_param(request, 'to') or start + timedelta(days=30)
+        if end < start:
+            raise ValidationError({'to': 'Must not be before "from".'})
+
+        due = Q(expected_due_date__range=(start, end)) & ~Q(status__in=['DELIVERED', 'FAILED'])
+        heat = Q(next_heat_date__range=(start, end))
+        records = (
+            self.get_queryset()
+            .filter(due | heat)
+            .select_related('dam')
+            .only('id', 'status', 'expected_due_date', 'next_heat_date', 'dam__id', 'dam__tag_id', 'dam__name', 'dam__species')
+        )
+
+        events = []
+        for record in records:
+            base = {
+                'breeding_record': record.id,
+                'dam': record.dam_id,
+                'dam_tag_id': record.dam.tag_id,
+                'dam_name': record.dam.name,
+                'species': record.dam.species,
+                'status': record.status,
+            }
+            if record.expected_due_date and start <= record.expected_due_date <= end and record.status not in ('DELIVERED', 'FAILED'):
+                events.append({**base, 'type': 'DELIVERY', 'date': record.expected_due_date})
+            if record.next_heat_date and start <= record.next_heat_date <= end:
+                events.append({**base, 'type': 'HEAT', 'date': record.next_heat_date})
+        events.sort(key=lambda event: (event['date'], event['type']))
+        return Response(events)
+
 
 class VaccinationScheduleViewSet(viewsets.ModelViewSet):
     queryset = VaccinationSchedule.objects.all()
@@ -125,6 +284,22 @@ class MortalityRecordViewSet(viewsets.ModelViewSet):
         validate_farm_relation(serializer.validated_data['livestock'], farm, 'livestock')
         serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """Mortality rate by species/category/month, top causes, treatment
+        cost per head and 30/90-day trends, read from HerdHealthDaily.
+
+        Query params: from=YYYY-MM-DD, to=YYYY-MM-DD.
+        """
+        farm = get_current_farm()
+        refresh_health_rollup(farm)
+        report = herd_health_report(
+            farm,
+            start=get_date_param(request, 'from'),
+            end=get_date_param(request, 'to'),
+        )
+        return Response(report)
+
 
 class FeedingProgramViewSet(viewsets.ModelViewSet):
     queryset = FeedingProgram.objects.all()
@@ -140,3 +315,33 @@ class FeedingProgramViewSet(viewsets.ModelViewSet):
         validate_farm_relation(serializer.validated_data.get('livestock'), farm, 'livestock')
         validate_farm_relation(serializer.validated_data.get('group'), farm, 'group')
         serializer.save(farm=farm)
+
+    @action(detail=False, methods=['get'], url_path='cost-allocation')
+    def cost_allocation(self, request):
+        """Per-animal (or per-species) feed quantity and cost by day or month.
+
+        Query params: period=day|month, group_by=livestock|species,
+        livestock=<id>, species=<SPECIES>, from=YYYY-MM-DD, to=YYYY-MM-DD.
+        """
+        period = request.query_params.get('period', 'day')
+        group_by = request.query_params.get('group_by', 'livestock')
+        if period not in ('day', 'month'):
+            raise ValidationError({'period': 'Expected "day" or "month".'})
+        if group_by not in ('livestock', 'species'):
+            raise ValidationError({'group_by': 'Expected "livestock" or "species".'})
+
+        farm = get_current_farm()
+        allocate_pending_feedings(farm)
+
+        queryset = FeedAllocation.objects.filter(farm=farm)
+        if request.query_params.get('livestock'):
+            queryset = queryset.filter(livestock_id=request.query_params['livestock'])
+        if request.query_params.get('species'):
+            queryset = queryset.filter(species=request.query_params['species'])
+        start, end = get_date_param(request, 'from'), get_date_param(request, 'to')
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+
+        return Response(list(feed_cost_summary(queryset, period=period, group_by=group_by)))
@@ -1,11 +1,13 @@
 from rest_framework import viewsets, permissions
 from .models import ProduceRecord
 from .serializers import ProduceRecordSerializer
+from core.custom_data import CustomDataFilterBackend
 from core.models import Farm
 
 class ProduceRecordViewSet(viewsets.ModelViewSet):
     serializer_class = ProduceRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
     def get_queryset(self):
         return ProduceRecord.objects.all()
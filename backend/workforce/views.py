@@ -1,6 +1,7 @@
 from rest_framework import permissions, viewsets
 from rest_framework.exceptions import ValidationError
 
+from core.custom_data import CustomDataFilterBackend
 from core.models import Farm
 
 from .models import Attendance, Department, Kibarua, LeaveRequest, PayrollRecord, Worker
@@ -45,6 +46,7 @@ class WorkerViewSet(viewsets.ModelViewSet):
     queryset = Worker.objects.all()
     serializer_class = WorkerSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
     def get_queryset(self):
         farm = get_current_farm()
@@ -75,6 +77,7 @@ class KibaruaViewSet(viewsets.ModelViewSet):
     queryset = Kibarua.objects.all()
     serializer_class = KibaruaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [CustomDataFilterBackend]
 
     def get_queryset(self):
         farm = get_current_farm()